@@ -1,9 +1,122 @@
 import os
-from sqlalchemy import create_engine
+import time
+from contextlib import AsyncExitStack
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from dotenv import load_dotenv
 
+from app.services.metrics import Histogram
+from app.services.query_trace import current_request
+from app.statements import STATEMENTS, statement
+
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(DATABASE_URL)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_POOL_WARMUP = int(os.getenv("DB_POOL_WARMUP", "0"))
+# Prepared statements kept per connection by the asyncpg driver. Sized to
+# hold every statement in app.statements so none are re-parsed after
+# warm-up; set 0 behind a transaction-mode pgbouncer.
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "256"))
+
+
+def async_database_url(url: str):
+    """
+    Point a plain postgres:// URL at the asyncpg driver.
+    asyncpg takes `ssl` instead of libpq's `sslmode`.
+    """
+    url = make_url(url).set(drivername="postgresql+asyncpg")
+
+    if "sslmode" in url.query:
+        url = url.update_query_dict(
+            {"ssl": url.query["sslmode"]}
+        ).difference_update_query(["sslmode"])
+
+    return url
+
+
+# Time spent waiting for a pooled connection, including timeouts.
+checkout_wait = Histogram()
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            checkout_wait.observe(time.perf_counter() - started)
+
+
+engine = create_async_engine(
+    async_database_url(DATABASE_URL),
+    poolclass=InstrumentedPool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+    connect_args={"prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE},
+)
+
+
+# Every statement's round trip, in or out of a request.
+query_seconds = Histogram()
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _query_started(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _query_finished(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_started
+    query_seconds.observe(elapsed)
+
+    stats = current_request.get()
+    if stats is not None:
+        stats.record(context, statement, elapsed)
+
+
+PING = statement("database.ping", "SELECT 1")
+
+
+async def warm_up_pool(count: int = DB_POOL_WARMUP):
+    """
+    Open `count` connections up front so the first requests after a
+    deploy don't pay for connection setup.
+    """
+    count = min(count, DB_POOL_SIZE)
+
+    async with AsyncExitStack() as stack:
+        for _ in range(count):
+            connection = await stack.enter_async_context(engine.connect())
+            await connection.execute(PING)
+
+
+def pool_stats() -> dict:
+    pool = engine.pool
+
+    return {
+        "pool_size": pool.size(),
+        "max_overflow": DB_MAX_OVERFLOW,
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "timeout": DB_POOL_TIMEOUT,
+        "recycle": DB_POOL_RECYCLE,
+        "pre_ping": DB_POOL_PRE_PING,
+        "statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+        "registered_statements": len(STATEMENTS),
+        "checkout_wait_seconds": checkout_wait.snapshot(),
+        "query_seconds": query_seconds.snapshot()
+    }
@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -10,13 +11,28 @@ from app.routes import super_admin
 from fastapi.staticfiles import StaticFiles
 import os
 from app.routes import payment
+from app.routes.metrics import router as metrics_router
+from app.database import engine, warm_up_pool
+from app.services.image_convert import shutdown_executor
+from app.services.request_metrics import RequestMetricsMiddleware
+from app.services.storage import close_storage
+from app.routes.files import router as files_router
 from fastapi.staticfiles import StaticFiles
 
 
 
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await warm_up_pool()
+    yield
+    shutdown_executor()
+    await close_storage()
+    await engine.dispose()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS: allow local dev servers + MVP wildcard.
 origins = [
@@ -36,7 +52,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[
+        "X-Next-Cursor",
+        "X-Query-Count",
+        "X-Query-Time-Ms",
+        "X-Query-Trace",
+        "X-Query-Repeats"
+    ],
 )
+# Added last so it wraps CORS too and times the whole request.
+app.add_middleware(RequestMetricsMiddleware)
+# Payment proofs saved here before the storage backends existed.
 UPLOAD_DIR = "app/uploads"
 
 if not os.path.exists(UPLOAD_DIR):
@@ -51,8 +77,6 @@ if os.path.isdir(FRONTEND_UI_DIR):
     app.mount("/ui", StaticFiles(directory=FRONTEND_UI_DIR), name="ui")
 
 # Include each router exactly once to avoid duplicate routes/operation_ids.
-app.mount("/storage", StaticFiles(directory="storage"), name="storage")
-
 app.include_router(test_db_router)
 app.include_router(shops_router)
 app.include_router(orders_router)
@@ -60,6 +84,8 @@ app.include_router(admin.router)
 app.include_router(student_router)
 app.include_router(super_admin.router)
 app.include_router(payment.router)
+app.include_router(metrics_router)
+app.include_router(files_router)
 
 
 @app.get("/")
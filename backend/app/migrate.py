@@ -0,0 +1,66 @@
+"""
+Applies backend/migrations/*.sql in order, once each.
+
+    python -m app.migrate
+"""
+
+import asyncio
+import os
+
+from app.database import engine
+
+MIGRATIONS_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "migrations")
+)
+
+
+def migration_files():
+    return sorted(
+        name for name in os.listdir(MIGRATIONS_DIR)
+        if name.endswith(".sql")
+    )
+
+
+async def migrate():
+    async with engine.connect() as connection:
+        # Files hold several statements, which asyncpg only runs through
+        # its simple-query path, so work on the driver connection directly.
+        raw = (await connection.get_raw_connection()).driver_connection
+
+        await raw.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version TEXT PRIMARY KEY,
+                applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            )
+        """)
+
+        applied = {
+            row["version"]
+            for row in await raw.fetch("SELECT version FROM schema_migrations")
+        }
+
+        for name in migration_files():
+            version = name.split(".")[0]
+            if version in applied:
+                continue
+
+            with open(os.path.join(MIGRATIONS_DIR, name)) as f:
+                sql = f.read()
+
+            async with raw.transaction():
+                await raw.execute(sql)
+                await raw.execute(
+                    "INSERT INTO schema_migrations (version) VALUES ($1)",
+                    version
+                )
+
+            print(f"applied {name}")
+
+
+async def main():
+    await migrate()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
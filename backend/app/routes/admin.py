@@ -1,7 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import text
+from fastapi import APIRouter, Depends, HTTPException, Response
+from typing import Optional
 from app.database import engine
 from app.dependencies.admin_auth import require_admin
+from app.services.order_detail import admin_view, fetch_order_detail
+from app.services.pagination import KeysetQuery, fetch_page
+from app.services.query_trace import query_budget
+from app.services.serialization import rows_response
+from app.statements import statement
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
@@ -10,59 +15,92 @@ router = APIRouter(prefix="/admin", tags=["Admin"])
 # GET ALL ORDERS
 # =====================================================
 
-@router.get("/orders")
-def get_orders(auth=Depends(require_admin)):
-
-    base_query = """
-        SELECT
-            o.*,
-
-            -- Student Info
-            u.username AS full_name,
-            u.roll_no AS roll_no,
-
-            -- Print Options
-            po.page_ranges,
-            po.color_mode,
-            po.side_mode,
-            po.orientation,
-            po.binding,
-            po.copies,
-
-            -- Latest Document
-            doc.original_filename AS document_name,
-            doc.file_url AS document_url
-
-        FROM orders o
-
-        LEFT JOIN users u
-            ON u.id = o.student_id
+ORDER_LIST_SELECT = """
+    SELECT
+        o.id,
+        o.student_id,
+        o.shop_id,
+        o.status,
+        o.payment_status,
+        o.payment_mode,
+        o.payment_verification_status,
+        o.total_pages,
+        o.estimated_cost,
+        o.final_cost,
+        o.estimated_ready_time,
+        o.paid_at,
+        o.created_at,
+
+        -- Student Info
+        u.username AS full_name,
+        u.roll_no AS roll_no,
+
+        -- Print Options
+        po.page_ranges,
+        po.color_mode,
+        po.side_mode,
+        po.orientation,
+        po.binding,
+        po.copies,
+
+        -- Latest Document
+        doc.original_filename AS document_name,
+        doc.file_url AS document_url
+
+    FROM orders o
+
+    LEFT JOIN users u
+        ON u.id = o.student_id
+
+    LEFT JOIN print_options po
+        ON po.order_id = o.id
+
+    LEFT JOIN LATERAL (
+        SELECT od.original_filename, od.file_url
+        FROM order_documents od
+        WHERE od.order_id = o.id
+        ORDER BY od.uploaded_at DESC
+        LIMIT 1
+    ) doc ON TRUE
+"""
+
+ALL_ORDERS = KeysetQuery(
+    "admin.all_orders", ORDER_LIST_SELECT + " WHERE TRUE", alias="o"
+)
+SHOP_ORDERS = KeysetQuery(
+    "admin.shop_orders",
+    ORDER_LIST_SELECT + " WHERE o.shop_id = :shop_id", alias="o"
+)
+ALL_ORDERS_BY_STATUS = KeysetQuery(
+    "admin.all_orders_by_status",
+    ORDER_LIST_SELECT + " WHERE o.status = :status", alias="o"
+)
+SHOP_ORDERS_BY_STATUS = KeysetQuery(
+    "admin.shop_orders_by_status",
+    ORDER_LIST_SELECT + " WHERE o.status = :status AND o.shop_id = :shop_id",
+    alias="o"
+)
 
-        LEFT JOIN print_options po
-            ON po.order_id = o.id
 
-        LEFT JOIN LATERAL (
-            SELECT od.original_filename, od.file_url
-            FROM order_documents od
-            WHERE od.order_id = o.id
-            ORDER BY od.uploaded_at DESC
-            LIMIT 1
-        ) doc ON TRUE
-    """
+@router.get("/orders")
+async def get_orders(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    auth=Depends(require_admin)
+):
 
     if auth["role"] == "SUPER_ADMIN":
-        query = text(base_query + " ORDER BY o.created_at DESC")
+        query = ALL_ORDERS
         params = {}
     else:
-        query = text(base_query + """
-            WHERE o.shop_id = :shop_id
-            ORDER BY o.created_at DESC
-        """)
+        query = SHOP_ORDERS
         params = {"shop_id": auth["shop_id"]}
 
-    with engine.connect() as connection:
-        result = connection.execute(query, params)
-        return [dict(row._mapping) for row in result]
+    async with engine.connect() as connection:
+        rows = await fetch_page(connection, query, params, response, cursor, limit)
+
+    return rows_response(rows, response)
 
 
 # =====================================================
@@ -70,112 +108,86 @@ def get_orders(auth=Depends(require_admin)):
 # =====================================================
 
 @router.get("/orders/status/{status}")
-def orders_by_status(status: str, auth=Depends(require_admin)):
+async def orders_by_status(
+    status: str,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    auth=Depends(require_admin)
+):
 
     status = status.upper()
 
     if status not in ["PENDING", "IN_PROGRESS", "COMPLETED", "DELIVERED", "CANCELLED"]:
         raise HTTPException(400, "Invalid status")
 
-    base_query = """
-        SELECT
-            o.*,
-
-            u.username AS full_name,
-            u.roll_no AS roll_no,
-
-            po.page_ranges,
-            po.color_mode,
-            po.side_mode,
-            po.orientation,
-            po.binding,
-            po.copies,
-
-            doc.original_filename AS document_name,
-            doc.file_url AS document_url
-
-        FROM orders o
-
-        LEFT JOIN users u
-            ON u.id = o.student_id
-
-        LEFT JOIN print_options po
-            ON po.order_id = o.id
-
-        LEFT JOIN LATERAL (
-            SELECT od.original_filename, od.file_url
-            FROM order_documents od
-            WHERE od.order_id = o.id
-            ORDER BY od.uploaded_at DESC
-            LIMIT 1
-        ) doc ON TRUE
-
-        WHERE o.status = :status
-    """
-
     if auth["role"] == "SUPER_ADMIN":
-        query = text(base_query + " ORDER BY o.created_at DESC")
+        query = ALL_ORDERS_BY_STATUS
         params = {"status": status}
     else:
-        query = text(base_query + """
-            AND o.shop_id = :shop_id
-            ORDER BY o.created_at DESC
-        """)
+        query = SHOP_ORDERS_BY_STATUS
         params = {"status": status, "shop_id": auth["shop_id"]}
 
-    with engine.connect() as connection:
-        result = connection.execute(query, params)
-        return [dict(row._mapping) for row in result]
+    async with engine.connect() as connection:
+        rows = await fetch_page(connection, query, params, response, cursor, limit)
+
+    return rows_response(rows, response)
 
 
 # =====================================================
 # ANALYTICS
 # =====================================================
 
-def analytics_query(group_by: str):
-    return f"""
+# Read from shop_daily_stats (app/services/rollups.py), never from orders.
+ANALYTICS_PERIODS = {
+    "daily": "day",
+    "weekly": "DATE_TRUNC('week', day::timestamp)",
+    "monthly": "DATE_TRUNC('month', day::timestamp)",
+}
+
+
+def analytics_query(range: str, scope: str, period: str, shop_filter: str):
+    return statement(f"admin.analytics_{range}_{scope}", f"""
         SELECT
-            {group_by} AS period,
-            COUNT(*) AS total_orders,
-            SUM(estimated_cost) AS total_revenue
-        FROM orders
-        WHERE status IN ('COMPLETED', 'DELIVERED')
-        {{shop_filter}}
-        GROUP BY period
-        ORDER BY period DESC
-    """
+            {period} AS period,
+            SUM(fulfilled_orders) AS total_orders,
+            SUM(fulfilled_revenue) AS total_revenue
+        FROM shop_daily_stats
+        {shop_filter}
+        GROUP BY 1
+        HAVING SUM(fulfilled_orders) > 0
+        ORDER BY 1 DESC
+    """)
+
+
+ANALYTICS = {
+    range: {
+        "all": analytics_query(range, "all", period, ""),
+        "shop": analytics_query(
+            range, "shop", period, "WHERE shop_id = :shop_id"
+        ),
+    }
+    for range, period in ANALYTICS_PERIODS.items()
+}
 
 
 @router.get("/analytics/{range}")
-def analytics(range: str, auth=Depends(require_admin)):
+async def analytics(range: str, auth=Depends(require_admin)):
 
     range = range.lower()
 
-    if range == "daily":
-        group_by = "DATE(created_at)"
-    elif range == "weekly":
-        group_by = "DATE_TRUNC('week', created_at)"
-    elif range == "monthly":
-        group_by = "DATE_TRUNC('month', created_at)"
-    else:
+    if range not in ANALYTICS:
         raise HTTPException(400, "Range must be daily, weekly, or monthly")
 
     if auth["role"] == "SUPER_ADMIN":
-        query = text(
-            analytics_query(group_by).replace("{shop_filter}", "")
-        )
+        query = ANALYTICS[range]["all"]
         params = {}
     else:
-        query = text(
-            analytics_query(group_by).replace(
-                "{shop_filter}",
-                "AND shop_id = :shop_id"
-            )
-        )
+        query = ANALYTICS[range]["shop"]
         params = {"shop_id": auth["shop_id"]}
 
-    with engine.connect() as connection:
-        result = connection.execute(query, params)
+    async with engine.connect() as connection:
+        result = await connection.execute(query, params)
 
         return {
             "range": range,
@@ -184,47 +196,15 @@ def analytics(range: str, auth=Depends(require_admin)):
         }
 
 @router.get("/orders/{order_id}")
-def get_single_order(order_id: str, auth=Depends(require_admin)):
+@query_budget(1)
+async def get_single_order(order_id: str, auth=Depends(require_admin)):
 
-    base_query = """
-        SELECT
-            o.*,
-            u.username AS student_name,
-            u.roll_no AS student_roll_no,
-            po.page_ranges,
-            po.color_mode,
-            po.side_mode,
-            po.orientation,
-            po.binding,
-            po.copies,
-            doc.original_filename AS document_name,
-            doc.file_url AS document_url
-        FROM orders o
-        LEFT JOIN users u ON u.id = o.student_id
-        LEFT JOIN print_options po ON po.order_id = o.id
-        LEFT JOIN LATERAL (
-            SELECT od.original_filename, od.file_url
-            FROM order_documents od
-            WHERE od.order_id = o.id
-            ORDER BY od.uploaded_at DESC
-            LIMIT 1
-        ) doc ON TRUE
-        WHERE o.id = :order_id
-    """
-
-    if auth["role"] != "SUPER_ADMIN":
-        base_query += " AND o.shop_id = :shop_id"
-
-    query = text(base_query)
-
-    params = {"order_id": order_id}
-    if auth["role"] != "SUPER_ADMIN":
-        params["shop_id"] = auth["shop_id"]
-
-    with engine.connect() as connection:
-        result = connection.execute(query, params).fetchone()
-
-        if not result:
-            raise HTTPException(404, "Order not found")
-
-        return dict(result._mapping)
+    async with engine.connect() as connection:
+        order = await fetch_order_detail(
+            connection, order_id, shop_id=auth["shop_id"]
+        )
+
+    if not order:
+        raise HTTPException(404, "Order not found")
+
+    return admin_view(order)
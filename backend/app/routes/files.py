@@ -0,0 +1,60 @@
+import os
+import stat
+
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import FileResponse
+
+from app.services.storage import LocalStorage, get_storage
+
+router = APIRouter(tags=["Files"])
+
+
+def strong_etag(stat_result: os.stat_result) -> str:
+    # Uploads replace files atomically, so inode + mtime + size changes
+    # whenever the bytes do.
+    return '"{:x}-{:x}-{:x}"'.format(
+        stat_result.st_ino, stat_result.st_mtime_ns, stat_result.st_size
+    )
+
+
+def etag_matches(etag: str, header: str) -> bool:
+    candidates = [value.strip() for value in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+# =====================================================
+# LOCAL STORAGE (RANGE + ETAG)
+# =====================================================
+@router.api_route("/storage/{path:path}", methods=["GET", "HEAD"])
+async def serve_file(path: str, request: Request):
+    storage = get_storage()
+
+    if not isinstance(storage, LocalStorage):
+        raise HTTPException(404, "File not found")
+
+    try:
+        full_path = storage.resolve(path)
+        stat_result = os.stat(full_path)
+    except (ValueError, OSError):
+        raise HTTPException(404, "File not found")
+
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise HTTPException(404, "File not found")
+
+    etag = strong_etag(stat_result)
+    headers = {
+        "etag": etag,
+        "cache-control": "private, max-age=3600",
+    }
+
+    if etag_matches(etag, request.headers.get("if-none-match", "")):
+        return Response(status_code=304, headers=headers)
+
+    # FileResponse answers Range / If-Range itself and hands the path to
+    # the server (http.response.pathsend) when it supports zero-copy.
+    return FileResponse(
+        full_path,
+        stat_result=stat_result,
+        headers=headers,
+        content_disposition_type="inline",
+    )
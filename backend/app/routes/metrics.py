@@ -0,0 +1,71 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.database import checkout_wait, engine, pool_stats, query_seconds
+from app.services.image_convert import convert_seconds, image_stats, queue_wait_seconds
+from app.services.pricing import rate_cards
+from app.services.request_metrics import route_metrics
+from app.services.shop_cache import shop_cache
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+# =====================================================
+# PROMETHEUS
+# =====================================================
+@router.get("", response_class=PlainTextResponse)
+async def get_prometheus_metrics():
+    """
+    Per-route latency, DB time, query counts and response sizes, plus
+    the pool and image histograms, in Prometheus text format.
+    """
+    pool = engine.pool
+    lines = route_metrics.prometheus()
+
+    for name, histogram in (
+        ("printmate_db_query_seconds", query_seconds),
+        ("printmate_db_pool_checkout_wait_seconds", checkout_wait),
+        ("printmate_image_convert_seconds", convert_seconds),
+        ("printmate_image_queue_wait_seconds", queue_wait_seconds)
+    ):
+        lines.append(f"# TYPE {name} histogram")
+        lines.extend(histogram.prometheus(name))
+
+    lines += [
+        "# TYPE printmate_db_pool_checked_out gauge",
+        f"printmate_db_pool_checked_out {pool.checkedout()}",
+        "# TYPE printmate_db_pool_idle gauge",
+        f"printmate_db_pool_idle {pool.checkedin()}"
+    ]
+
+    return PlainTextResponse(
+        "\n".join(lines) + "\n",
+        media_type="text/plain; version=0.0.4"
+    )
+
+
+# =====================================================
+# CONNECTION POOL
+# =====================================================
+@router.get("/pool")
+async def get_pool_metrics():
+    return pool_stats()
+
+
+# =====================================================
+# IMAGE → PDF CONVERSION
+# =====================================================
+@router.get("/images")
+async def get_image_metrics():
+    return image_stats()
+
+
+# =====================================================
+# SHOP / RATE CARD CACHES
+# =====================================================
+@router.get("/cache")
+async def get_cache_metrics():
+    return {
+        "shops": shop_cache.stats(),
+        "rate_cards": rate_cards.stats()
+    }
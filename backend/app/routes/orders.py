@@ -1,10 +1,18 @@
 
-from fastapi import APIRouter, HTTPException, Header
-from sqlalchemy import text
-from datetime import datetime, timedelta
+from fastapi import APIRouter, File, HTTPException, Header, UploadFile
+import uuid
 from typing import Optional
 from fastapi import Query
 from app.database import engine
+from app.services.events import RESYNC, shop_events
+from app.services.order_detail import admin_view, fetch_order_detail
+from app.services.order_hooks import order_changed, order_created, orders_changed, orders_created
+from app.services.order_import import clean_row, parse_import
+from app.services.order_transitions import INSERT_INVOICES, VALID_TRANSITIONS, allowed_from, transition, updated_order
+from app.services.pricing import calculate_price, get_rate_card
+from app.services.queue_stats import enqueue, enqueue_many
+from app.services.query_trace import query_budget
+from app.statements import statement
 
 router = APIRouter(prefix="/orders", tags=["Orders"])
 
@@ -12,127 +20,403 @@ router = APIRouter(prefix="/orders", tags=["Orders"])
 # GET ORDER DETAIL (ADMIN & STUDENT)
 # =====================================================
 @router.get("/detail/{order_id}")
-def get_order_detail(order_id: str):
-    with engine.connect() as connection:
-        order = connection.execute(
-            text("""
-                SELECT 
-                    o.*,
-                    u.username AS student_name,
-                    u.roll_no AS student_roll_no
-                FROM orders o
-                LEFT JOIN users u 
-                    ON o.student_id = u.id
-                WHERE o.id = :id
-            """),
-            {"id": order_id}
-        ).mappings().first()
-        print(order)
+@query_budget(1)
+async def get_order_detail(order_id: str):
+    async with engine.connect() as connection:
+        order = await fetch_order_detail(connection, order_id)
         if not order:
             raise HTTPException(status_code=404, detail="Order not found")
 
-    return order
+    return admin_view(order)
 
 
 
 # =====================================================
 # ORDER CREATION
 # =====================================================
+PRICE_OPTIONS = ("color_mode", "side_mode", "copies", "binding")
+
+
+ORDER_STUDENT = statement("orders.order_student", """
+    SELECT id, full_name, roll_no FROM users WHERE id = :id
+""")
+
+ORDER_SHOP = statement("orders.order_shop", """
+    SELECT accepting_orders, avg_print_time_per_page
+    FROM shops
+    WHERE id = :shop_id
+""")
+
+INSERT_ORDER = statement("orders.insert_order", """
+    INSERT INTO orders (
+        student_id,
+        shop_id,
+        total_pages,
+        status,
+        payment_status,
+        estimated_cost,
+        estimated_ready_time
+    )
+    VALUES (
+        :student_id,
+        :shop_id,
+        :total_pages,
+        'PENDING',
+        'UNPAID',
+        :estimated_cost,
+        :eta
+    )
+    RETURNING *
+""")
+
+
 @router.post("/")
-def create_order(
+@query_budget(7)
+async def create_order(
     order: dict,
     student_id: str = Header(..., alias="X-STUDENT-ID")
 ):
-    required_fields = ["shop_id", "total_pages", "estimated_cost"]
+    # With print options the price comes from the shop's rate card;
+    # otherwise the client's estimate is taken as before.
+    priced = all(option in order for option in PRICE_OPTIONS)
+
+    required_fields = ["shop_id", "total_pages"]
+    if not priced:
+        required_fields.append("estimated_cost")
     for field in required_fields:
         if field not in order:
             raise HTTPException(400, f"{field} is required")
 
-    with engine.connect() as connection:
+    async with engine.connect() as connection:
         # Validate Student
-        student = connection.execute(
-            text("SELECT id FROM users WHERE id = :id"),
+        student = (await connection.execute(
+            ORDER_STUDENT,
             {"id": student_id}
-        ).fetchone()
+        )).fetchone()
         if not student:
             raise HTTPException(400, "Invalid student ID")
 
         # Validate Shop
-        shop = connection.execute(
-            text("""
-                SELECT accepting_orders, avg_print_time_per_page
-                FROM shops
-                WHERE id = :shop_id
-            """),
+        shop = (await connection.execute(
+            ORDER_SHOP,
             {"shop_id": order["shop_id"]}
-        ).fetchone()
+        )).fetchone()
         if not shop:
             raise HTTPException(404, "Shop not found")
         if not shop.accepting_orders:
             raise HTTPException(400, "Shop not accepting orders")
 
-        # Calculate ETA
-        queued_pages = connection.execute(
-            text("""
-                SELECT COALESCE(SUM(total_pages), 0)
-                FROM orders
-                WHERE shop_id = :shop_id
-                  AND status IN ('PENDING', 'IN_PROGRESS')
-            """),
-            {"shop_id": order["shop_id"]}
-        ).scalar()
         total_pages = int(order["total_pages"])
-        eta = datetime.utcnow() + timedelta(
-            seconds=(queued_pages + total_pages) * shop.avg_print_time_per_page
+        estimated_cost = order.get("estimated_cost")
+
+        if priced:
+            try:
+                estimated_cost = calculate_price(
+                    total_pages=total_pages,
+                    color_mode=order["color_mode"],
+                    side_mode=order["side_mode"],
+                    copies=int(order["copies"]),
+                    binding=order["binding"],
+                    card=await get_rate_card(connection, order["shop_id"])
+                )
+            except (KeyError, TypeError, ValueError):
+                raise HTTPException(400, "Invalid print options")
+
+        # Calculate ETA from the shop's running queue totals
+        eta = await enqueue(
+            connection,
+            order["shop_id"],
+            total_pages,
+            shop.avg_print_time_per_page
         )
 
         # Insert Order
-        result = connection.execute(
-            text("""
-                INSERT INTO orders (
-                    student_id,
-                    shop_id,
-                    total_pages,
-                    status,
-                    payment_status,
-                    estimated_cost,
-                    estimated_ready_time
-                )
-                VALUES (
-                    :student_id,
-                    :shop_id,
-                    :total_pages,
-                    'PENDING',
-                    'UNPAID',
-                    :estimated_cost,
-                    :eta
-                )
-                RETURNING *
-            """),
+        result = (await connection.execute(
+            INSERT_ORDER,
             {
                 "student_id": student_id,
                 "shop_id": order["shop_id"],
                 "total_pages": total_pages,
-                "estimated_cost": order["estimated_cost"],
+                "estimated_cost": estimated_cost,
                 "eta": eta
             }
-        ).fetchone()
-        connection.commit()
+        )).fetchone()
+
+        await order_created(connection, result)
+
+        await connection.commit()
+
+    shop_events.publish(result.shop_id, {
+        "type": "order_created",
+        "order": {
+            "order_id": result.id,
+            "student_name": student.full_name,
+            "roll_no": student.roll_no,
+            "status": result.status,
+            "total_pages": result.total_pages,
+            "estimated_ready_time": result.estimated_ready_time,
+            "created_at": result.created_at
+        }
+    })
 
     return {"order_id": result.id, **dict(result._mapping)}
 
+# =====================================================
+# BULK ORDER CREATION / IMPORT
+# =====================================================
+BULK_CREATE_MAX_ORDERS = 1000
+
+BULK_STUDENTS = statement("orders.bulk_students", """
+    SELECT id FROM users WHERE id = ANY(CAST(:ids AS uuid[]))
+""")
+
+BULK_SHOPS = statement("orders.bulk_shops", """
+    SELECT id, accepting_orders, avg_print_time_per_page
+    FROM shops
+    WHERE id = ANY(CAST(:ids AS uuid[]))
+""")
+
+BULK_INSERT = statement("orders.bulk_insert", """
+    INSERT INTO orders (
+        student_id,
+        shop_id,
+        total_pages,
+        status,
+        payment_status,
+        estimated_cost,
+        estimated_ready_time
+    )
+    SELECT
+        v.student_id,
+        v.shop_id,
+        v.total_pages,
+        'PENDING',
+        'UNPAID',
+        v.estimated_cost,
+        v.eta
+    FROM unnest(
+        CAST(:student_ids AS uuid[]),
+        CAST(:shop_ids AS uuid[]),
+        CAST(:total_pages AS integer[]),
+        CAST(:estimated_costs AS numeric[]),
+        CAST(:etas AS timestamptz[])
+    ) AS v(student_id, shop_id, total_pages, estimated_cost, eta)
+    RETURNING *
+""")
+
+
+async def create_orders_bulk(rows, role, shop_id, default_shop_id=None):
+    """
+    Creates every row or none. Students and shops are each checked with
+    one query, ETAs come from one queue update per shop, and the orders
+    go in as a single INSERT.
+    """
+    role = role.strip().upper()
+
+    if role not in ("ADMIN", "SUPER_ADMIN"):
+        raise HTTPException(403, "Access denied")
+
+    if not rows:
+        raise HTTPException(400, "No orders to create")
+
+    if len(rows) > BULK_CREATE_MAX_ORDERS:
+        raise HTTPException(
+            400, f"At most {BULK_CREATE_MAX_ORDERS} orders per request"
+        )
+
+    if role == "ADMIN":
+        # Same canonical form clean_row gives the rows' shop ids.
+        try:
+            shop_id = str(uuid.UUID(str(shop_id).strip()))
+        except ValueError:
+            raise HTTPException(400, "Invalid X-SHOP-ID")
+        default_shop_id = default_shop_id or shop_id
+
+    orders = []
+    errors = []
+    for index, row in enumerate(rows):
+        try:
+            order = clean_row(row, default_shop_id)
+        except ValueError as e:
+            errors.append({"row": index, "detail": str(e)})
+            continue
+        if role == "ADMIN" and order["shop_id"] != shop_id:
+            errors.append({"row": index, "detail": "Not your shop"})
+            continue
+        orders.append((index, order))
+
+    async with engine.connect() as connection:
+
+        students = {
+            str(student_id)
+            for student_id in (await connection.execute(
+                BULK_STUDENTS,
+                {"ids": list({order["student_id"] for _, order in orders})}
+            )).scalars()
+        }
+
+        shops = {
+            str(shop.id): shop
+            for shop in await connection.execute(
+                BULK_SHOPS,
+                {"ids": list({order["shop_id"] for _, order in orders})}
+            )
+        }
+
+        for index, order in orders:
+            shop = shops.get(order["shop_id"])
+            if order["student_id"] not in students:
+                errors.append({"row": index, "detail": "Invalid student ID"})
+            elif not shop:
+                errors.append({"row": index, "detail": "Shop not found"})
+            elif not shop.accepting_orders:
+                errors.append({"row": index, "detail": "Shop not accepting orders"})
+
+        if errors:
+            raise HTTPException(
+                400, {"errors": sorted(errors, key=lambda e: e["row"])}
+            )
+
+        # One queue snapshot per shop, ETAs stacked in row order
+        etas = {}
+        for shop_key in sorted(shops):
+            batch = [
+                (index, order) for index, order in orders
+                if order["shop_id"] == shop_key
+            ]
+            ready_times = await enqueue_many(
+                connection,
+                shops[shop_key].id,
+                [order["total_pages"] for _, order in batch],
+                shops[shop_key].avg_print_time_per_page
+            )
+            etas.update(zip((index for index, _ in batch), ready_times))
+
+        created = (await connection.execute(BULK_INSERT, {
+            "student_ids": [order["student_id"] for _, order in orders],
+            "shop_ids": [order["shop_id"] for _, order in orders],
+            "total_pages": [order["total_pages"] for _, order in orders],
+            "estimated_costs": [order["estimated_cost"] for _, order in orders],
+            "etas": [etas[index] for index, _ in orders]
+        })).fetchall()
+
+        await orders_created(connection, created)
+
+        await connection.commit()
+
+    for shop_key in shops:
+        shop_events.publish(shop_key, RESYNC)
+
+    return {
+        "created": len(created),
+        "orders": [
+            {
+                "order_id": order.id,
+                "student_id": order.student_id,
+                "shop_id": order.shop_id,
+                "total_pages": order.total_pages,
+                "estimated_cost": order.estimated_cost,
+                "estimated_ready_time": order.estimated_ready_time
+            }
+            for order in created
+        ]
+    }
+
+
+@router.post("/bulk-create")
+async def bulk_create_orders(
+    payload: dict,
+    role: str = Header(..., alias="X-ROLE"),
+    shop_id: Optional[str] = Header(None, alias="X-SHOP-ID")
+):
+    """
+    {"shop_id": <default for rows without one>,
+     "orders": [{"student_id", "total_pages", "estimated_cost"}, ...]}
+    """
+    return await create_orders_bulk(
+        payload.get("orders") or [], role, shop_id, payload.get("shop_id")
+    )
+
+
+@router.post("/import")
+async def import_orders(
+    file: UploadFile = File(...),
+    default_shop_id: Optional[str] = Query(None, alias="shop_id"),
+    role: str = Header(..., alias="X-ROLE"),
+    shop_id: Optional[str] = Header(None, alias="X-SHOP-ID")
+):
+    """
+    Same as /orders/bulk-create, from a CSV or JSON file with columns
+    student_id, shop_id (optional with ?shop_id=), total_pages and
+    estimated_cost.
+    """
+    rows = parse_import(await file.read(), file.content_type, file.filename or "")
+    return await create_orders_bulk(rows, role, shop_id, default_shop_id)
+
+
 # =====================================================
 # STATUS TRANSITIONS
 # =====================================================
-VALID_TRANSITIONS = {
-    "PENDING": ["IN_PROGRESS", "CANCELLED"],
-    "IN_PROGRESS": ["COMPLETED"],
-    "COMPLETED": ["DELIVERED"]
-}
+def check_transition(status, payment_status, new_status):
+    if new_status not in VALID_TRANSITIONS.get(status, []):
+        raise HTTPException(400, "Invalid status transition")
+
+    if new_status == "DELIVERED" and payment_status != "PAID":
+        raise HTTPException(400, "Must be PAID before delivery")
+
+
+def check_finalize_cost(status, final_cost):
+    if status != "PENDING":
+        raise HTTPException(400, "Order must be PENDING to finalize cost")
+
+    if final_cost is not None:
+        raise HTTPException(400, "Final cost already set")
+
+
+def check_payment(final_cost, payment_status):
+    if final_cost is None:
+        raise HTTPException(400, "Finalize cost first")
+
+    if payment_status == "PAID":
+        raise HTTPException(400, "Order already PAID")
+
+
+def shop_scope(role, shop_id):
+    """:shop_id for a transition. An ADMIN without a shop matches nothing."""
+    return (shop_id or "") if role == "ADMIN" else None
+
+
+def check_applied(row, role, shop_id, check):
+    """
+    Raises what the old read-check-write flow would have for a transition
+    that didn't apply: 404, then 403, then `check(row)` on the previous
+    values. If none of those fire the order changed in between.
+    """
+    if not row:
+        raise HTTPException(404, "Order not found")
+
+    if row.applied:
+        return
+
+    if role == "ADMIN" and shop_id != str(row.previous_shop_id):
+        raise HTTPException(403, "Not your shop order")
+
+    check(row)
+
+    raise HTTPException(409, "Order was changed by another request")
+
+
+SET_STATUS = transition(
+    "orders.set_status",
+    "status = CAST(:status AS text)",
+    """o.status = ANY(CAST(:allowed AS text[]))
+       AND (CAST(:status AS text) <> 'DELIVERED' OR o.payment_status = 'PAID')"""
+)
 
 
 @router.patch("/{order_id}/status")
-def update_order_status(
+@query_budget(4)
+async def update_order_status(
     order_id: str,
     payload: dict,
     role: str = Header(..., alias="X-ROLE"),
@@ -148,50 +432,50 @@ def update_order_status(
     if role not in ("ADMIN", "SUPER_ADMIN"):
         raise HTTPException(403, "Access denied")
 
-    with engine.connect() as connection:
-
-        order = connection.execute(
-            text("""
-                SELECT status, shop_id, payment_status
-                FROM orders
-                WHERE id = :id
-            """),
-            {"id": order_id}
-        ).fetchone()
-        print(order)
-
-        if not order:
-            raise HTTPException(404, "Order not found")
+    async with engine.connect() as connection:
 
-        if role == "ADMIN" and shop_id != str(order.shop_id):
-            raise HTTPException(403, "Not your shop order")
+        updated = (await connection.execute(SET_STATUS, {
+            "id": order_id,
+            "shop_id": shop_scope(role, shop_id),
+            "status": new_status,
+            "allowed": allowed_from(new_status)
+        })).fetchone()
 
-        if new_status not in VALID_TRANSITIONS.get(order.status, []):
-            raise HTTPException(400, "Invalid status transition")
+        check_applied(updated, role, shop_id, lambda row: check_transition(
+            row.previous_status, row.previous_payment_status, new_status
+        ))
 
-        if new_status == "DELIVERED" and order.payment_status != "PAID":
-            raise HTTPException(400, "Must be PAID before delivery")
+        await order_changed(
+            connection, updated,
+            old_status=updated.previous_status, new_status=new_status
+        )
 
-        updated = connection.execute(
-            text("""
-                UPDATE orders
-                SET status = :status
-                WHERE id = :id
-                RETURNING id, status
-            """),
-            {"id": order_id, "status": new_status}
-        ).fetchone()
+        await connection.commit()
 
-        connection.commit()
+    shop_events.publish(updated.shop_id, {
+        "type": "order_status",
+        "order_id": updated.id,
+        "status": updated.status
+    })
 
-    return dict(updated._mapping)
+    return {"id": updated.id, "status": updated.status}
 
 
 # =====================================================
 # FINALIZE COST
 # =====================================================
+FINALIZE_FROM = ["PENDING"]
+
+SET_FINAL_COST = transition(
+    "orders.set_final_cost",
+    "final_cost = COALESCE(o.estimated_cost, 0)",
+    "o.status = ANY(CAST(:allowed AS text[])) AND o.final_cost IS NULL"
+)
+
+
 @router.post("/{order_id}/finalize-cost")
-def finalize_cost(
+@query_budget(2)
+async def finalize_cost(
     order_id: str,
     role: str = Header(..., alias="X-ROLE"),
     shop_id: Optional[str] = Header(None, alias="X-SHOP-ID")
@@ -202,51 +486,59 @@ def finalize_cost(
     if role not in ("ADMIN", "SUPER_ADMIN"):
         raise HTTPException(403, "Access denied")
 
-    with engine.connect() as connection:
+    async with engine.connect() as connection:
 
-        order = connection.execute(
-            text("""
-                SELECT id, shop_id, status, final_cost, estimated_cost
-                FROM orders
-                WHERE id = :id
-            """),
-            {"id": order_id}
-        ).fetchone()
+        result = (await connection.execute(SET_FINAL_COST, {
+            "id": order_id,
+            "shop_id": shop_scope(role, shop_id),
+            "allowed": FINALIZE_FROM
+        })).fetchone()
 
-        if not order:
-            raise HTTPException(404, "Order not found")
+        check_applied(result, role, shop_id, lambda row: check_finalize_cost(
+            row.previous_status, row.previous_final_cost
+        ))
+
+        await order_changed(connection, result, final_cost=result.final_cost)
+
+        await connection.commit()
 
-        if role == "ADMIN" and shop_id != str(order.shop_id):
-            raise HTTPException(403, "Not your shop order")
+    return updated_order(result)
 
-        if order.status != "PENDING":
-            raise HTTPException(400, "Order must be PENDING to finalize cost")
 
-        if order.final_cost is not None:
-            raise HTTPException(400, "Final cost already set")
+## =====================================================
+# PAYMENT (ADMIN DIRECT - CASH ONLY)
+# =====================================================
+PAYABLE = "o.final_cost IS NOT NULL AND o.payment_status <> 'PAID'"
 
-        final_cost_value = order.estimated_cost if order.estimated_cost is not None else 0
+AWAIT_UPI_PAYMENT = transition(
+    "orders.await_upi_payment",
+    """payment_mode = 'UPI',
+       payment_verification_status = 'PENDING'""",
+    PAYABLE
+)
 
-        result = connection.execute(
-            text("""
-                UPDATE orders
-                SET final_cost = :cost
-                WHERE id = :id
-                RETURNING *
-            """),
-            {"id": order_id, "cost": final_cost_value}
-        ).fetchone()
+PAY_CASH = transition(
+    "orders.pay_cash",
+    """payment_status = 'PAID',
+       payment_mode = 'CASH',
+       paid_at = NOW()""",
+    PAYABLE,
+    invoice=True
+)
 
-        connection.commit()
 
-    return dict(result._mapping)
+def check_payable(row):
+    check_payment(row.previous_final_cost, row.previous_payment_status)
+
+
+def check_rejectable(row):
+    if row.previous_payment_status == "PAID":
+        raise HTTPException(400, "Order already PAID")
 
 
-## =====================================================
-# PAYMENT (ADMIN DIRECT - CASH ONLY)
-# =====================================================
 @router.patch("/{order_id}/pay")
-def pay_order(
+@query_budget(3)
+async def pay_order(
     order_id: str,
     payload: dict,
     role: str = Header(..., alias="X-ROLE"),
@@ -262,84 +554,254 @@ def pay_order(
     if payment_mode not in ("CASH", "UPI"):
         raise HTTPException(400, "Invalid payment mode")
 
-    with engine.connect() as connection:
+    params = {"id": order_id, "shop_id": shop_scope(role, shop_id)}
 
-        order = connection.execute(
-            text("""
-                SELECT id, shop_id, payment_status, final_cost
-                FROM orders
-                WHERE id = :id
-            """),
-            {"id": order_id}
-        ).fetchone()
+    async with engine.connect() as connection:
 
-        if not order:
-            raise HTTPException(404, "Order not found")
+        # 🔥 If UPI selected → DO NOT mark paid
+        if payment_mode == "UPI":
+            updated = (await connection.execute(
+                AWAIT_UPI_PAYMENT, params
+            )).fetchone()
+            check_applied(updated, role, shop_id, check_payable)
+            await connection.commit()
+            return {"message": "Waiting for UPI screenshot verification"}
 
-        if role == "ADMIN" and shop_id != str(order.shop_id):
-            raise HTTPException(403, "Not your shop order")
+        # ✅ CASH → direct paid, invoice in the same statement
+        updated = (await connection.execute(PAY_CASH, params)).fetchone()
 
-        if order.final_cost is None:
-            raise HTTPException(400, "Finalize cost first")
+        check_applied(updated, role, shop_id, check_payable)
 
-        if order.payment_status == "PAID":
-            raise HTTPException(400, "Order already PAID")
+        await order_changed(
+            connection, updated,
+            old_payment=updated.previous_payment_status, new_payment="PAID"
+        )
 
-        # 🔥 If UPI selected → DO NOT mark paid
-        if payment_mode == "UPI":
-            connection.execute(
-                text("""
-                    UPDATE orders
-                    SET payment_mode = 'UPI',
-                        payment_verification_status = 'PENDING'
-                    WHERE id = :id
-                """),
-                {"id": order_id}
+        await connection.commit()
+
+    shop_events.publish(updated.shop_id, {
+        "type": "order_payment",
+        "order_id": updated.id,
+        "payment_status": updated.payment_status
+    })
+
+    return updated_order(updated)
+
+
+# =====================================================
+# BULK ADMIN OPERATIONS
+# =====================================================
+BULK_MAX_ORDERS = 500
+
+BULK_ACTIONS = ("finalize_cost", "status", "pay")
+
+BULK_SELECT = statement("orders.bulk_select", """
+    SELECT id, student_id, shop_id, status, payment_status, payment_mode,
+           total_pages, estimated_cost, final_cost, created_at
+    FROM orders
+    WHERE id = ANY(CAST(:ids AS uuid[]))
+    ORDER BY id
+    FOR UPDATE
+""")
+
+BULK_UPDATE = statement("orders.bulk_update", """
+    UPDATE orders o
+    SET status = v.status,
+        final_cost = v.final_cost,
+        payment_status = v.payment_status,
+        payment_mode = v.payment_mode,
+        paid_at = CASE WHEN v.paid THEN NOW() ELSE o.paid_at END
+    FROM unnest(
+        CAST(:ids AS uuid[]),
+        CAST(:statuses AS text[]),
+        CAST(:final_costs AS numeric[]),
+        CAST(:payment_statuses AS text[]),
+        CAST(:payment_modes AS text[]),
+        CAST(:paid AS boolean[])
+    ) AS v(id, status, final_cost, payment_status, payment_mode, paid)
+    WHERE o.id = v.id
+    RETURNING o.*
+""")
+
+
+def apply_bulk_actions(order, actions) -> dict:
+    """
+    Runs `actions` against a copy of the order row, with the same checks
+    as the single-order endpoints. Raises HTTPException on the first one
+    that doesn't apply.
+    """
+    state = dict(order._mapping)
+    state["paid"] = False
+
+    for action in actions:
+        kind = action.get("type")
+
+        if kind == "finalize_cost":
+            check_finalize_cost(state["status"], state["final_cost"])
+            state["final_cost"] = (
+                state["estimated_cost"] if state["estimated_cost"] is not None else 0
             )
-            connection.commit()
-            return {"message": "Waiting for UPI screenshot verification"}
 
-        # ✅ CASH → direct paid
-        updated = connection.execute(
-            text("""
-                UPDATE orders
-                SET payment_status = 'PAID',
-                    payment_mode = 'CASH',
-                    paid_at = NOW()
-                WHERE id = :id
-                RETURNING *
-            """),
-            {"id": order_id}
-        ).fetchone()
-
-        connection.execute(
-            text("""
-                INSERT INTO invoices (
-                    order_id,
-                    invoice_number,
-                    subtotal,
-                    tax,
-                    total
-                )
-                VALUES (
-                    :order_id,
-                    :invoice,
-                    :total,
-                    0,
-                    :total
-                )
-                ON CONFLICT (order_id) DO NOTHING
-            """),
-            {
-                "order_id": order_id,
-                "invoice": f"INV-{datetime.utcnow().strftime('%Y%m%d')}-{order_id[:6]}",
-                "total": updated.final_cost
+        elif kind == "status":
+            check_transition(
+                state["status"], state["payment_status"], action.get("status")
+            )
+            state["status"] = action["status"]
+
+        elif kind == "pay":
+            check_payment(state["final_cost"], state["payment_status"])
+            state["payment_status"] = "PAID"
+            state["payment_mode"] = "CASH"
+            state["paid"] = True
+
+    return state
+
+
+@router.post("/bulk")
+@query_budget(6)
+async def bulk_update_orders(
+    payload: dict,
+    role: str = Header(..., alias="X-ROLE"),
+    shop_id: Optional[str] = Header(None, alias="X-SHOP-ID")
+):
+    """
+    Applies the same list of actions, in order, to every order in
+    `order_ids`, all in one transaction:
+
+        {"order_ids": [...],
+         "actions": [{"type": "finalize_cost"},
+                     {"type": "status", "status": "IN_PROGRESS"},
+                     {"type": "pay"}]}
+
+    An order that fails a check is left untouched and reported with the
+    error the single-order endpoint would have returned; the rest still
+    go through. Payments here are cash only, as in pay_order.
+    """
+
+    role = role.strip().upper()
+    order_ids = list(dict.fromkeys(
+        str(order_id).strip().lower() for order_id in payload.get("order_ids") or []
+    ))
+    actions = payload.get("actions") or []
+
+    if role not in ("ADMIN", "SUPER_ADMIN"):
+        raise HTTPException(403, "Access denied")
+
+    if not order_ids:
+        raise HTTPException(400, "order_ids required")
+
+    if len(order_ids) > BULK_MAX_ORDERS:
+        raise HTTPException(400, f"At most {BULK_MAX_ORDERS} orders per request")
+
+    if not isinstance(actions, list) or not actions or any(
+        not isinstance(a, dict) or a.get("type") not in BULK_ACTIONS for a in actions
+    ):
+        raise HTTPException(400, f"actions must be one of {', '.join(BULK_ACTIONS)}")
+
+    results = {}
+    changes = []
+
+    # Malformed ids can't match an order; report them and keep them out
+    # of the uuid[] cast. Valid ones are reported in canonical form.
+    valid_ids = []
+    for index, order_id in enumerate(order_ids):
+        try:
+            order_ids[index] = str(uuid.UUID(order_id))
+            valid_ids.append(order_ids[index])
+        except ValueError:
+            results[order_id] = {"status_code": 404, "detail": "Order not found"}
+    order_ids = list(dict.fromkeys(order_ids))
+
+    async with engine.connect() as connection:
+
+        orders = {}
+        if valid_ids:
+            orders = {
+                str(row.id): row
+                for row in await connection.execute(BULK_SELECT, {"ids": valid_ids})
             }
-        )
 
-        connection.commit()
+        for order_id in order_ids:
+            if order_id in results:
+                continue
+
+            order = orders.get(order_id)
+
+            if not order:
+                results[order_id] = {"status_code": 404, "detail": "Order not found"}
+                continue
+
+            if role == "ADMIN" and shop_id != str(order.shop_id):
+                results[order_id] = {"status_code": 403, "detail": "Not your shop order"}
+                continue
+
+            try:
+                changes.append((order_id, order, apply_bulk_actions(order, actions)))
+            except HTTPException as e:
+                results[order_id] = {"status_code": e.status_code, "detail": e.detail}
+
+        updated = {}
+        if changes:
+            rows = await connection.execute(BULK_UPDATE, {
+                "ids": [order_id for order_id, _, _ in changes],
+                "statuses": [state["status"] for _, _, state in changes],
+                "final_costs": [state["final_cost"] for _, _, state in changes],
+                "payment_statuses": [state["payment_status"] for _, _, state in changes],
+                "payment_modes": [state["payment_mode"] for _, _, state in changes],
+                "paid": [state["paid"] for _, _, state in changes]
+            })
+            updated = {str(row.id): row for row in rows}
+
+            paid = [
+                (order_id, state["final_cost"])
+                for order_id, _, state in changes
+                if state["paid"]
+            ]
+            if paid:
+                await connection.execute(INSERT_INVOICES, {
+                    "order_ids": [order_id for order_id, _ in paid],
+                    "totals": [total for _, total in paid]
+                })
+
+            await orders_changed(connection, [
+                (order, {
+                    "old_status": order.status,
+                    "new_status": state["status"],
+                    "old_payment": order.payment_status,
+                    "new_payment": state["payment_status"],
+                    "final_cost": (
+                        state["final_cost"] if order.final_cost is None else None
+                    )
+                })
+                for _, order, state in changes
+            ])
+
+        await connection.commit()
+
+    for order_id, order, state in changes:
+        row = updated[order_id]
+        results[order_id] = {"status_code": 200, "order": dict(row._mapping)}
+
+        if state["status"] != order.status:
+            shop_events.publish(row.shop_id, {
+                "type": "order_status",
+                "order_id": row.id,
+                "status": row.status
+            })
+        if state["paid"]:
+            shop_events.publish(row.shop_id, {
+                "type": "order_payment",
+                "order_id": row.id,
+                "payment_status": row.payment_status
+            })
 
-    return dict(updated._mapping)
+    return {
+        "updated": len(changes),
+        "failed": len(order_ids) - len(changes),
+        "results": [
+            {"order_id": order_id, **results[order_id]} for order_id in order_ids
+        ]
+    }
 
 
 #-----------------------------------------
@@ -348,18 +810,21 @@ def pay_order(
 
 from urllib.parse import urlencode
 from app.config import SHOP_UPI_ID, SHOP_NAME
+ORDER_FINAL_COST = statement("orders.order_final_cost", """
+    SELECT final_cost
+    FROM orders
+    WHERE id = :id
+""")
+
+
 @router.get("/{order_id}/upi-link")
-def generate_upi_link(order_id: str):
-
-    with engine.connect() as connection:
-        order = connection.execute(
-            text("""
-                SELECT final_cost
-                FROM orders
-                WHERE id = :id
-            """),
+async def generate_upi_link(order_id: str):
+
+    async with engine.connect() as connection:
+        order = (await connection.execute(
+            ORDER_FINAL_COST,
             {"id": order_id}
-        ).fetchone()
+        )).fetchone()
 
         if not order:
             raise HTTPException(404, "Order not found")
@@ -384,8 +849,25 @@ def generate_upi_link(order_id: str):
 # =====================================================
 # ADMIN VERIFY UPI PAYMENT
 # =====================================================
+REJECT_UPI = transition(
+    "orders.reject_upi",
+    "payment_verification_status = 'REJECTED'",
+    "o.payment_status <> 'PAID'"
+)
+
+APPROVE_UPI = transition(
+    "orders.approve_upi",
+    """payment_status = 'PAID',
+       payment_verification_status = 'VERIFIED',
+       paid_at = NOW()""",
+    PAYABLE,
+    invoice=True
+)
+
+
 @router.patch("/{order_id}/verify-upi")
-def verify_upi_payment(
+@query_budget(3)
+async def verify_upi_payment(
     order_id: str,
     payload: dict,
     role: str = Header(..., alias="X-ROLE"),
@@ -401,80 +883,61 @@ def verify_upi_payment(
     if decision not in ("APPROVE", "REJECT"):
         raise HTTPException(400, "Invalid decision")
 
-    with engine.connect() as connection:
-
-        order = connection.execute(
-            text("""
-                SELECT id, shop_id, final_cost,
-                       payment_verification_status
-                FROM orders
-                WHERE id = :id
-            """),
-            {"id": order_id}
-        ).fetchone()
-
-        if not order:
-            raise HTTPException(404, "Order not found")
+    params = {"id": order_id, "shop_id": shop_scope(role, shop_id)}
 
-        if role == "ADMIN" and shop_id != str(order.shop_id):
-            raise HTTPException(403, "Not your shop order")
+    async with engine.connect() as connection:
 
         if decision == "REJECT":
-            connection.execute(
-                text("""
-                    UPDATE orders
-                    SET payment_verification_status = 'REJECTED'
-                    WHERE id = :id
-                """),
-                {"id": order_id}
-            )
-            connection.commit()
+            rejected = (await connection.execute(REJECT_UPI, params)).fetchone()
+            check_applied(rejected, role, shop_id, check_rejectable)
+            await connection.commit()
             return {"message": "Payment rejected"}
 
         # APPROVE
-        updated = connection.execute(
-            text("""
-                UPDATE orders
-                SET payment_status = 'PAID',
-                    payment_verification_status = 'VERIFIED',
-                    paid_at = NOW()
-                WHERE id = :id
-                RETURNING *
-            """),
-            {"id": order_id}
-        ).fetchone()
-
-        connection.execute(
-            text("""
-                INSERT INTO invoices (
-                    order_id,
-                    invoice_number,
-                    subtotal,
-                    tax,
-                    total
-                )
-                VALUES (
-                    :order_id,
-                    :invoice,
-                    :total,
-                    0,
-                    :total
-                )
-                ON CONFLICT (order_id) DO NOTHING
-            """),
-            {
-                "order_id": order_id,
-                "invoice": f"INV-{datetime.utcnow().strftime('%Y%m%d')}-{order_id[:6]}",
-                "total": updated.final_cost
-            }
+        updated = (await connection.execute(APPROVE_UPI, params)).fetchone()
+
+        check_applied(updated, role, shop_id, check_payable)
+
+        await order_changed(
+            connection, updated,
+            old_payment=updated.previous_payment_status, new_payment="PAID"
         )
 
-        connection.commit()
+        await connection.commit()
+
+    shop_events.publish(updated.shop_id, {
+        "type": "order_payment",
+        "order_id": updated.id,
+        "payment_status": updated.payment_status
+    })
+
+    return updated_order(updated)
+
+
+ORDER_FOR_VERIFICATION = statement("orders.order_for_verification", """
+    SELECT id, student_id, shop_id, final_cost, payment_status,
+           created_at
+    FROM orders
+    WHERE id = :id
+""")
+
+SET_VERIFICATION = statement("orders.set_verification", """
+    UPDATE orders
+    SET payment_verification_status = :status,
+        payment_status = CASE
+            WHEN :status = 'APPROVED' THEN 'PAID'
+            ELSE 'UNPAID'
+        END,
+        paid_at = CASE
+            WHEN :status = 'APPROVED' THEN NOW()
+            ELSE NULL
+        END
+    WHERE id = :id
+""")
 
-    return dict(updated._mapping)
 
 @router.patch("/{order_id}/verify-payment")
-def verify_payment(
+async def verify_payment(
     order_id: str,
     payload: dict,
     role: str = Header(..., alias="X-ROLE"),
@@ -489,37 +952,33 @@ def verify_payment(
     if status not in ("APPROVED", "REJECTED"):
         raise HTTPException(400, "Invalid status")
 
-    with engine.connect() as connection:
+    async with engine.connect() as connection:
 
-        order = connection.execute(
-            text("""
-                SELECT id, shop_id, final_cost
-                FROM orders
-                WHERE id = :id
-            """),
+        order = (await connection.execute(
+            ORDER_FOR_VERIFICATION,
             {"id": order_id}
-        ).fetchone()
+        )).fetchone()
 
         if not order:
             raise HTTPException(404, "Order not found")
 
-        connection.execute(
-            text("""
-                UPDATE orders
-                SET payment_verification_status = :status,
-                    payment_status = CASE
-                        WHEN :status = 'APPROVED' THEN 'PAID'
-                        ELSE 'UNPAID'
-                    END,
-                    paid_at = CASE
-                        WHEN :status = 'APPROVED' THEN NOW()
-                        ELSE NULL
-                    END
-                WHERE id = :id
-            """),
+        await connection.execute(
+            SET_VERIFICATION,
             {"id": order_id, "status": status}
         )
 
-        connection.commit()
+        await order_changed(
+            connection, order,
+            old_payment=order.payment_status,
+            new_payment="PAID" if status == "APPROVED" else "UNPAID"
+        )
+
+        await connection.commit()
+
+    shop_events.publish(order.shop_id, {
+        "type": "order_payment",
+        "order_id": order.id,
+        "payment_status": "PAID" if status == "APPROVED" else "UNPAID"
+    })
 
     return {"message": "Verification updated"}
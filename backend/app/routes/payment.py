@@ -1,7 +1,8 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException
-from sqlalchemy import text
 from app.database import engine
-import shutil
+from app.services.order_hooks import order_changed
+from app.services.storage import upload_file
+from app.statements import statement
 import uuid
 
 router = APIRouter()
@@ -9,47 +10,57 @@ router = APIRouter()
 # ===============================
 # SET PAYMENT METHOD
 # ===============================
+ORDER_PAYMENT_METHOD = statement("payment.order_payment_method", """
+    SELECT id, payment_method, status FROM orders WHERE id = :id
+""")
+
+SET_PAYMENT_METHOD = statement("payment.set_payment_method", """
+    UPDATE orders
+    SET payment_method = :method
+    WHERE id = :id
+""")
+
+
 @router.patch("/student/payment/set-method/{order_id}")
-def set_payment_method(order_id: str, method: str):
+async def set_payment_method(order_id: str, method: str):
     if method not in ("CASH", "UPI"):
         raise HTTPException(400, "Invalid payment method")
 
-    with engine.connect() as conn:
-        order = conn.execute(
-            text("SELECT id, payment_method, status FROM orders WHERE id = :id"),
+    async with engine.connect() as conn:
+        order = (await conn.execute(
+            ORDER_PAYMENT_METHOD,
             {"id": order_id}
-        ).fetchone()
+        )).fetchone()
         if not order:
             raise HTTPException(404, "Order not found")
 
         # Only update payment_method, do not change status to an invalid value
-        conn.execute(
-            text("""
-                UPDATE orders
-                SET payment_method = :method
-                WHERE id = :id
-            """),
+        await conn.execute(
+            SET_PAYMENT_METHOD,
             {"method": method, "id": order_id}
         )
-        conn.commit()
+        await conn.commit()
 
     return {"message": "Payment method saved"}
 
 # ===============================
 # GENERATE UPI LINK
 # ===============================
+ORDER_AMOUNT = statement("payment.order_amount", """
+    SELECT final_cost
+    FROM orders
+    WHERE id = :id
+""")
+
+
 @router.get("/student/payment/upi/{order_id}")
-def generate_upi(order_id: str):
-
-    with engine.connect() as conn:
-        result = conn.execute(
-            text("""
-                SELECT final_cost
-                FROM orders
-                WHERE id = :id
-            """),
+async def generate_upi(order_id: str):
+
+    async with engine.connect() as conn:
+        result = (await conn.execute(
+            ORDER_AMOUNT,
             {"id": order_id}
-        ).fetchone()
+        )).fetchone()
 
         if not result:
             raise HTTPException(status_code=404, detail="Order not found")
@@ -78,25 +89,46 @@ def generate_upi(order_id: str):
 # ===============================
 # UPLOAD PAYMENT SCREENSHOT
 # ===============================
+SET_PAYMENT_PROOF = statement("payment.set_payment_proof", """
+    WITH prev AS (
+        SELECT id, payment_status
+        FROM orders
+        WHERE id = :id
+        FOR UPDATE
+    )
+    UPDATE orders o
+    SET payment_proof = :proof,
+        payment_status = 'PAYMENT_PENDING_VERIFICATION'
+    FROM prev
+    WHERE o.id = prev.id
+    RETURNING o.student_id, o.shop_id, o.created_at,
+              prev.payment_status AS previous_payment_status
+""")
+
+
 @router.post("/student/payment/upload/{order_id}")
 async def upload_payment_proof(order_id: str, file: UploadFile = File(...)):
 
     unique_name = f"{uuid.uuid4()}_{file.filename}"
-    file_path = f"app/uploads/{unique_name}"
-
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-
-    with engine.connect() as conn:
-        conn.execute(text("""
-            UPDATE orders
-            SET payment_proof = :proof,
-                payment_status = 'PAYMENT_PENDING_VERIFICATION'
-            WHERE id = :id
-        """), {
-            "proof": unique_name,
+
+    proof_url = await upload_file(
+        order_id, file, unique_name, file.content_type, file.size
+    )
+
+    async with engine.connect() as conn:
+        order = (await conn.execute(SET_PAYMENT_PROOF, {
+            "proof": proof_url,
             "id": order_id
-        })
+        })).fetchone()
+
+        if order:
+            await order_changed(
+                conn, order,
+                old_payment=order.previous_payment_status,
+                new_payment="PAYMENT_PENDING_VERIFICATION"
+            )
+
+        await conn.commit()
 
     return {"message": "Payment proof uploaded"}
 
@@ -104,15 +136,18 @@ async def upload_payment_proof(order_id: str, file: UploadFile = File(...)):
 # ===============================
 # ADMIN APPROVE
 # ===============================
+APPROVE_PAYMENT = statement("payment.approve_payment", """
+    UPDATE orders
+    SET payment_status = 'PAID'
+    WHERE id = :id
+""")
+
+
 @router.patch("/admin/payment/approve/{order_id}")
-def approve_payment(order_id: str):
+async def approve_payment(order_id: str):
 
-    with engine.connect() as conn:
-        conn.execute(text("""
-            UPDATE orders
-            SET payment_status = 'PAID'
-            WHERE id = :id
-        """), {"id": order_id})
+    async with engine.connect() as conn:
+        await conn.execute(APPROVE_PAYMENT, {"id": order_id})
 
     return {"message": "Payment Approved"}
 
@@ -120,14 +155,17 @@ def approve_payment(order_id: str):
 # ===============================
 # ADMIN REJECT
 # ===============================
+REJECT_PAYMENT = statement("payment.reject_payment", """
+    UPDATE orders
+    SET payment_status = 'PAYMENT_FAILED'
+    WHERE id = :id
+""")
+
+
 @router.patch("/admin/payment/reject/{order_id}")
-def reject_payment(order_id: str):
-
-    with engine.connect() as conn:
-        conn.execute(text("""
-            UPDATE orders
-            SET payment_status = 'PAYMENT_FAILED'
-            WHERE id = :id
-        """), {"id": order_id})
+async def reject_payment(order_id: str):
+
+    async with engine.connect() as conn:
+        await conn.execute(REJECT_PAYMENT, {"id": order_id})
 
     return {"message": "Payment Rejected"}
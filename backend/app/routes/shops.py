@@ -1,6 +1,19 @@
-from fastapi import APIRouter, HTTPException, Header
-from sqlalchemy import text
+import itertools
+import math
+import uuid
+
+from fastapi import APIRouter, Depends, HTTPException, Response, WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
+from typing import Optional
 from app.database import engine
+from app.dependencies.admin_auth import require_admin
+from app.services.events import RESYNC, shop_events
+from app.services.pagination import KeysetQuery, fetch_page
+from app.services.pricing import BINDINGS, COLOR_MODES, SIDE_MODES, get_rate_card, quote_prices, rate_cards
+from app.services.queue_stats import queue_summary
+from app.services.serialization import rows_response
+from app.services.shop_cache import ALL_SHOPS, shop_cache
+from app.statements import statement
 
 router = APIRouter(prefix="/shops", tags=["Shops"])
 
@@ -9,47 +22,65 @@ router = APIRouter(prefix="/shops", tags=["Shops"])
 # List Shops
 # -------------------------
 
-@router.get("/")
-def list_shops():
-    query = text("""
-        SELECT
-            id,
-            shop_name,
-            address,
-            phone,
-            accepting_orders,
-            avg_print_time_per_page
-        FROM shops
-        ORDER BY shop_name ASC
-    """)
+SHOP_COLUMNS = """
+    id,
+    shop_name,
+    address,
+    phone,
+    accepting_orders,
+    avg_print_time_per_page
+"""
+
+LIST_SHOPS = statement("shops.list_shops", f"""
+    SELECT {SHOP_COLUMNS}
+    FROM shops
+    ORDER BY shop_name ASC
+""")
 
-    with engine.connect() as connection:
-        rows = connection.execute(query).mappings().all()
+GET_SHOP = statement("shops.get_shop", f"""
+    SELECT {SHOP_COLUMNS}
+    FROM shops
+    WHERE id = :shop_id
+""")
 
-    return rows
 
+async def load_shops():
+    async with engine.connect() as connection:
+        rows = (await connection.execute(LIST_SHOPS)).mappings().all()
+
+    return [dict(row) for row in rows]
+
+
+@router.get("/")
+async def list_shops():
+    shops = await shop_cache.get(ALL_SHOPS, load_shops)
+    return rows_response(shops)
 
 
 # -------------------------
 # Get Single Shop Details
 # -------------------------
 
+async def cached_shop(shop_id: str):
+    """The shop row through shop_cache, or None if there's no such shop."""
+    try:
+        uuid.UUID(shop_id)
+    except ValueError:
+        return None
+
+    async def load_shop():
+        async with engine.connect() as connection:
+            shop = (await connection.execute(
+                GET_SHOP, {"shop_id": shop_id}
+            )).mappings().first()
+        return dict(shop) if shop else None
+
+    return await shop_cache.get(shop_id, load_shop)
+
+
 @router.get("/{shop_id}")
-def get_shop(shop_id: str):
-    query = text("""
-        SELECT
-            id,
-            shop_name,
-            address,
-            phone,
-            accepting_orders,
-            avg_print_time_per_page
-        FROM shops
-        WHERE id = :shop_id
-    """)
-
-    with engine.connect() as connection:
-        shop = connection.execute(query, {"shop_id": shop_id}).mappings().first()
+async def get_shop(shop_id: str):
+    shop = await cached_shop(shop_id)
 
     if not shop:
         raise HTTPException(status_code=404, detail="Shop not found")
@@ -61,81 +92,278 @@ def get_shop(shop_id: str):
 # Toggle Shop
 # -------------------------
 
+TOGGLE_ACCEPTING = statement("shops.toggle_accepting", """
+    UPDATE shops
+    SET accepting_orders = NOT accepting_orders
+    WHERE id = :shop_id
+    RETURNING id, accepting_orders
+""")
+
+
 @router.patch("/{shop_id}/toggle")
-def toggle_shop_orders(shop_id: str):
-    query = text("""
-        UPDATE shops
-        SET accepting_orders = NOT accepting_orders
-        WHERE id = :shop_id
-        RETURNING id, accepting_orders
-    """)
-
-    with engine.connect() as connection:
-        result = connection.execute(query, {"shop_id": shop_id})
+async def toggle_shop_orders(shop_id: str):
+    async with engine.connect() as connection:
+        result = await connection.execute(TOGGLE_ACCEPTING, {"shop_id": shop_id})
         row = result.fetchone()
-        connection.commit()
+        await connection.commit()
 
     if not row:
         raise HTTPException(status_code=404, detail="Shop not found")
 
+    shop_cache.invalidate(shop_id)
+
     return {
         "shop_id": row.id,
         "accepting_orders": row.accepting_orders
     }
 
 
+# -------------------------
+# Rate Card
+# -------------------------
+
+UPSERT_PAGE_RATE = statement("shops.upsert_page_rate", """
+    INSERT INTO shop_page_rates (shop_id, color_mode, side_mode, per_page)
+    VALUES (:shop_id, :color_mode, :side_mode, :per_page)
+    ON CONFLICT (shop_id, color_mode, side_mode) DO UPDATE SET
+        per_page = EXCLUDED.per_page,
+        updated_at = NOW()
+""")
+
+UPSERT_BINDING_RATE = statement("shops.upsert_binding_rate", """
+    INSERT INTO shop_binding_rates (shop_id, binding, cost)
+    VALUES (:shop_id, :binding, :cost)
+    ON CONFLICT (shop_id, binding) DO UPDATE SET
+        cost = EXCLUDED.cost,
+        updated_at = NOW()
+""")
+
+
+def price_value(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+        raise HTTPException(400, "Prices must be non-negative numbers")
+    return value
+
+
+@router.get("/{shop_id}/rates")
+async def get_shop_rates(shop_id: str):
+    if not await cached_shop(shop_id):
+        raise HTTPException(status_code=404, detail="Shop not found")
+
+    async with engine.connect() as connection:
+        card = await get_rate_card(connection, shop_id)
+
+    return card.as_dict()
+
+
+@router.put("/{shop_id}/rates")
+async def update_shop_rates(
+    shop_id: str,
+    payload: dict,
+    auth=Depends(require_admin)
+):
+    """
+    Partial update, same shape as GET:
+    {"page_rates": {"BW": {"SINGLE": 1.0}}, "binding_costs": {"SPIRAL": 25}}
+    """
+    if auth["role"] == "ADMIN" and auth["shop_id"] != shop_id:
+        raise HTTPException(403, "Not your shop")
+
+    page_rates = []
+    for color_mode, sides in (payload.get("page_rates") or {}).items():
+        if color_mode not in COLOR_MODES or not isinstance(sides, dict):
+            raise HTTPException(400, f"color_mode must be one of {', '.join(COLOR_MODES)}")
+        for side_mode, per_page in sides.items():
+            if side_mode not in SIDE_MODES:
+                raise HTTPException(400, f"side_mode must be one of {', '.join(SIDE_MODES)}")
+            page_rates.append({
+                "shop_id": shop_id,
+                "color_mode": color_mode,
+                "side_mode": side_mode,
+                "per_page": price_value(per_page)
+            })
+
+    binding_rates = []
+    for binding, cost in (payload.get("binding_costs") or {}).items():
+        if binding not in BINDINGS:
+            raise HTTPException(400, f"binding must be one of {', '.join(BINDINGS)}")
+        binding_rates.append({
+            "shop_id": shop_id,
+            "binding": binding,
+            "cost": price_value(cost)
+        })
+
+    if not await cached_shop(shop_id):
+        raise HTTPException(status_code=404, detail="Shop not found")
+
+    async with engine.connect() as connection:
+        if page_rates:
+            await connection.execute(UPSERT_PAGE_RATE, page_rates)
+        if binding_rates:
+            await connection.execute(UPSERT_BINDING_RATE, binding_rates)
+        await connection.commit()
+
+        rate_cards.invalidate(shop_id)
+        card = await get_rate_card(connection, shop_id)
+
+    return card.as_dict()
+
+
+# -------------------------
+# Price Quotes
+# -------------------------
+
+MAX_QUOTES = 2000
+
+
+def quote_axis(matrix: dict, name: str, allowed, default):
+    values = matrix.get(name, default)
+    if not isinstance(values, list) or not values:
+        raise HTTPException(400, f"{name} must be a non-empty list")
+    if allowed is not None and any(value not in allowed for value in values):
+        raise HTTPException(400, f"{name} must be one of {', '.join(allowed)}")
+    return values
+
+
+@router.post("/{shop_id}/quote")
+async def quote_shop_prices(shop_id: str, payload: dict):
+    """
+    Prices many print option combinations for one page count in a single
+    call, against the shop's rate card. Either list them:
+
+        {"total_pages": 12, "combinations": [{"color_mode": "BW",
+          "side_mode": "SINGLE", "copies": 2, "binding": "NONE"}, ...]}
+
+    or ask for the whole grid (axes left out default to every option,
+    copies to [1]):
+
+        {"total_pages": 12, "matrix": {"copies": [1, 2, 3]}}
+    """
+    total_pages = payload.get("total_pages")
+    if isinstance(total_pages, bool) or not isinstance(total_pages, int) or total_pages < 0:
+        raise HTTPException(400, "total_pages must be a non-negative integer")
+
+    if "matrix" in payload:
+        matrix = payload["matrix"] or {}
+        if not isinstance(matrix, dict):
+            raise HTTPException(400, "matrix must be an object")
+        axes = (
+            quote_axis(matrix, "color_mode", COLOR_MODES, list(COLOR_MODES)),
+            quote_axis(matrix, "side_mode", SIDE_MODES, list(SIDE_MODES)),
+            quote_axis(matrix, "copies", None, [1]),
+            quote_axis(matrix, "binding", BINDINGS, list(BINDINGS))
+        )
+        if math.prod(len(axis) for axis in axes) > MAX_QUOTES:
+            raise HTTPException(400, f"At most {MAX_QUOTES} combinations per request")
+        combinations = list(itertools.product(*axes))
+    else:
+        try:
+            combinations = [
+                (c["color_mode"], c["side_mode"], c["copies"], c["binding"])
+                for c in payload.get("combinations") or []
+            ]
+        except (KeyError, TypeError):
+            raise HTTPException(
+                400, "Each combination needs color_mode, side_mode, copies and binding"
+            )
+        if any(
+            color not in COLOR_MODES or side not in SIDE_MODES or binding not in BINDINGS
+            for color, side, _, binding in combinations
+        ):
+            raise HTTPException(400, "Unknown print option")
+
+    if any(
+        isinstance(copies, bool) or not isinstance(copies, int) or copies < 1
+        for _, _, copies, _ in combinations
+    ):
+        raise HTTPException(400, "copies must be positive integers")
+
+    if len(combinations) > MAX_QUOTES:
+        raise HTTPException(400, f"At most {MAX_QUOTES} combinations per request")
+
+    if not await cached_shop(shop_id):
+        raise HTTPException(status_code=404, detail="Shop not found")
+
+    async with engine.connect() as connection:
+        card = await get_rate_card(connection, shop_id)
+
+    prices = quote_prices(total_pages, combinations, card)
+
+    return {
+        "shop_id": shop_id,
+        "total_pages": total_pages,
+        "quotes": [
+            {
+                "color_mode": color,
+                "side_mode": side,
+                "copies": copies,
+                "binding": binding,
+                "price": price
+            }
+            for (color, side, copies, binding), price in zip(combinations, prices)
+        ]
+    }
+
+
 # -------------------------
 # Shop Orders
 # -------------------------
 
+SHOP_ORDERS = KeysetQuery("shops.shop_orders", """
+    SELECT
+        o.id,
+        o.total_pages,
+        o.estimated_cost,
+        o.status,
+        o.payment_status,
+        o.created_at,
+        u.full_name,
+        u.roll_no
+    FROM orders o
+    JOIN users u ON o.student_id = u.id
+    WHERE o.shop_id = :shop_id
+""", alias="o", descending=False)
+
+
 @router.get("/{shop_id}/orders")
-def get_shop_orders(shop_id: str):
-    query = text("""
-        SELECT
-            o.id,
-            o.total_pages,
-            o.estimated_cost,
-            o.status,
-            o.payment_status,
-            o.created_at,
-            u.full_name,
-            u.roll_no
-        FROM orders o
-        JOIN users u ON o.student_id = u.id
-        WHERE o.shop_id = :shop_id
-        ORDER BY o.created_at ASC
-    """)
-
-    with engine.connect() as connection:
-        orders = connection.execute(query, {"shop_id": shop_id}).mappings().all()
-
-    return orders
+async def get_shop_orders(
+    shop_id: str,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None
+):
+    async with engine.connect() as connection:
+        orders = await fetch_page(
+            connection, SHOP_ORDERS, {"shop_id": shop_id}, response, cursor, limit
+        )
+
+    return rows_response(orders, response)
 
 
 # -------------------------
 # Queue
 # -------------------------
 
-@router.get("/{shop_id}/queue")
-def get_shop_queue(shop_id: str):
-    query = text("""
-        SELECT
-            o.id,
-            o.total_pages,
-            o.status,
-            o.estimated_ready_time,
-            o.created_at,
-            u.full_name,
-            u.roll_no
-        FROM orders o
-        JOIN users u ON o.student_id = u.id
-        WHERE o.shop_id = :shop_id
-          AND o.status IN ('PENDING', 'IN_PROGRESS')
-        ORDER BY o.created_at ASC
-    """)
-
-    with engine.connect() as connection:
-        rows = connection.execute(query, {"shop_id": shop_id}).mappings().all()
+SHOP_QUEUE = statement("shops.shop_queue", """
+    SELECT
+        o.id,
+        o.total_pages,
+        o.status,
+        o.estimated_ready_time,
+        o.created_at,
+        u.full_name,
+        u.roll_no
+    FROM orders o
+    JOIN users u ON o.student_id = u.id
+    WHERE o.shop_id = :shop_id
+      AND o.status IN ('PENDING', 'IN_PROGRESS')
+    ORDER BY o.created_at ASC
+""")
+
+
+async def load_queue(shop_id: str):
+    async with engine.connect() as connection:
+        rows = (await connection.execute(SHOP_QUEUE, {"shop_id": shop_id})).mappings().all()
 
     queue = []
     for index, row in enumerate(rows, start=1):
@@ -156,27 +384,56 @@ def get_shop_queue(shop_id: str):
         "queue": queue
     }
 
-@router.get("/{shop_id}")
-def get_shop(shop_id: str):
-    query = text("""
-        SELECT
-            id,
-            shop_name,
-            address,
-            phone,
-            accepting_orders,
-            avg_print_time_per_page
-        FROM shops
-        WHERE id = :shop_id
-    """)
-
-    with engine.connect() as connection:
-        shop = connection.execute(
-            query,
-            {"shop_id": shop_id}
-        ).mappings().first()
 
-    if not shop:
-        raise HTTPException(status_code=404, detail="Shop not found")
+@router.get("/{shop_id}/queue")
+async def get_shop_queue(shop_id: str):
+    return await load_queue(shop_id)
 
-    return shop
+
+# -------------------------
+# Live Queue (WebSocket)
+# -------------------------
+
+@router.websocket("/{shop_id}/ws")
+async def shop_queue_socket(websocket: WebSocket, shop_id: str):
+    """
+    Sends the queue once, then one message per order change:
+    order_created, order_status or order_payment.
+    """
+    await websocket.accept()
+    events = shop_events.subscribe(shop_id)
+
+    try:
+        snapshot = await load_queue(shop_id)
+        await websocket.send_json({"type": "snapshot", **jsonable_encoder(snapshot)})
+
+        while True:
+            event = await events.get()
+
+            if event == RESYNC:
+                snapshot = await load_queue(shop_id)
+                event = {"type": "snapshot", **jsonable_encoder(snapshot)}
+
+            await websocket.send_json(event)
+
+    except WebSocketDisconnect:
+        pass
+
+    finally:
+        shop_events.unsubscribe(shop_id, events)
+
+
+@router.get("/{shop_id}/queue/summary")
+async def get_shop_queue_summary(shop_id: str):
+    async with engine.connect() as connection:
+        summary = await queue_summary(connection, shop_id)
+
+    if not summary:
+        return {
+            "shop_id": shop_id,
+            "queued_orders": 0,
+            "queued_pages": 0,
+            "tail_ready_at": None
+        }
+
+    return summary
@@ -1,12 +1,22 @@
-from fastapi import APIRouter, UploadFile, File, Header, HTTPException
-from sqlalchemy import text
+import uuid
+
+from fastapi import APIRouter, UploadFile, File, Header, HTTPException, Response
 from typing import Optional
-from io import BytesIO
-from PIL import Image
 
 from app.database import engine
-from app.services.pricing import calculate_price
-from app.services.supabase_storage import upload_file
+from app.services.blob_store import hash_document, upload_blob
+from app.services.events import shop_events
+from app.services.image_convert import image_to_pdf
+from app.services.order_detail import fetch_order_detail, student_view
+from app.services.order_hooks import order_changed
+from app.services.order_transitions import allowed_from, transition
+from app.services.pagination import KeysetQuery, fetch_page
+from app.services.pricing import calculate_price, get_rate_card
+from app.services.query_trace import query_budget
+from app.services.serialization import rows_response
+from app.services.storage import upload_file
+from app.services.student_stats import get_counters
+from app.statements import statement
 
 router = APIRouter(prefix="/student", tags=["Student"])
 
@@ -14,173 +24,226 @@ router = APIRouter(prefix="/student", tags=["Student"])
 # 1️⃣ STUDENT DASHBOARD
 # =====================================================
 @router.get("/dashboard")
-def student_dashboard(
+async def student_dashboard(
     student_id: str = Header(..., alias="X-STUDENT-ID")
 ):
-    query = text("""
-        SELECT
-            COUNT(*) AS total,
-            COUNT(*) FILTER (WHERE status = 'PENDING') AS pending,
-            COUNT(*) FILTER (WHERE status = 'IN_PROGRESS') AS in_progress,
-            COUNT(*) FILTER (WHERE status IN ('COMPLETED','DELIVERED')) AS completed,
-            COUNT(*) FILTER (WHERE status = 'CANCELLED') AS cancelled,
-            COUNT(*) FILTER (WHERE payment_status = 'PAID') AS paid,
-            COUNT(*) FILTER (WHERE payment_status = 'UNPAID') AS unpaid
-        FROM orders
-        WHERE student_id = :student_id
-    """)
-
-    with engine.connect() as connection:
-        stats = connection.execute(query, {"student_id": student_id}).fetchone()
-
-    return dict(stats._mapping)
+    # Counters are kept up to date by every order write
+    # (app/services/student_stats.py), so this is one primary key lookup.
+    async with engine.connect() as connection:
+        return await get_counters(connection, student_id)
 
 
 # =====================================================
 # 2️⃣ ORDER LISTS (STATIC ROUTES FIRST)
 # =====================================================
+# Columns the order list pages render; documents and payment proofs are
+# only sent with the order detail.
+ORDER_LIST_COLUMNS = """
+    id,
+    shop_id,
+    status,
+    payment_status,
+    payment_mode,
+    total_pages,
+    estimated_cost,
+    final_cost,
+    estimated_ready_time,
+    paid_at,
+    created_at
+"""
+
+CANCELLED_ORDERS = KeysetQuery("student.cancelled_orders", f"""
+    SELECT {ORDER_LIST_COLUMNS}
+    FROM orders
+    WHERE student_id = :student_id
+      AND status = 'CANCELLED'
+""")
+
+PENDING_ORDERS = KeysetQuery("student.pending_orders", f"""
+    SELECT {ORDER_LIST_COLUMNS}
+    FROM orders
+    WHERE student_id = :student_id
+      AND status = 'PENDING'
+""")
+
+IN_PROGRESS_ORDERS = KeysetQuery("student.in_progress_orders", f"""
+    SELECT {ORDER_LIST_COLUMNS}
+    FROM orders
+    WHERE student_id = :student_id
+      AND status = 'IN_PROGRESS'
+""", descending=False)
+
+COMPLETED_ORDERS = KeysetQuery("student.completed_orders", f"""
+    SELECT {ORDER_LIST_COLUMNS}
+    FROM orders
+    WHERE student_id = :student_id
+      AND status IN ('COMPLETED','DELIVERED')
+""")
+
+ALL_ORDERS = KeysetQuery("student.all_orders", f"""
+    SELECT {ORDER_LIST_COLUMNS}
+    FROM orders
+    WHERE student_id = :student_id
+""")
+
+
+async def student_orders_page(query, student_id, response, cursor, limit):
+    async with engine.connect() as connection:
+        rows = await fetch_page(
+            connection, query, {"student_id": student_id}, response, cursor, limit
+        )
+
+    return rows_response(rows, response)
+
+
 @router.get("/orders/cancelled")
-def student_cancelled_orders(
+async def student_cancelled_orders(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
     student_id: str = Header(..., alias="X-STUDENT-ID")
 ):
-    with engine.connect() as connection:
-        rows = connection.execute(
-            text("""
-                SELECT *
-                FROM orders
-                WHERE student_id = :student_id
-                  AND status = 'CANCELLED'
-                ORDER BY created_at DESC
-            """),
-            {"student_id": student_id}
-        ).mappings().all()
-
-    return rows
+    return await student_orders_page(
+        CANCELLED_ORDERS, student_id, response, cursor, limit
+    )
 
 
 @router.get("/orders/pending")
-def student_pending_orders(
+async def student_pending_orders(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
     student_id: str = Header(..., alias="X-STUDENT-ID")
 ):
-    with engine.connect() as connection:
-        rows = connection.execute(
-            text("""
-                SELECT *
-                FROM orders
-                WHERE student_id = :student_id
-                  AND status = 'PENDING'
-                ORDER BY created_at DESC
-            """),
-            {"student_id": student_id}
-        ).mappings().all()
-
-    return rows
+    return await student_orders_page(
+        PENDING_ORDERS, student_id, response, cursor, limit
+    )
 
 
 @router.get("/orders/in-progress")
-def student_in_progress_orders(
+async def student_in_progress_orders(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
     student_id: str = Header(..., alias="X-STUDENT-ID")
 ):
-    with engine.connect() as connection:
-        rows = connection.execute(
-            text("""
-                SELECT *
-                FROM orders
-                WHERE student_id = :student_id
-                  AND status = 'IN_PROGRESS'
-                ORDER BY created_at ASC
-            """),
-            {"student_id": student_id}
-        ).mappings().all()
-
-    return rows
+    return await student_orders_page(
+        IN_PROGRESS_ORDERS, student_id, response, cursor, limit
+    )
 
 
 @router.get("/orders/completed")
-def student_completed_orders(
+async def student_completed_orders(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
     student_id: str = Header(..., alias="X-STUDENT-ID")
 ):
-    with engine.connect() as connection:
-        rows = connection.execute(
-            text("""
-                SELECT *
-                FROM orders
-                WHERE student_id = :student_id
-                  AND status IN ('COMPLETED','DELIVERED')
-                ORDER BY created_at DESC
-            """),
-            {"student_id": student_id}
-        ).mappings().all()
-
-    return rows
+    return await student_orders_page(
+        COMPLETED_ORDERS, student_id, response, cursor, limit
+    )
 
 
 @router.get("/orders")
-def student_all_orders(
+async def student_all_orders(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
     student_id: str = Header(..., alias="X-STUDENT-ID")
 ):
-    with engine.connect() as connection:
-        rows = connection.execute(
-            text("""
-                SELECT *
-                FROM orders
-                WHERE student_id = :student_id
-                ORDER BY created_at DESC
-            """),
-            {"student_id": student_id}
-        ).mappings().all()
-
-    return rows
+    return await student_orders_page(
+        ALL_ORDERS, student_id, response, cursor, limit
+    )
 
 
 # =====================================================
 # 3️⃣ CANCEL ORDER
 # =====================================================
+CANCEL_ORDER = transition(
+    "student.cancel_order",
+    "status = 'CANCELLED'",
+    "o.status = ANY(CAST(:allowed AS text[]))",
+    owner="o.student_id = CAST(:student_id AS uuid)"
+)
+
+
 @router.patch("/orders/{order_id}/cancel")
-def cancel_order(
+@query_budget(4)
+async def cancel_order(
     order_id: str,
     student_id: str = Header(..., alias="X-STUDENT-ID")
 ):
-    with engine.connect() as connection:
-
-        order = connection.execute(
-            text("""
-                SELECT status
-                FROM orders
-                WHERE id = :id
-                  AND student_id = :student_id
-            """),
-            {"id": order_id, "student_id": student_id}
-        ).fetchone()
+    try:
+        student_uuid = uuid.UUID(student_id)
+    except ValueError:
+        raise HTTPException(404, "Order not found")
 
-        if not order:
+    async with engine.connect() as connection:
+
+        updated = (await connection.execute(CANCEL_ORDER, {
+            "id": order_id,
+            "student_id": str(student_uuid),
+            "allowed": allowed_from("CANCELLED")
+        })).fetchone()
+
+        if not updated or uuid.UUID(str(updated.previous_student_id)) != student_uuid:
             raise HTTPException(404, "Order not found")
 
-        if order.status != "PENDING":
+        if not updated.applied:
             raise HTTPException(
                 400,
                 "Order cannot be cancelled after printing starts"
             )
 
-        updated = connection.execute(
-            text("""
-                UPDATE orders
-                SET status = 'CANCELLED'
-                WHERE id = :id
-                RETURNING id, status
-            """),
-            {"id": order_id}
-        ).fetchone()
+        await order_changed(
+            connection, updated,
+            old_status=updated.previous_status, new_status="CANCELLED"
+        )
 
-        connection.commit()
+        await connection.commit()
 
-    return dict(updated._mapping)
+    shop_events.publish(updated.shop_id, {
+        "type": "order_status",
+        "order_id": updated.id,
+        "status": updated.status
+    })
+
+    return {"id": updated.id, "status": updated.status}
 
 
 # =====================================================
 # 4️⃣ UPLOAD DOCUMENT (MOCK STORAGE)
 # =====================================================
 
+ORDER_FOR_UPLOAD = statement("student.order_for_upload", """
+    SELECT status
+    FROM orders
+    WHERE id = :id
+      AND student_id = :student_id
+""")
+
+BLOB_URL = statement("student.blob_url", """
+    SELECT file_url
+    FROM document_blobs
+    WHERE sha256 = :sha256
+""")
+
+INSERT_DOCUMENT = statement("student.insert_document", """
+    WITH blob AS (
+        INSERT INTO document_blobs (
+            sha256, size_bytes, content_type, file_url
+        )
+        VALUES (:sha256, :size, :content_type, :url)
+        ON CONFLICT (sha256) DO NOTHING
+    )
+    INSERT INTO order_documents (
+        order_id, file_url, original_filename, blob_sha256
+    )
+    VALUES (:order_id, :url, :name, :sha256)
+    RETURNING id
+""")
+
+
 @router.post("/orders/{order_id}/upload")
 async def upload_document(
     order_id: str,
@@ -192,92 +255,122 @@ async def upload_document(
     if file.content_type not in ALLOWED_TYPES:
         raise HTTPException(400, "Unsupported file type")
 
-    # 🔹 Force safe filename
-    safe_name = file.filename.replace(" ", "_")
+    # Checked before the file is read, converted or hashed, so requests
+    # that can't upload don't pay for any of it.
+    async with engine.connect() as connection:
+
+        order = (await connection.execute(
+            ORDER_FOR_UPLOAD,
+            {"id": order_id, "student_id": student_id}
+        )).fetchone()
+
+    if not order:
+        raise HTTPException(403, "Order not found or not yours")
+
+    if order.status != "PENDING":
+        raise HTTPException(400, "Upload allowed only in PENDING state")
 
     # 🔹 Convert image → PDF
     if file.content_type.startswith("image/"):
-        image = Image.open(file.file)
-        buffer = BytesIO()
-        image.convert("RGB").save(buffer, format="PDF")
-        buffer.seek(0)
-        file_bytes = buffer.read()
+        source = await image_to_pdf(await file.read())
         filename = f"{order_id}.pdf"
         content_type = "application/pdf"
     else:
-        file_bytes = await file.read()
+        # Starlette has already spooled the part to disk; stream it from there.
+        source = file
         filename = f"{order_id}.pdf"  # 🔥 force standard name
         content_type = "application/pdf"
 
-    with engine.connect() as connection:
+    # Identical documents (the same lab manual, the same question paper)
+    # are stored once and shared by every order that uploads them. The
+    # blob's path is its hash, so hashing has to finish before we know
+    # whether to upload at all; it reads the local spool, not the network.
+    source, sha256, size = await hash_document(source)
 
-        order = connection.execute(
-            text("""
-                SELECT status
-                FROM orders
-                WHERE id = :id
-                  AND student_id = :student_id
-            """),
-            {"id": order_id, "student_id": student_id}
-        ).fetchone()
+    async with engine.connect() as connection:
+        blob_url = (await connection.execute(
+            BLOB_URL, {"sha256": sha256}
+        )).scalar()
 
-        if not order:
-            raise HTTPException(403, "Order not found or not yours")
+    # 🔥 Upload only content we haven't seen before. No DB connection is
+    # held while the file is in flight.
+    file_url = blob_url
+    if file_url is None:
+        file_url = await upload_blob(source, sha256, size, content_type)
 
-        if order.status != "PENDING":
-            raise HTTPException(400, "Upload allowed only in PENDING state")
-
-        # 🔥 Upload to Supabase (correct content type)
-        file_url = upload_file(
-            order_id=order_id,
-            file_bytes=file_bytes,
-            filename=filename,
-            content_type=content_type   # 🔥 pass content type
-        )
+    async with engine.connect() as connection:
 
-        doc = connection.execute(
-            text("""
-                INSERT INTO order_documents (
-                    order_id, file_url, original_filename
-                )
-                VALUES (:order_id, :url, :name)
-                RETURNING id
-            """),
+        doc = (await connection.execute(
+            INSERT_DOCUMENT,
             {
                 "order_id": order_id,
                 "url": file_url,
-                "name": filename
+                "name": filename,
+                "sha256": sha256,
+                "size": size,
+                "content_type": content_type
             }
-        ).fetchone()
+        )).fetchone()
 
-        connection.commit()
+        await connection.commit()
 
     return {
         "order_id": order_id,
         "document_id": doc.id,
-        "file_url": file_url
+        "file_url": file_url,
+        "deduplicated": blob_url is not None
     }
 
 # =====================================================
 # 5️⃣ PRINT OPTIONS (SET + GET)
 # =====================================================
+ORDER_FOR_PRINT_OPTIONS = statement("student.order_for_print_options", """
+    SELECT status, shop_id, total_pages, payment_status
+    FROM orders
+    WHERE id = :id
+      AND student_id = :student_id
+""")
+
+UPSERT_PRINT_OPTIONS = statement("student.upsert_print_options", """
+    INSERT INTO print_options (
+        order_id, page_ranges, color_mode,
+        side_mode, orientation, binding, copies
+    )
+    VALUES (
+        :order_id, :page_ranges, :color_mode,
+        :side_mode, :orientation, :binding, :copies
+    )
+    ON CONFLICT (order_id)
+    DO UPDATE SET
+        page_ranges = EXCLUDED.page_ranges,
+        color_mode = EXCLUDED.color_mode,
+        side_mode = EXCLUDED.side_mode,
+        orientation = EXCLUDED.orientation,
+        binding = EXCLUDED.binding,
+        copies = EXCLUDED.copies,
+        updated_at = NOW()
+    RETURNING *
+""")
+
+SET_ESTIMATED_COST = statement("student.set_estimated_cost", """
+    UPDATE orders
+    SET estimated_cost = :price
+    WHERE id = :id
+""")
+
+
 @router.post("/orders/{order_id}/print-options")
-def set_print_options(
+async def set_print_options(
     order_id: str,
     payload: dict,
     student_id: str = Header(..., alias="X-STUDENT-ID")
 ):
-    with engine.connect() as connection:
-
-        order = connection.execute(
-            text("""
-                SELECT status, total_pages, payment_status
-                FROM orders
-                WHERE id = :id
-                  AND student_id = :student_id
-            """),
+    async with engine.connect() as connection:
+
+        order = (await connection.execute(
+            ORDER_FOR_PRINT_OPTIONS,
             {"id": order_id, "student_id": student_id}
-        ).fetchone()
+        )).fetchone()
 
         if not order:
             raise HTTPException(403, "Order not found")
@@ -288,48 +381,26 @@ def set_print_options(
         if order.status != "PENDING":
             raise HTTPException(400, "Only editable in PENDING state")
 
-        result = connection.execute(
-            text("""
-                INSERT INTO print_options (
-                    order_id, page_ranges, color_mode,
-                    side_mode, orientation, binding, copies
-                )
-                VALUES (
-                    :order_id, :page_ranges, :color_mode,
-                    :side_mode, :orientation, :binding, :copies
-                )
-                ON CONFLICT (order_id)
-                DO UPDATE SET
-                    page_ranges = EXCLUDED.page_ranges,
-                    color_mode = EXCLUDED.color_mode,
-                    side_mode = EXCLUDED.side_mode,
-                    orientation = EXCLUDED.orientation,
-                    binding = EXCLUDED.binding,
-                    copies = EXCLUDED.copies,
-                    updated_at = NOW()
-                RETURNING *
-            """),
+        result = (await connection.execute(
+            UPSERT_PRINT_OPTIONS,
             {"order_id": order_id, **payload}
-        ).fetchone()
+        )).fetchone()
 
         price = calculate_price(
             total_pages=order.total_pages,
             color_mode=payload["color_mode"],
             side_mode=payload["side_mode"],
             copies=payload["copies"],
-            binding=payload["binding"]
+            binding=payload["binding"],
+            card=await get_rate_card(connection, order.shop_id)
         )
 
-        connection.execute(
-            text("""
-                UPDATE orders
-                SET estimated_cost = :price
-                WHERE id = :id
-            """),
+        await connection.execute(
+            SET_ESTIMATED_COST,
             {"price": price, "id": order_id}
         )
 
-        connection.commit()
+        await connection.commit()
 
     return {
         "print_options": dict(result._mapping),
@@ -337,22 +408,25 @@ def set_print_options(
     }
 
 
+PRINT_OPTIONS = statement("student.print_options", """
+    SELECT po.*
+    FROM print_options po
+    JOIN orders o ON o.id = po.order_id
+    WHERE po.order_id = :id
+      AND o.student_id = :student_id
+""")
+
+
 @router.get("/orders/{order_id}/print-options")
-def get_print_options(
+async def get_print_options(
     order_id: str,
     student_id: str = Header(..., alias="X-STUDENT-ID")
 ):
-    with engine.connect() as connection:
-        row = connection.execute(
-            text("""
-                SELECT po.*
-                FROM print_options po
-                JOIN orders o ON o.id = po.order_id
-                WHERE po.order_id = :id
-                  AND o.student_id = :student_id
-            """),
+    async with engine.connect() as connection:
+        row = (await connection.execute(
+            PRINT_OPTIONS,
             {"id": order_id, "student_id": student_id}
-        ).fetchone()
+        )).fetchone()
 
     if not row:
         raise HTTPException(404, "Print options not found")
@@ -364,63 +438,38 @@ def get_print_options(
 # 6️⃣ SINGLE ORDER DETAIL (LAST ROUTE)
 # =====================================================
 @router.get("/orders/{order_id}")
-def get_student_order_detail(
+@query_budget(1)
+async def get_student_order_detail(
     order_id: str,
     student_id: str = Header(..., alias="X-STUDENT-ID")
 ):
-    with engine.connect() as connection:
-
-        order = connection.execute(
-            text("""
-                SELECT *
-                FROM orders
-                WHERE id = :id
-                  AND student_id = :student_id
-            """),
-            {"id": order_id, "student_id": student_id}
-        ).fetchone()
+    async with engine.connect() as connection:
+        order = await fetch_order_detail(
+            connection, order_id, student_id=student_id
+        )
 
-        if not order:
-            raise HTTPException(404, "Order not found")
+    if not order:
+        raise HTTPException(404, "Order not found")
 
-        documents = connection.execute(
-            text("""
-                SELECT id, original_filename, file_url, uploaded_at
-                FROM order_documents
-                WHERE order_id = :id
-            """),
-            {"id": order_id}
-        ).mappings().all()
-
-        print_options = connection.execute(
-            text("""
-                SELECT *
-                FROM print_options
-                WHERE order_id = :id
-            """),
-            {"id": order_id}
-        ).fetchone()
+    return student_view(order)
 
-    return {
-        "order": dict(order._mapping),
-        "documents": documents,
-        "print_options": dict(print_options._mapping) if print_options else None
-    }
+
+STUDENT_PROFILE = statement("student.student_profile", """
+    SELECT id, username, roll_no
+    FROM users
+    WHERE id = :id
+""")
 
 
 @router.get("/profile")
-def student_profile(
+async def student_profile(
     student_id: str = Header(..., alias="X-STUDENT-ID")
 ):
-    with engine.connect() as connection:
-        user = connection.execute(
-            text("""
-                SELECT id, username, roll_no
-                FROM users
-                WHERE id = :id
-            """),
+    async with engine.connect() as connection:
+        user = (await connection.execute(
+            STUDENT_PROFILE,
             {"id": student_id}
-        ).fetchone()
+        )).fetchone()
 
     if not user:
         raise HTTPException(404, "Student not found")
@@ -431,6 +480,21 @@ def student_profile(
 # =====================================================
 # 7️⃣ UPLOAD UPI PAYMENT PROOF
 # =====================================================
+ORDER_PAYMENT_MODE = statement("student.order_payment_mode", """
+    SELECT payment_mode
+    FROM orders
+    WHERE id = :id
+    AND student_id = :student_id
+""")
+
+SET_PAYMENT_SCREENSHOT = statement("student.set_payment_screenshot", """
+    UPDATE orders
+    SET payment_screenshot = :url,
+        payment_verification_status = 'PENDING'
+    WHERE id = :id
+""")
+
+
 @router.post("/orders/{order_id}/upload-payment-proof")
 async def upload_payment_proof(
     order_id: str,
@@ -441,22 +505,18 @@ async def upload_payment_proof(
     if not file.content_type.startswith("image/"):
         raise HTTPException(400, "Only image allowed")
 
-    file_bytes = await file.read()
     filename = f"payment_{order_id}.jpg"
 
-    file_url = upload_file(order_id, file_bytes, filename, file.content_type)
+    file_url = await upload_file(
+        order_id, file, filename, file.content_type, file.size
+    )
 
-    with engine.connect() as connection:
+    async with engine.connect() as connection:
 
-        order = connection.execute(
-            text("""
-                SELECT payment_mode
-                FROM orders
-                WHERE id = :id
-                AND student_id = :student_id
-            """),
+        order = (await connection.execute(
+            ORDER_PAYMENT_MODE,
             {"id": order_id, "student_id": student_id}
-        ).fetchone()
+        )).fetchone()
 
         if not order:
             raise HTTPException(404, "Order not found")
@@ -464,23 +524,34 @@ async def upload_payment_proof(
         if order.payment_mode != "UPI":
             raise HTTPException(400, "UPI not selected")
 
-        connection.execute(
-            text("""
-                UPDATE orders
-                SET payment_screenshot = :url,
-                    payment_verification_status = 'PENDING'
-                WHERE id = :id
-            """),
+        await connection.execute(
+            SET_PAYMENT_SCREENSHOT,
             {"id": order_id, "url": file_url}
         )
 
-        connection.commit()
+        await connection.commit()
 
     return {"message": "Screenshot uploaded"}
 
 
+ORDER_FOR_PAYMENT_MODE = statement("student.order_for_payment_mode", """
+    SELECT id, student_id, shop_id, status, final_cost, payment_status,
+           created_at
+    FROM orders
+    WHERE id = :id
+    AND student_id = :student_id
+""")
+
+SET_PAYMENT_MODE = statement("student.set_payment_mode", """
+    UPDATE orders
+    SET payment_mode = :mode,
+        payment_status = 'UNPAID'
+    WHERE id = :id
+""")
+
+
 @router.patch("/orders/{order_id}/select-payment")
-def select_payment_mode(
+async def select_payment_mode(
     order_id: str,
     payload: dict,
     student_id: str = Header(..., alias="X-STUDENT-ID")
@@ -491,17 +562,12 @@ def select_payment_mode(
     if mode not in ("UPI", "CASH"):
         raise HTTPException(400, "Invalid payment mode")
 
-    with engine.connect() as connection:
+    async with engine.connect() as connection:
 
-        order = connection.execute(
-            text("""
-                SELECT id, status, final_cost
-                FROM orders
-                WHERE id = :id
-                AND student_id = :student_id
-            """),
+        order = (await connection.execute(
+            ORDER_FOR_PAYMENT_MODE,
             {"id": order_id, "student_id": student_id}
-        ).fetchone()
+        )).fetchone()
 
         if not order:
             raise HTTPException(404, "Order not found")
@@ -509,16 +575,16 @@ def select_payment_mode(
         if order.final_cost is None:
             raise HTTPException(400, "Finalize cost first")
 
-        connection.execute(
-            text("""
-                UPDATE orders
-                SET payment_mode = :mode,
-                    payment_status = 'UNPAID'
-                WHERE id = :id
-            """),
+        await connection.execute(
+            SET_PAYMENT_MODE,
             {"id": order_id, "mode": mode}
         )
 
-        connection.commit()
+        await order_changed(
+            connection, order,
+            old_payment=order.payment_status, new_payment="UNPAID"
+        )
+
+        await connection.commit()
 
     return {"message": "Payment mode selected"}
@@ -1,26 +1,34 @@
-from fastapi import APIRouter, Header, HTTPException
-from sqlalchemy import text
+from fastapi import APIRouter, Header, HTTPException, Response
+from typing import Optional
 from app.database import engine
+from app.services.pagination import KeysetQuery, fetch_page
+from app.services.serialization import rows_response
+from app.services.shop_cache import shop_cache
+from app.services.student_stats import delete_shop_orders
+from app.statements import statement
 
 router = APIRouter(prefix="/super-admin", tags=["Super Admin"])
 
 # --------------------------------------
 # 1️⃣ GET ALL SHOPS
 # --------------------------------------
+LIST_SHOPS = statement("super_admin.list_shops", """
+    SELECT id, accepting_orders, avg_print_time_per_page
+    FROM shops
+    ORDER BY id
+""")
+
+
 @router.get("/shops")
-def get_all_shops(role: str = Header(..., alias="X-ROLE")):
+async def get_all_shops(role: str = Header(..., alias="X-ROLE")):
 
     if role.strip().upper() != "SUPER_ADMIN":
         raise HTTPException(status_code=403, detail="Access denied")
 
-    with engine.connect() as connection:
-        shops = connection.execute(
-            text("""
-                SELECT id, accepting_orders, avg_print_time_per_page
-                FROM shops
-                ORDER BY id
-            """)
-        ).mappings().all()
+    async with engine.connect() as connection:
+        shops = (await connection.execute(
+            LIST_SHOPS
+        )).mappings().all()
 
     return shops
 
@@ -28,34 +36,43 @@ def get_all_shops(role: str = Header(..., alias="X-ROLE")):
 # --------------------------------------
 # 2️⃣ TOGGLE SHOP STATUS
 # --------------------------------------
+SHOP_ACCEPTING = statement("super_admin.shop_accepting", """
+    SELECT accepting_orders FROM shops WHERE id = :id
+""")
+
+SET_ACCEPTING = statement("super_admin.set_accepting", """
+    UPDATE shops
+    SET accepting_orders = :status
+    WHERE id = :id
+    RETURNING id, accepting_orders
+""")
+
+
 @router.patch("/shops/{shop_id}/toggle")
-def toggle_shop(shop_id: str, role: str = Header(..., alias="X-ROLE")):
+async def toggle_shop(shop_id: str, role: str = Header(..., alias="X-ROLE")):
 
     if role.strip().upper() != "SUPER_ADMIN":
         raise HTTPException(status_code=403, detail="Access denied")
 
-    with engine.connect() as connection:
-        shop = connection.execute(
-            text("SELECT accepting_orders FROM shops WHERE id = :id"),
+    async with engine.connect() as connection:
+        shop = (await connection.execute(
+            SHOP_ACCEPTING,
             {"id": shop_id}
-        ).fetchone()
+        )).fetchone()
 
         if not shop:
             raise HTTPException(404, "Shop not found")
 
         new_status = not shop.accepting_orders
 
-        updated = connection.execute(
-            text("""
-                UPDATE shops
-                SET accepting_orders = :status
-                WHERE id = :id
-                RETURNING id, accepting_orders
-            """),
+        updated = (await connection.execute(
+            SET_ACCEPTING,
             {"id": shop_id, "status": new_status}
-        ).fetchone()
+        )).fetchone()
 
-        connection.commit()
+        await connection.commit()
+
+    shop_cache.invalidate(shop_id)
 
     return dict(updated._mapping)
 
@@ -63,152 +80,219 @@ def toggle_shop(shop_id: str, role: str = Header(..., alias="X-ROLE")):
 # --------------------------------------
 # 3️⃣ VIEW ALL ORDERS (SYSTEM-WIDE)
 # --------------------------------------
+ALL_ORDERS = KeysetQuery("super_admin.all_orders", """
+    SELECT id, student_id, shop_id, status, payment_status, created_at
+    FROM orders
+    WHERE TRUE
+""")
+
+
 @router.get("/orders")
-def get_all_orders(role: str = Header(..., alias="X-ROLE")):
+async def get_all_orders(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    role: str = Header(..., alias="X-ROLE")
+):
 
     if role.strip().upper() != "SUPER_ADMIN":
         raise HTTPException(status_code=403, detail="Access denied")
 
-    with engine.connect() as connection:
-        orders = connection.execute(
-            text("""
-                SELECT id, student_id, shop_id, status, payment_status, created_at
-                FROM orders
-                ORDER BY created_at DESC
-            """)
-        ).mappings().all()
+    async with engine.connect() as connection:
+        orders = await fetch_page(connection, ALL_ORDERS, {}, response, cursor, limit)
+
+    return rows_response(orders, response)
 
-    return orders
+
+INSERT_SHOP = statement("super_admin.insert_shop", """
+    INSERT INTO shops (
+        id,
+        accepting_orders,
+        avg_print_time_per_page
+    )
+    VALUES (
+        gen_random_uuid(),
+        true,
+        :avg_time
+    )
+    RETURNING *
+""")
 
 
 @router.post("/shops")
-def create_shop(
+async def create_shop(
     payload: dict,
     role: str = Header(..., alias="X-ROLE")
 ):
     if role.upper() != "SUPER_ADMIN":
         raise HTTPException(403, "Access denied")
 
-    with engine.connect() as connection:
-        result = connection.execute(
-            text("""
-                INSERT INTO shops (
-                    id,
-                    accepting_orders,
-                    avg_print_time_per_page
-                )
-                VALUES (
-                    gen_random_uuid(),
-                    true,
-                    :avg_time
-                )
-                RETURNING *
-            """),
+    async with engine.connect() as connection:
+        result = (await connection.execute(
+            INSERT_SHOP,
             {"avg_time": payload.get("avg_print_time_per_page", 5)}
-        ).fetchone()
+        )).fetchone()
+
+        await connection.commit()
 
-        connection.commit()
+    shop_cache.invalidate(result.id)
 
     return dict(result._mapping)
 
+
+DELETE_SHOP = statement("super_admin.delete_shop", """
+    DELETE FROM shops WHERE id = :id
+""")
+
+
 @router.delete("/shops/{shop_id}")
-def delete_shop(
+async def delete_shop(
     shop_id: str,
     role: str = Header(..., alias="X-ROLE")
 ):
     if role.upper() != "SUPER_ADMIN":
         raise HTTPException(403, "Access denied")
 
-    with engine.connect() as connection:
-        connection.execute(
-            text("DELETE FROM shops WHERE id = :id"),
+    async with engine.connect() as connection:
+        # Orders would cascade with the shop; remove them first so the
+        # student dashboard counters go down with them.
+        await delete_shop_orders(connection, shop_id)
+        await connection.execute(
+            DELETE_SHOP,
             {"id": shop_id}
         )
-        connection.commit()
+        await connection.commit()
+
+    shop_cache.invalidate(shop_id)
 
     return {"detail": "Shop deleted"}
 
 
+SHOP_ANALYTICS = statement("super_admin.shop_analytics", """
+    SELECT
+        COALESCE(SUM(total_orders), 0) AS total_orders,
+        COALESCE(SUM(completed_orders), 0) AS completed,
+        COALESCE(SUM(cancelled_orders), 0) AS cancelled,
+        SUM(final_revenue) AS revenue
+    FROM shop_daily_stats
+    WHERE shop_id = :id
+""")
+
+
 @router.get("/analytics/shop/{shop_id}")
-def shop_analytics(
+async def shop_analytics(
     shop_id: str,
     role: str = Header(..., alias="X-ROLE")
 ):
     if role.upper() != "SUPER_ADMIN":
         raise HTTPException(403, "Access denied")
 
-    with engine.connect() as connection:
-        stats = connection.execute(
-            text("""
-                SELECT
-                    COUNT(*) AS total_orders,
-                    COUNT(*) FILTER (WHERE status = 'COMPLETED') AS completed,
-                    COUNT(*) FILTER (WHERE status = 'CANCELLED') AS cancelled,
-                    SUM(final_cost) AS revenue
-                FROM orders
-                WHERE shop_id = :id
-            """),
+    async with engine.connect() as connection:
+        stats = (await connection.execute(
+            SHOP_ANALYTICS,
             {"id": shop_id}
-        ).fetchone()
+        )).fetchone()
 
     return dict(stats._mapping)
 
 
+SYSTEM_ANALYTICS = statement("super_admin.system_analytics", """
+    SELECT
+        COALESCE(SUM(total_orders), 0) AS total_orders,
+        COALESCE(SUM(paid_orders), 0) AS paid_orders,
+        SUM(final_revenue) AS total_revenue
+    FROM shop_daily_stats
+""")
+
+
 @router.get("/analytics/system")
-def system_analytics(
+async def system_analytics(
     role: str = Header(..., alias="X-ROLE")
 ):
     if role.upper() != "SUPER_ADMIN":
         raise HTTPException(403, "Access denied")
 
-    with engine.connect() as connection:
-        stats = connection.execute(
-            text("""
-                SELECT
-                    COUNT(*) AS total_orders,
-                    COUNT(*) FILTER (WHERE payment_status = 'PAID') AS paid_orders,
-                    SUM(final_cost) AS total_revenue
-                FROM orders
-            """)
-        ).fetchone()
+    async with engine.connect() as connection:
+        stats = (await connection.execute(
+            SYSTEM_ANALYTICS
+        )).fetchone()
 
     return dict(stats._mapping)
 
 
+LIST_ADMINS = statement("super_admin.list_admins", """
+    SELECT id, role
+    FROM users
+    WHERE role IN ('ADMIN', 'SUPER_ADMIN')
+""")
+
+
 @router.get("/admins")
-def get_admins(role: str = Header(..., alias="X-ROLE")):
+async def get_admins(role: str = Header(..., alias="X-ROLE")):
     if role.upper() != "SUPER_ADMIN":
         raise HTTPException(403, "Access denied")
 
-    with engine.connect() as connection:
-        admins = connection.execute(
-            text("""
-                SELECT id, role
-                FROM users
-                WHERE role IN ('ADMIN', 'SUPER_ADMIN')
-            """)
-        ).mappings().all()
+    async with engine.connect() as connection:
+        admins = (await connection.execute(
+            LIST_ADMINS
+        )).mappings().all()
 
     return admins
 
 
+SUSPEND_ADMIN = statement("super_admin.suspend_admin", """
+    UPDATE users
+    SET role = 'SUSPENDED'
+    WHERE id = :id
+""")
+
+
 @router.patch("/admins/{admin_id}/suspend")
-def suspend_admin(
+async def suspend_admin(
     admin_id: str,
     role: str = Header(..., alias="X-ROLE")
 ):
     if role.upper() != "SUPER_ADMIN":
         raise HTTPException(403, "Access denied")
 
-    with engine.connect() as connection:
-        connection.execute(
-            text("""
-                UPDATE users
-                SET role = 'SUSPENDED'
-                WHERE id = :id
-            """),
+    async with engine.connect() as connection:
+        await connection.execute(
+            SUSPEND_ADMIN,
             {"id": admin_id}
         )
-        connection.commit()
+        await connection.commit()
 
     return {"detail": "Admin suspended"}
+
+
+# --------------------------------------
+# DOCUMENT STORAGE SAVINGS
+# --------------------------------------
+DEDUP_REPORT = statement("super_admin.dedup_report", """
+    WITH refs AS (
+        SELECT b.size_bytes, COUNT(*) AS uses
+        FROM order_documents d
+        JOIN document_blobs b ON b.sha256 = d.blob_sha256
+        GROUP BY b.sha256, b.size_bytes
+    )
+    SELECT
+        COUNT(*) AS blobs,
+        COALESCE(SUM(uses), 0) AS documents,
+        COALESCE(SUM(size_bytes), 0) AS stored_bytes,
+        COALESCE(SUM(size_bytes * uses), 0) AS uploaded_bytes,
+        COALESCE(SUM(size_bytes * (uses - 1)), 0) AS bytes_saved
+    FROM refs
+""")
+
+
+@router.get("/storage/dedup")
+async def storage_dedup_report(role: str = Header(..., alias="X-ROLE")):
+    if role.upper() != "SUPER_ADMIN":
+        raise HTTPException(403, "Access denied")
+
+    async with engine.connect() as connection:
+        report = (await connection.execute(
+            DEDUP_REPORT
+        )).fetchone()
+
+    return dict(report._mapping)
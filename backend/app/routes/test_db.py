@@ -1,11 +1,14 @@
 from fastapi import APIRouter
-from sqlalchemy import text
 from app.database import engine
+from app.statements import statement
 
 router = APIRouter()
 
+SELECT_ONE = statement("test_db.select_one", "SELECT 1")
+
+
 @router.get("/db-test")
-def db_test():
-    with engine.connect() as connection:
-        connection.execute(text("SELECT 1"))
+async def db_test():
+    async with engine.connect() as connection:
+        await connection.execute(SELECT_ONE)
         return {"status": "ok"}
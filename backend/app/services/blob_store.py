@@ -0,0 +1,42 @@
+import hashlib
+from io import BytesIO
+
+from app.services.storage import get_storage
+from app.services.supabase_storage import aiter_chunks, maybe_await
+
+
+async def content_hash(file) -> tuple:
+    """
+    SHA-256 and size of `file`, read in chunks, then rewound.
+    For uploads this reads Starlette's local spool, not the network.
+    """
+    digest = hashlib.sha256()
+    size = 0
+
+    async for chunk in aiter_chunks(file):
+        digest.update(chunk)
+        size += len(chunk)
+
+    await maybe_await(file.seek(0))
+
+    return digest.hexdigest(), size
+
+
+def blob_path(sha256: str) -> str:
+    return f"blobs/{sha256[:2]}/{sha256}.pdf"
+
+
+async def hash_document(file):
+    """
+    Returns (file object, sha256, size); bytes are wrapped so the caller
+    has one thing to upload from.
+    """
+    if isinstance(file, bytes):
+        file = BytesIO(file)
+
+    sha256, size = await content_hash(file)
+    return file, sha256, size
+
+
+async def upload_blob(file, sha256: str, size: int, content_type: str) -> str:
+    return await get_storage().upload(blob_path(sha256), file, content_type, size)
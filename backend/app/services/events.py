@@ -0,0 +1,55 @@
+import asyncio
+from collections import defaultdict
+
+from fastapi.encoders import jsonable_encoder
+
+# Events a dashboard can fall behind by before it is sent a fresh snapshot.
+SUBSCRIBER_BUFFER = 100
+
+RESYNC = {"type": "resync"}
+
+
+class ShopEvents:
+    """
+    In-process fan-out of order changes to the dashboards watching a shop.
+    Each API worker has its own; dashboards connect to one worker and see
+    the writes made through it.
+    """
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+
+    def subscribe(self, shop_id: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_BUFFER)
+        self._subscribers[str(shop_id)].add(queue)
+        return queue
+
+    def unsubscribe(self, shop_id: str, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(str(shop_id))
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._subscribers[str(shop_id)]
+
+    def publish(self, shop_id, event: dict):
+        subscribers = self._subscribers.get(str(shop_id))
+        if not subscribers:
+            return
+
+        event = jsonable_encoder(event)
+        for queue in subscribers:
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Too far behind for diffs to be useful: drop them and
+                # have the socket resend the whole queue.
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(RESYNC)
+
+    def subscriber_count(self) -> int:
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+
+shop_events = ShopEvents()
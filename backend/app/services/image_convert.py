@@ -0,0 +1,87 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from fastapi import HTTPException
+from PIL import Image
+
+from app.services.metrics import Histogram
+
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+# Jobs allowed in the pool at once, running or waiting for a worker.
+IMAGE_QUEUE_SIZE = int(os.getenv("IMAGE_QUEUE_SIZE", "8"))
+IMAGE_RETRY_AFTER = int(os.getenv("IMAGE_RETRY_AFTER", "5"))
+
+_executor = None
+_in_flight = 0
+_completed = 0
+_rejected = 0
+
+convert_seconds = Histogram()
+queue_wait_seconds = Histogram()
+
+
+def _convert(data: bytes):
+    # Runs in a worker process.
+    started = time.perf_counter()
+    buffer = BytesIO()
+    Image.open(BytesIO(data)).convert("RGB").save(buffer, format="PDF")
+    return buffer.getvalue(), time.perf_counter() - started
+
+
+def get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=IMAGE_WORKERS)
+    return _executor
+
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def image_to_pdf(data: bytes) -> bytes:
+    """
+    Converts an image to a single-page PDF off the event loop.
+    Raises 503 with Retry-After when the pool is already full.
+    """
+    global _in_flight, _completed, _rejected
+
+    if _in_flight >= IMAGE_QUEUE_SIZE:
+        _rejected += 1
+        raise HTTPException(
+            503,
+            "Image conversion is busy, please retry",
+            headers={"Retry-After": str(IMAGE_RETRY_AFTER)}
+        )
+
+    _in_flight += 1
+    submitted = time.perf_counter()
+    try:
+        loop = asyncio.get_running_loop()
+        pdf, elapsed = await loop.run_in_executor(get_executor(), _convert, data)
+    finally:
+        _in_flight -= 1
+
+    _completed += 1
+    convert_seconds.observe(elapsed)
+    queue_wait_seconds.observe(time.perf_counter() - submitted - elapsed)
+
+    return pdf
+
+
+def image_stats() -> dict:
+    return {
+        "workers": IMAGE_WORKERS,
+        "queue_size": IMAGE_QUEUE_SIZE,
+        "in_flight": _in_flight,
+        "completed": _completed,
+        "rejected": _rejected,
+        "convert_seconds": convert_seconds.snapshot(),
+        "queue_wait_seconds": queue_wait_seconds.snapshot()
+    }
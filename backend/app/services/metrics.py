@@ -0,0 +1,67 @@
+from bisect import bisect_left
+
+
+# Seconds. Covers sub-millisecond pool checkouts up to request timeouts.
+DEFAULT_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram. Only touched from the event loop thread,
+    so no locking.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self) -> dict:
+        cumulative = 0
+        buckets = []
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            cumulative += count
+            buckets.append({"le": bound, "count": cumulative})
+
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "buckets": buckets
+        }
+
+    def prometheus(self, name: str, labels: dict = None) -> list:
+        """
+        `name` as a Prometheus text-format histogram: one _bucket line
+        per bound, then _sum and _count.
+        """
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            cumulative += count
+            lines.append(
+                f"{name}_bucket{label_set({**(labels or {}), 'le': bound})} {cumulative}"
+            )
+        lines.append(f"{name}_sum{label_set(labels)} {self.sum}")
+        lines.append(f"{name}_count{label_set(labels)} {self.count}")
+        return lines
+
+
+def label_set(labels: dict = None) -> str:
+    if not labels:
+        return ""
+
+    def escape(value):
+        return (
+            str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        )
+
+    return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in labels.items()) + "}"
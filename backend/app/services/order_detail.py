@@ -0,0 +1,104 @@
+"""
+The one query behind every order detail view: the order, its student,
+its print options and all of its documents, in a single round trip.
+
+Print options come back as one JSON object (NULL until the student sets
+them) and documents as a JSON array, newest first. The routes reshape
+the row into the response each page already expects.
+"""
+
+from app.statements import statement
+
+ORDER_DETAIL_SELECT = """
+    SELECT
+        o.*,
+        u.username AS student_name,
+        u.roll_no AS student_roll_no,
+        CASE WHEN po.order_id IS NOT NULL THEN to_jsonb(po) END AS print_options,
+        COALESCE(docs.documents, '[]'::jsonb) AS documents
+    FROM orders o
+    LEFT JOIN users u ON u.id = o.student_id
+    LEFT JOIN print_options po ON po.order_id = o.id
+    LEFT JOIN LATERAL (
+        SELECT jsonb_agg(
+            jsonb_build_object(
+                'id', d.id,
+                'original_filename', d.original_filename,
+                'file_url', d.file_url,
+                'uploaded_at', d.uploaded_at
+            )
+            ORDER BY d.uploaded_at DESC
+        ) AS documents
+        FROM order_documents d
+        WHERE d.order_id = o.id
+    ) docs ON TRUE
+    WHERE o.id = :order_id
+"""
+
+ORDER_DETAIL = statement("order_detail.by_id", ORDER_DETAIL_SELECT)
+STUDENT_ORDER_DETAIL = statement(
+    "order_detail.for_student", ORDER_DETAIL_SELECT + " AND o.student_id = :student_id"
+)
+SHOP_ORDER_DETAIL = statement(
+    "order_detail.for_shop", ORDER_DETAIL_SELECT + " AND o.shop_id = :shop_id"
+)
+
+# Print option fields the admin pages read straight off the order.
+FLAT_PRINT_OPTIONS = (
+    "page_ranges",
+    "color_mode",
+    "side_mode",
+    "orientation",
+    "binding",
+    "copies",
+)
+
+DETAIL_FIELDS = ("student_name", "student_roll_no", "print_options", "documents")
+
+
+async def fetch_order_detail(connection, order_id, student_id=None, shop_id=None):
+    """
+    The detail row as a dict, or None if there's no such order (or it
+    isn't the given student's / shop's).
+    """
+    if student_id is not None:
+        query = STUDENT_ORDER_DETAIL
+        params = {"order_id": order_id, "student_id": student_id}
+    elif shop_id is not None:
+        query = SHOP_ORDER_DETAIL
+        params = {"order_id": order_id, "shop_id": shop_id}
+    else:
+        query = ORDER_DETAIL
+        params = {"order_id": order_id}
+
+    row = (await connection.execute(query, params)).mappings().first()
+    return dict(row) if row else None
+
+
+def admin_view(detail: dict) -> dict:
+    """
+    The order with the student, print options and latest document
+    flattened onto it, as the admin order pages read it.
+    """
+    print_options = detail["print_options"] or {}
+    latest = detail["documents"][0] if detail["documents"] else {}
+
+    view = {
+        key: value for key, value in detail.items()
+        if key not in ("print_options", "documents")
+    }
+    view.update({field: print_options.get(field) for field in FLAT_PRINT_OPTIONS})
+    view["document_name"] = latest.get("original_filename")
+    view["document_url"] = latest.get("file_url")
+    return view
+
+
+def student_view(detail: dict) -> dict:
+    return {
+        "order": {
+            key: value for key, value in detail.items()
+            if key not in DETAIL_FIELDS
+        },
+        "documents": detail["documents"],
+        "print_options": detail["print_options"]
+    }
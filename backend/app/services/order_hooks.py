@@ -0,0 +1,149 @@
+"""
+Keeps the derived order tables in step with writes to orders.
+
+Every write path calls one of these in the same transaction as its
+UPDATE/INSERT. `order` is the written row (or anything with the same
+attributes): student_id, shop_id, total_pages, created_at,
+estimated_cost.
+"""
+
+from app.services import queue_stats, rollups, student_stats
+
+
+async def order_created(connection, order):
+    # The queue itself is updated by queue_stats.enqueue before the
+    # insert, since that's where the ETA comes from.
+    await rollups.record(
+        connection, order.shop_id, order.created_at, {"total_orders": 1}
+    )
+    await student_stats.apply(
+        connection,
+        order.student_id,
+        {
+            "total": 1,
+            **student_stats.counter_deltas(
+                new_status=order.status, new_payment=order.payment_status
+            )
+        }
+    )
+
+
+async def orders_created(connection, orders):
+    """
+    order_created() for a batch, with the counters summed per shop and
+    per student so each table gets a single executemany. Orders inserted
+    in one transaction share created_at, so they land on one day.
+    """
+    shop_days = {}
+    students = {}
+
+    for order in orders:
+        key = (order.shop_id, order.created_at)
+        if key not in shop_days:
+            shop_days[key] = (order.shop_id, order.created_at, {"total_orders": 0})
+        shop_days[key][2]["total_orders"] += 1
+
+        counters = students.setdefault(order.student_id, {})
+        for name, delta in {
+            "total": 1,
+            **student_stats.counter_deltas(
+                new_status=order.status, new_payment=order.payment_status
+            )
+        }.items():
+            counters[name] = counters.get(name, 0) + delta
+
+    await rollups.record_many(connection, shop_days.values())
+    await student_stats.apply_many(connection, students)
+
+
+def _change_deltas(
+    order,
+    old_status=None,
+    new_status=None,
+    old_payment=None,
+    new_payment=None,
+    final_cost=None
+):
+    """(rollup deltas, student counter deltas) for one order change."""
+    deltas = {}
+
+    if new_status is not None and new_status != old_status:
+        deltas.update(
+            rollups.status_deltas(old_status, new_status, order.estimated_cost)
+        )
+
+    if new_payment is not None:
+        deltas.update(rollups.payment_deltas(old_payment, new_payment))
+
+    if final_cost is not None:
+        deltas["final_revenue"] = final_cost
+
+    return deltas, student_stats.counter_deltas(
+        old_status, new_status, old_payment, new_payment
+    )
+
+
+async def order_changed(
+    connection,
+    order,
+    old_status=None,
+    new_status=None,
+    old_payment=None,
+    new_payment=None,
+    final_cost=None
+):
+    if new_status is not None and new_status != old_status:
+        await queue_stats.apply_status_change(
+            connection, order.shop_id, order.total_pages, old_status, new_status
+        )
+
+    deltas, counters = _change_deltas(
+        order, old_status, new_status, old_payment, new_payment, final_cost
+    )
+
+    await rollups.record(connection, order.shop_id, order.created_at, deltas)
+    await student_stats.apply(connection, order.student_id, counters)
+
+
+async def orders_changed(connection, changes):
+    """
+    order_changed() for a batch of (order, keyword arguments) pairs, with
+    the queue, rollup and student counter changes summed per shop, per
+    shop and created_at, and per student, so each table gets one
+    executemany.
+    """
+    removed = {}
+    shop_days = {}
+    students = {}
+
+    for order, change in changes:
+        old_status = change.get("old_status")
+        new_status = change.get("new_status")
+
+        if new_status is not None and queue_stats.leaves_queue(old_status, new_status):
+            queue = removed.setdefault(
+                order.shop_id, {"pages": 0, "orders": 0, "released_pages": 0}
+            )
+            queue["pages"] += order.total_pages
+            queue["orders"] += 1
+            if new_status == "CANCELLED":
+                queue["released_pages"] += order.total_pages
+
+        deltas, counters = _change_deltas(order, **change)
+
+        # Keyed on the timestamp, not a Python date: the day is cut in the
+        # database's time zone by rollups.RECORD.
+        key = (order.shop_id, order.created_at)
+        if key not in shop_days:
+            shop_days[key] = (order.shop_id, order.created_at, {})
+        _add(shop_days[key][2], deltas)
+        _add(students.setdefault(order.student_id, {}), counters)
+
+    await queue_stats.dequeue_many(connection, removed)
+    await rollups.record_many(connection, shop_days.values())
+    await student_stats.apply_many(connection, students)
+
+
+def _add(totals: dict, deltas: dict):
+    for name, delta in deltas.items():
+        totals[name] = totals.get(name, 0) + delta
@@ -0,0 +1,79 @@
+import csv
+import io
+import json
+import uuid
+from decimal import Decimal, InvalidOperation
+
+from fastapi import HTTPException
+
+IMPORT_COLUMNS = ("student_id", "shop_id", "total_pages", "estimated_cost")
+
+
+def parse_import(data: bytes, content_type: str, filename: str = "") -> list:
+    """
+    Rows from an uploaded CSV (header row with IMPORT_COLUMNS) or JSON
+    file (a list of objects, or {"orders": [...]}).
+    """
+    try:
+        body = data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(400, "Import file must be UTF-8")
+
+    if content_type == "application/json" or filename.lower().endswith(".json"):
+        try:
+            rows = json.loads(body)
+        except ValueError:
+            raise HTTPException(400, "Invalid JSON")
+        if isinstance(rows, dict):
+            rows = rows.get("orders")
+        if not isinstance(rows, list):
+            raise HTTPException(400, "JSON import must be a list of orders")
+        return rows
+
+    return list(csv.DictReader(io.StringIO(body)))
+
+
+def clean_row(row, default_shop_id=None) -> dict:
+    """
+    One bulk/import row, type-checked. Raises ValueError with the same
+    messages create_order uses where there is one.
+    """
+    if not isinstance(row, dict):
+        raise ValueError("Row must be an object")
+
+    row = {key: value for key, value in row.items() if value not in (None, "")}
+    row.setdefault("shop_id", default_shop_id)
+
+    for field in IMPORT_COLUMNS:
+        if row.get(field) is None:
+            raise ValueError(f"{field} is required")
+
+    try:
+        student_id = str(uuid.UUID(str(row["student_id"]).strip()))
+    except ValueError:
+        raise ValueError("Invalid student ID")
+
+    try:
+        shop_id = str(uuid.UUID(str(row["shop_id"]).strip()))
+    except ValueError:
+        raise ValueError("Shop not found")
+
+    try:
+        total_pages = int(row["total_pages"])
+        estimated_cost = Decimal(str(row["estimated_cost"]).strip())
+    except (TypeError, ValueError, OverflowError, InvalidOperation):
+        raise ValueError("total_pages and estimated_cost must be numbers")
+
+    if total_pages <= 0:
+        raise ValueError("total_pages must be positive")
+
+    # Decimal() takes "NaN" and "Infinity" too.
+    if not estimated_cost.is_finite() or estimated_cost < 0:
+        raise ValueError("estimated_cost must be a non-negative number")
+
+    return {
+        "student_id": student_id,
+        "shop_id": shop_id,
+        "total_pages": total_pages,
+        "estimated_cost": estimated_cost
+    }
@@ -0,0 +1,112 @@
+"""
+Order state changes as single guarded UPDATEs.
+
+Each transition statement locks the order, applies the change only if
+the row still satisfies `guard`, and returns one row either way: the
+updated order (all NULL if the guard failed), an `applied` flag, and
+the previous_* values the row had before. Callers turn a non-applied row
+into the right error from those previous values, and hand them to
+order_hooks, without a second round trip. No row at all means no such
+order.
+
+Every transition binds :id, plus whatever `owner` binds. The default
+owner check binds :shop_id: NULL for SUPER_ADMIN, an ADMIN's own shop
+otherwise.
+"""
+
+from app.statements import statement
+
+VALID_TRANSITIONS = {
+    "PENDING": ["IN_PROGRESS", "CANCELLED"],
+    "IN_PROGRESS": ["COMPLETED"],
+    "COMPLETED": ["DELIVERED"]
+}
+
+SHOP_GUARD = "(CAST(:shop_id AS text) IS NULL OR o.shop_id::text = :shop_id)"
+
+
+def insert_invoices(paid: str) -> str:
+    """
+    The one invoice INSERT. `paid` is a relation with order_id and total
+    columns; each row gets INV-<UTC date>-<first 6 of the order id>.
+    Orders that already have an invoice are skipped.
+    """
+    return f"""
+        INSERT INTO invoices (order_id, invoice_number, subtotal, tax, total)
+        SELECT
+            order_id,
+            'INV-' || to_char(NOW() AT TIME ZONE 'UTC', 'YYYYMMDD')
+                || '-' || LEFT(order_id::text, 6),
+            total,
+            0,
+            total
+        FROM {paid}
+        ON CONFLICT (order_id) DO NOTHING
+    """
+
+
+# Written with the payment, in the same statement.
+INVOICE = f""",
+    invoice AS ({insert_invoices(
+        "(SELECT id AS order_id, final_cost AS total FROM updated) paid"
+    )})"""
+
+# Invoices for orders paid some other way, e.g. in bulk.
+INSERT_INVOICES = statement("order_transitions.insert_invoices", insert_invoices(
+    "unnest(CAST(:order_ids AS uuid[]), CAST(:totals AS numeric[])) AS paid(order_id, total)"
+))
+
+TRANSITION_FIELDS = (
+    "applied",
+    "previous_status",
+    "previous_payment_status",
+    "previous_final_cost",
+    "previous_shop_id",
+    "previous_student_id",
+)
+
+
+def allowed_from(new_status) -> list:
+    """Statuses an order may be in to move to `new_status`."""
+    return [
+        status for status, targets in VALID_TRANSITIONS.items()
+        if new_status in targets
+    ]
+
+
+def transition(name: str, changes: str, guard: str, owner: str = SHOP_GUARD, invoice: bool = False):
+    return statement(name, f"""
+        WITH prev AS (
+            SELECT id, shop_id, student_id, status, payment_status, final_cost
+            FROM orders
+            WHERE id = :id
+            FOR UPDATE
+        ),
+        updated AS (
+            UPDATE orders o
+            SET {changes}
+            FROM prev
+            WHERE o.id = prev.id
+              AND {owner}
+              AND {guard}
+            RETURNING o.*
+        ){INVOICE if invoice else ""}
+        SELECT
+            updated.*,
+            updated.id IS NOT NULL AS applied,
+            prev.status AS previous_status,
+            prev.payment_status AS previous_payment_status,
+            prev.final_cost AS previous_final_cost,
+            prev.shop_id AS previous_shop_id,
+            prev.student_id AS previous_student_id
+        FROM prev
+        LEFT JOIN updated ON TRUE
+    """)
+
+
+def updated_order(row) -> dict:
+    """The order as the UPDATE returned it, without the previous_* columns."""
+    return {
+        key: value for key, value in row._mapping.items()
+        if key not in TRANSITION_FIELDS
+    }
@@ -0,0 +1,97 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException, Response
+
+from app.statements import statement
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Listing responses stay plain JSON arrays; the cursor for the next page
+# travels in this header and is absent on the last page.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(created_at: datetime, row_id) -> str:
+    raw = json.dumps([created_at.isoformat(), str(row_id)])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), str(uuid.UUID(str(row_id)))
+    except (ValueError, TypeError):
+        raise HTTPException(400, "Invalid cursor")
+
+
+class KeysetQuery:
+    """
+    A listing ordered by (created_at, id), compiled once into a first-page
+    statement and a statement that seeks past a cursor, registered as
+    `<name>.first` and `<name>.next`. `sql` must end inside its WHERE
+    clause so the seek condition can be ANDed on.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        sql: str,
+        alias: str = "",
+        descending: bool = True
+    ):
+        prefix = f"{alias}." if alias else ""
+        direction = "DESC" if descending else "ASC"
+        operator = "<" if descending else ">"
+
+        order_by = f"""
+            ORDER BY {prefix}created_at {direction}, {prefix}id {direction}
+            LIMIT :limit
+        """
+        seek = f"""
+            AND ({prefix}created_at, {prefix}id)
+                {operator} (:cursor_created_at, :cursor_id)
+        """
+
+        self.first_page = statement(f"{name}.first", sql + order_by)
+        self.next_page = statement(f"{name}.next", sql + seek + order_by)
+
+
+def page_size(limit: Optional[int]) -> int:
+    if limit is None:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+async def fetch_page(
+    connection,
+    query: KeysetQuery,
+    params: dict,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None
+):
+    size = page_size(limit)
+    params = {**params, "limit": size + 1}
+
+    if cursor:
+        params["cursor_created_at"], params["cursor_id"] = decode_cursor(cursor)
+        statement = query.next_page
+    else:
+        statement = query.first_page
+
+    rows = (await connection.execute(statement, params)).mappings().all()
+
+    if len(rows) > size:
+        rows = rows[:size]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+            last["created_at"], last["id"]
+        )
+
+    return rows
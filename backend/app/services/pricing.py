@@ -1,30 +1,144 @@
+import os
+from types import MappingProxyType
+from typing import Mapping, NamedTuple
+
+from app.services.shop_cache import ShopCache
+from app.statements import statement
+
+RATE_CARD_TTL = int(os.getenv("RATE_CARD_TTL", "300"))
+
+COLOR_MODES = ("BW", "COLOR")
+SIDE_MODES = ("SINGLE", "DOUBLE")
+BINDINGS = ("NONE", "SOFT", "SPIRAL")
+
+# What every shop charged before rate cards; still used for anything a
+# shop hasn't priced itself.
+DEFAULT_PAGE_RATES = {
+    ("BW", "SINGLE"): 1.0,
+    ("BW", "DOUBLE"): 0.75,
+    ("COLOR", "SINGLE"): 5.0,
+    ("COLOR", "DOUBLE"): 4.0,
+}
+
+DEFAULT_BINDING_COSTS = {
+    "NONE": 0,
+    "SOFT": 15,
+    "SPIRAL": 30
+}
+
+
+class RateCard(NamedTuple):
+    """
+    A shop's prices, compiled once into read-only nested lookups:
+    page_rates[color_mode][side_mode] and binding_costs[binding].
+    """
+    page_rates: Mapping
+    binding_costs: Mapping
+
+    def as_dict(self) -> dict:
+        return {
+            "page_rates": {
+                color: dict(sides) for color, sides in self.page_rates.items()
+            },
+            "binding_costs": dict(self.binding_costs)
+        }
+
+
+def compile_rate_card(page_rates: dict = None, binding_costs: dict = None) -> RateCard:
+    """
+    Builds a RateCard from {(color_mode, side_mode): per_page} and
+    {binding: cost} overrides, filling gaps from the defaults.
+    """
+    rates = {**DEFAULT_PAGE_RATES, **(page_rates or {})}
+    costs = {**DEFAULT_BINDING_COSTS, **(binding_costs or {})}
+
+    return RateCard(
+        page_rates=MappingProxyType({
+            color: MappingProxyType({
+                side: float(rates[(color, side)]) for side in SIDE_MODES
+            })
+            for color in COLOR_MODES
+        }),
+        binding_costs=MappingProxyType({
+            binding: float(costs[binding]) for binding in BINDINGS
+        })
+    )
+
+
+DEFAULT_RATE_CARD = compile_rate_card()
+
+
 def calculate_price(
     total_pages: int,
     color_mode: str,
     side_mode: str,
     copies: int,
-    binding: str
+    binding: str,
+    card: RateCard = DEFAULT_RATE_CARD
 ) -> int:
     """
     Returns total price in INR
     """
+    per_page_cost = card.page_rates[color_mode][side_mode]
+    return int(
+        total_pages * per_page_cost * copies
+        + card.binding_costs.get(binding, 0)
+    )
 
-    # Base rates (can be moved to DB later)
-    RATES = {
-        ("BW", "SINGLE"): 1.0,
-        ("BW", "DOUBLE"): 0.75,
-        ("COLOR", "SINGLE"): 5.0,
-        ("COLOR", "DOUBLE"): 4.0,
-    }
 
-    BINDING_COST = {
-        "NONE": 0,
-        "SOFT": 15,
-        "SPIRAL": 30
+def quote_prices(total_pages: int, combinations, card: RateCard = DEFAULT_RATE_CARD) -> list:
+    """
+    calculate_price for many (color_mode, side_mode, copies, binding)
+    tuples at one page count. The pages x per-page product is worked out
+    once per color/side pair, leaving one multiply-add per combination.
+    """
+    page_costs = {
+        (color, side): total_pages * per_page
+        for color, sides in card.page_rates.items()
+        for side, per_page in sides.items()
     }
+    binding_costs = card.binding_costs
+
+    return [
+        int(page_costs[(color, side)] * copies + binding_costs.get(binding, 0))
+        for color, side, copies, binding in combinations
+    ]
+
+
+# =====================================================
+# PER-SHOP CARDS
+# =====================================================
+LOAD_RATE_CARD = statement("pricing.load_rate_card", """
+    SELECT color_mode, side_mode, per_page, NULL AS binding, NULL AS cost
+    FROM shop_page_rates
+    WHERE shop_id = :shop_id
+    UNION ALL
+    SELECT NULL, NULL, NULL, binding, cost
+    FROM shop_binding_rates
+    WHERE shop_id = :shop_id
+""")
+
+# Compiled cards per shop. Edits through PUT /shops/{id}/rates refresh
+# this worker at once; other workers within RATE_CARD_TTL seconds.
+rate_cards = ShopCache(ttl=RATE_CARD_TTL)
+
+
+async def load_rate_card(connection, shop_id) -> RateCard:
+    page_rates = {}
+    binding_costs = {}
+
+    for row in await connection.execute(LOAD_RATE_CARD, {"shop_id": shop_id}):
+        if row.binding is None:
+            page_rates[(row.color_mode, row.side_mode)] = row.per_page
+        else:
+            binding_costs[row.binding] = row.cost
+
+    if not page_rates and not binding_costs:
+        return DEFAULT_RATE_CARD
+    return compile_rate_card(page_rates, binding_costs)
 
-    per_page_cost = RATES[(color_mode, side_mode)]
-    pages_cost = total_pages * per_page_cost * copies
-    binding_cost = BINDING_COST.get(binding, 0)
 
-    return int(pages_cost + binding_cost)
+async def get_rate_card(connection, shop_id) -> RateCard:
+    return await rate_cards.get(
+        shop_id, lambda: load_rate_card(connection, shop_id)
+    )
@@ -0,0 +1,184 @@
+"""
+Per-request query accounting and tracing.
+
+Every HTTP request gets a RequestStats in `current_request` (set by
+RequestMetricsMiddleware); the cursor hooks in app/database.py count
+each statement against it. With QUERY_TRACE=true each statement is also
+recorded with its registered name, duration and call site, and the
+response carries them in X-Query-* headers.
+
+Routes declare how many queries they may issue with @query_budget(n).
+With QUERY_BUDGET_STRICT=true (tests, CI load runs) going over fails the
+request with an AssertionError; otherwise it is only counted in /metrics.
+"""
+
+import os
+import sys
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import NamedTuple, Optional
+
+from greenlet import getcurrent
+
+from app.statements import STATEMENT_NAMES
+
+QUERY_TRACE = os.getenv("QUERY_TRACE", "false").lower() == "true"
+QUERY_BUDGET_STRICT = os.getenv("QUERY_BUDGET_STRICT", "false").lower() == "true"
+# The same statement run more often than this in one request is reported
+# as a repeat; usually a query inside a loop.
+QUERY_REPEAT_LIMIT = int(os.getenv("QUERY_REPEAT_LIMIT", "3"))
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROOT_DIR = os.path.dirname(APP_DIR)
+
+# Frames that are plumbing rather than the code that asked for the query.
+SKIP_FILES = {
+    os.path.join(APP_DIR, "database.py"),
+    os.path.abspath(__file__)
+}
+
+
+class TracedQuery(NamedTuple):
+    name: str
+    seconds: float
+    call_site: Optional[str]
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_seconds", "trace")
+
+    def __init__(self, trace: bool = QUERY_TRACE or QUERY_BUDGET_STRICT):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.trace = [] if trace else None
+
+    def record(self, context, sql: str, seconds: float):
+        self.queries += 1
+        self.db_seconds += seconds
+
+        if self.trace is not None:
+            self.trace.append(TracedQuery(
+                statement_name(context, sql), seconds, call_site()
+            ))
+
+    def repeats(self) -> dict:
+        counts = Counter(query.name for query in self.trace or ())
+        return {
+            name: count
+            for name, count in counts.items()
+            if count > QUERY_REPEAT_LIMIT
+        }
+
+    def report(self) -> str:
+        lines = [f"{self.queries} queries, {self.db_seconds * 1000:.2f}ms"]
+        for query in self.trace or ():
+            lines.append(
+                f"  {query.name} {query.seconds * 1000:.2f}ms at {query.call_site}"
+            )
+        return "\n".join(lines)
+
+
+current_request: ContextVar = ContextVar("current_request", default=None)
+
+
+def statement_name(context, sql: str) -> str:
+    """
+    The app.statements name the SQL was registered under, or its first
+    line for anything run outside the registry.
+    """
+    compiled = getattr(context, "compiled", None)
+    clause = getattr(compiled, "statement", None)
+    name = STATEMENT_NAMES.get(id(clause))
+    if name:
+        return name
+    return " ".join(sql.split())[:60]
+
+
+def call_site() -> Optional[str]:
+    """
+    Innermost app frame behind the current query. The async engine runs
+    the driver in a child greenlet, so once its frames run out the walk
+    continues in the parent greenlet where the awaiting coroutine sits.
+    """
+    frame = sys._getframe(1)
+    current = getcurrent()
+
+    while True:
+        while frame is not None:
+            filename = frame.f_code.co_filename
+            if filename.startswith(APP_DIR) and filename not in SKIP_FILES:
+                return (
+                    f"{os.path.relpath(filename, ROOT_DIR)}:{frame.f_lineno}"
+                    f" in {frame.f_code.co_name}"
+                )
+            frame = frame.f_back
+
+        current = current.parent
+        if current is None:
+            return None
+        frame = current.gr_frame
+
+
+def query_budget(limit: int):
+    """
+    Route decorator: the most queries one request to it may issue.
+    Goes under @router.get/post/...
+    """
+    def decorate(endpoint):
+        endpoint.query_budget = limit
+        return endpoint
+    return decorate
+
+
+def over_budget(endpoint, stats: RequestStats) -> Optional[int]:
+    """The route's budget if `stats` went over it, else None."""
+    limit = getattr(endpoint, "query_budget", None)
+    if limit is not None and stats.queries > limit:
+        return limit
+    return None
+
+
+def trace_headers(stats: RequestStats) -> list:
+    headers = [
+        (b"x-query-count", str(stats.queries).encode()),
+        (b"x-query-time-ms", f"{stats.db_seconds * 1000:.2f}".encode())
+    ]
+
+    if stats.trace is not None:
+        headers.append((b"x-query-trace", ", ".join(
+            f"{query.name} {query.seconds * 1000:.2f}ms ({query.call_site})"
+            for query in stats.trace
+        ).encode()))
+
+        repeats = stats.repeats()
+        if repeats:
+            headers.append((b"x-query-repeats", ", ".join(
+                f"{name} x{count}" for name, count in repeats.items()
+            ).encode()))
+
+    return headers
+
+
+@contextmanager
+def assert_max_queries(limit: int):
+    """
+    For scripts and tests driving the app in-process:
+
+        with assert_max_queries(3) as stats:
+            await get_student_order_detail(order_id, student_id)
+
+    Raises AssertionError with the full trace if the block ran more than
+    `limit` queries.
+    """
+    stats = RequestStats(trace=True)
+    token = current_request.set(stats)
+    try:
+        yield stats
+    finally:
+        current_request.reset(token)
+
+    if stats.queries > limit:
+        raise AssertionError(
+            f"Expected at most {limit} queries, got {stats.report()}"
+        )
@@ -0,0 +1,141 @@
+from datetime import timedelta
+
+from app.statements import statement
+
+# Orders in these states are waiting on (or at) the shop's printer.
+QUEUED_STATUSES = ("PENDING", "IN_PROGRESS")
+
+
+ENQUEUE = statement("queue_stats.enqueue", """
+    INSERT INTO shop_queue_stats (
+        shop_id, queued_pages, queued_orders, tail_ready_at
+    )
+    VALUES (
+        :shop_id, :pages, :orders,
+        NOW() + make_interval(secs => :seconds)
+    )
+    ON CONFLICT (shop_id) DO UPDATE SET
+        queued_pages = shop_queue_stats.queued_pages + EXCLUDED.queued_pages,
+        queued_orders = shop_queue_stats.queued_orders + EXCLUDED.queued_orders,
+        tail_ready_at = GREATEST(shop_queue_stats.tail_ready_at, NOW())
+            + make_interval(secs => :seconds),
+        updated_at = NOW()
+    RETURNING tail_ready_at
+""")
+
+DEQUEUE = statement("queue_stats.dequeue", """
+    UPDATE shop_queue_stats q
+    SET
+        queued_pages = GREATEST(q.queued_pages - :pages, 0),
+        queued_orders = GREATEST(q.queued_orders - :orders, 0),
+        tail_ready_at = CASE
+            WHEN q.queued_orders <= :orders THEN NULL
+            WHEN :released_pages > 0 THEN GREATEST(
+                q.tail_ready_at
+                    - make_interval(secs => :released_pages * s.avg_print_time_per_page),
+                NOW()
+            )
+            ELSE q.tail_ready_at
+        END,
+        updated_at = NOW()
+    FROM shops s
+    WHERE q.shop_id = :shop_id
+      AND s.id = q.shop_id
+""")
+
+SUMMARY = statement("queue_stats.summary", """
+    SELECT shop_id, queued_pages, queued_orders, tail_ready_at
+    FROM shop_queue_stats
+    WHERE shop_id = :shop_id
+""")
+
+
+async def enqueue(connection, shop_id, pages: int, seconds_per_page):
+    """
+    Adds an order to the shop's queue and returns its ready time: the old
+    tail (or now, if the printer is idle) plus this order's print time.
+    Locks the shop's row until the caller commits.
+    """
+    return (await connection.execute(
+        ENQUEUE,
+        {
+            "shop_id": shop_id,
+            "pages": pages,
+            "orders": 1,
+            "seconds": float(pages * seconds_per_page)
+        }
+    )).scalar()
+
+
+async def enqueue_many(connection, shop_id, page_counts, seconds_per_page) -> list:
+    """
+    enqueue() for several orders at once, in the given order: one update
+    of the shop's row, with each order's ready time stacked on the last.
+    """
+    seconds = [float(pages * seconds_per_page) for pages in page_counts]
+    total = sum(seconds)
+
+    tail = (await connection.execute(
+        ENQUEUE,
+        {
+            "shop_id": shop_id,
+            "pages": sum(page_counts),
+            "orders": len(page_counts),
+            "seconds": total
+        }
+    )).scalar()
+
+    ready_times = []
+    ready = tail - timedelta(seconds=total)
+    for order_seconds in seconds:
+        ready += timedelta(seconds=order_seconds)
+        ready_times.append(ready)
+    return ready_times
+
+
+async def dequeue(connection, shop_id, pages: int, release: bool):
+    """
+    Removes an order from the queue. `release` gives its print time back
+    to everyone behind it (cancelled); completed orders already used it.
+    """
+    await connection.execute(
+        DEQUEUE,
+        {
+            "shop_id": shop_id,
+            "pages": pages,
+            "orders": 1,
+            "released_pages": pages if release else 0
+        }
+    )
+
+
+async def dequeue_many(connection, removed: dict):
+    """
+    dequeue() for a batch: `removed` maps shop_id to the summed pages,
+    orders and released_pages leaving that shop's queue. One executemany,
+    one row per shop.
+    """
+    params = [
+        {"shop_id": shop_id, **counts}
+        for shop_id, counts in removed.items()
+        if counts["orders"]
+    ]
+    if params:
+        await connection.execute(DEQUEUE, params)
+
+
+def leaves_queue(old_status, new_status) -> bool:
+    return old_status in QUEUED_STATUSES and new_status not in QUEUED_STATUSES
+
+
+async def apply_status_change(connection, shop_id, pages, old_status, new_status):
+    if leaves_queue(old_status, new_status):
+        await dequeue(
+            connection, shop_id, pages, release=new_status == "CANCELLED"
+        )
+
+
+async def queue_summary(connection, shop_id):
+    return (await connection.execute(
+        SUMMARY, {"shop_id": shop_id}
+    )).mappings().first()
@@ -0,0 +1,164 @@
+"""
+Per-route request metrics: latency, response size, and the queries and
+DB time each request spent, exported by GET /metrics.
+
+The middleware puts a RequestStats in `current_request` for the
+request's lifetime; the cursor hooks in app/database.py add to it. See
+app/services/query_trace.py for the per-query tracing and budgets.
+"""
+
+import time
+from collections import Counter
+
+from app.services.metrics import Histogram, label_set
+from app.services.query_trace import (
+    QUERY_BUDGET_STRICT,
+    QUERY_TRACE,
+    RequestStats,
+    current_request,
+    over_budget,
+    trace_headers
+)
+
+# Bytes.
+SIZE_BUCKETS = (
+    256, 1024, 4096, 16384, 65536,
+    262144, 1048576, 4194304, 16777216
+)
+
+QUERY_BUCKETS = (0, 1, 2, 3, 4, 5, 8, 10, 15, 20, 30, 50)
+
+# Requests no route matched: 404s and the static mounts. Kept as one
+# label so arbitrary paths can't grow the series count.
+UNMATCHED = "<unmatched>"
+
+
+class RouteStats:
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.db_seconds = Histogram()
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.response_bytes = Histogram(SIZE_BUCKETS)
+        self.statuses = Counter()
+        self.over_budget = 0
+
+
+class RouteMetrics:
+    """
+    Everything keyed by (method, route template), so /orders/{order_id}
+    is one series however many orders there are.
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.in_flight = 0
+
+    def observe(self, scope, status: int, seconds: float, size: int, stats: RequestStats):
+        route = getattr(scope.get("route"), "path", None) or UNMATCHED
+        endpoint = getattr(scope.get("route"), "endpoint", None)
+        key = (scope["method"], route)
+
+        if key not in self.routes:
+            self.routes[key] = RouteStats()
+        route_stats = self.routes[key]
+
+        route_stats.latency.observe(seconds)
+        route_stats.db_seconds.observe(stats.db_seconds)
+        route_stats.queries.observe(stats.queries)
+        route_stats.response_bytes.observe(size)
+        route_stats.statuses[status] += 1
+        if over_budget(endpoint, stats) is not None:
+            route_stats.over_budget += 1
+
+    def prometheus(self) -> list:
+        lines = [
+            "# TYPE printmate_http_requests_in_flight gauge",
+            f"printmate_http_requests_in_flight {self.in_flight}",
+            "# TYPE printmate_http_responses_total counter"
+        ]
+        for (method, route), route_stats in sorted(self.routes.items()):
+            for status, count in sorted(route_stats.statuses.items()):
+                labels = {"method": method, "route": route, "status": status}
+                lines.append(f"printmate_http_responses_total{label_set(labels)} {count}")
+
+        lines.append("# TYPE printmate_http_query_budget_exceeded_total counter")
+        for (method, route), route_stats in sorted(self.routes.items()):
+            if route_stats.over_budget:
+                labels = {"method": method, "route": route}
+                lines.append(
+                    f"printmate_http_query_budget_exceeded_total{label_set(labels)}"
+                    f" {route_stats.over_budget}"
+                )
+
+        for name, attribute in (
+            ("printmate_http_request_duration_seconds", "latency"),
+            ("printmate_http_request_db_seconds", "db_seconds"),
+            ("printmate_http_request_queries", "queries"),
+            ("printmate_http_response_size_bytes", "response_bytes")
+        ):
+            lines.append(f"# TYPE {name} histogram")
+            for (method, route), route_stats in sorted(self.routes.items()):
+                lines.extend(getattr(route_stats, attribute).prometheus(
+                    name, {"method": method, "route": route}
+                ))
+
+        return lines
+
+
+route_metrics = RouteMetrics()
+
+
+class RequestMetricsMiddleware:
+    """
+    Plain ASGI rather than BaseHTTPMiddleware, so streamed responses are
+    timed to their last chunk and nothing is buffered.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        status = 500
+        size = 0
+
+        def check_budget():
+            if not QUERY_BUDGET_STRICT:
+                return
+            endpoint = getattr(scope.get("route"), "endpoint", None)
+            limit = over_budget(endpoint, stats)
+            if limit is not None:
+                raise AssertionError(
+                    f"{scope['method']} {scope['route'].path} may issue at most"
+                    f" {limit} queries, issued {stats.report()}"
+                )
+
+        async def send_with_metrics(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                check_budget()
+                if QUERY_TRACE:
+                    message["headers"] = [
+                        *message.get("headers", []), *trace_headers(stats)
+                    ]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        route_metrics.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            route_metrics.in_flight -= 1
+            current_request.reset(token)
+            route_metrics.observe(
+                scope, status, time.perf_counter() - started, size, stats
+            )
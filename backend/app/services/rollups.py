@@ -0,0 +1,147 @@
+"""
+Daily per-shop order rollups behind the analytics endpoints.
+
+Order write paths add deltas through app/services/order_hooks.py.
+To rebuild everything from the orders table:
+
+    python -m app.services.rollups
+"""
+
+import asyncio
+from decimal import Decimal
+
+from app.database import engine
+from app.statements import statement
+
+COUNTERS = (
+    "total_orders",
+    "completed_orders",
+    "fulfilled_orders",
+    "fulfilled_revenue",
+    "cancelled_orders",
+    "paid_orders",
+    "final_revenue",
+)
+
+REVENUE = ("fulfilled_revenue", "final_revenue")
+
+FULFILLED_STATUSES = ("COMPLETED", "DELIVERED")
+
+
+RECORD = statement("rollups.record", f"""
+    INSERT INTO shop_daily_stats (shop_id, day, {", ".join(COUNTERS)})
+    VALUES (
+        :shop_id,
+        CAST(:created_at AS timestamptz)::date,
+        {", ".join(f":{name}" for name in COUNTERS)}
+    )
+    ON CONFLICT (shop_id, day) DO UPDATE SET
+        {", ".join(
+            f"{name} = shop_daily_stats.{name} + EXCLUDED.{name}"
+            for name in COUNTERS
+        )}
+""")
+
+REBUILD = (
+    statement(
+        "rollups.rebuild_lock", "LOCK TABLE shop_daily_stats IN EXCLUSIVE MODE"
+    ),
+    statement("rollups.rebuild_clear", "DELETE FROM shop_daily_stats"),
+    statement("rollups.rebuild_insert", """
+        INSERT INTO shop_daily_stats
+        SELECT
+            shop_id,
+            created_at::date,
+            COUNT(*),
+            COUNT(*) FILTER (WHERE status = 'COMPLETED'),
+            COUNT(*) FILTER (WHERE status IN ('COMPLETED', 'DELIVERED')),
+            COALESCE(SUM(estimated_cost) FILTER (
+                WHERE status IN ('COMPLETED', 'DELIVERED')
+            ), 0),
+            COUNT(*) FILTER (WHERE status = 'CANCELLED'),
+            COUNT(*) FILTER (WHERE payment_status = 'PAID'),
+            COALESCE(SUM(final_cost), 0)
+        FROM orders
+        GROUP BY shop_id, created_at::date
+    """),
+)
+
+
+def status_deltas(old_status, new_status, estimated_cost) -> dict:
+    deltas = {}
+
+    if new_status == "COMPLETED":
+        deltas["completed_orders"] = 1
+    if old_status == "COMPLETED":
+        deltas["completed_orders"] = deltas.get("completed_orders", 0) - 1
+
+    was_fulfilled = old_status in FULFILLED_STATUSES
+    is_fulfilled = new_status in FULFILLED_STATUSES
+    if is_fulfilled != was_fulfilled:
+        sign = 1 if is_fulfilled else -1
+        deltas["fulfilled_orders"] = sign
+        deltas["fulfilled_revenue"] = sign * (estimated_cost or 0)
+
+    if new_status == "CANCELLED":
+        deltas["cancelled_orders"] = 1
+    if old_status == "CANCELLED":
+        deltas["cancelled_orders"] = deltas.get("cancelled_orders", 0) - 1
+
+    return deltas
+
+
+def payment_deltas(old_payment, new_payment) -> dict:
+    if (old_payment == "PAID") == (new_payment == "PAID"):
+        return {}
+    return {"paid_orders": 1 if new_payment == "PAID" else -1}
+
+
+async def record(connection, shop_id, created_at, deltas: dict):
+    if not any(deltas.values()):
+        return
+
+    await connection.execute(
+        RECORD,
+        {
+            "shop_id": shop_id,
+            "created_at": created_at,
+            **{name: deltas.get(name, 0) for name in COUNTERS},
+            **{name: Decimal(deltas.get(name, 0)) for name in REVENUE}
+        }
+    )
+
+
+async def record_many(connection, entries):
+    """
+    record() for a batch of (shop_id, created_at, deltas), sent as one
+    executemany. Entries for the same shop and day should be merged first.
+    """
+    params = [
+        {
+            "shop_id": shop_id,
+            "created_at": created_at,
+            **{name: deltas.get(name, 0) for name in COUNTERS},
+            **{name: Decimal(deltas.get(name, 0)) for name in REVENUE}
+        }
+        for shop_id, created_at, deltas in entries
+        if any(deltas.values())
+    ]
+    if params:
+        await connection.execute(RECORD, params)
+
+
+async def rebuild():
+    async with engine.connect() as connection:
+        for rebuild_step in REBUILD:
+            await connection.execute(rebuild_step)
+        await connection.commit()
+
+
+async def main():
+    await rebuild()
+    await engine.dispose()
+    print("shop_daily_stats rebuilt")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
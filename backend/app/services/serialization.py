@@ -0,0 +1,37 @@
+import uuid
+from decimal import Decimal
+from typing import Optional
+
+import orjson
+from fastapi import Response
+from sqlalchemy.engine import Row, RowMapping
+
+
+def _default(value):
+    # Rows are turned into dicts one at a time, as orjson reaches them.
+    if isinstance(value, RowMapping):
+        return dict(value)
+    if isinstance(value, Row):
+        return value._asdict()
+    # Same rule as FastAPI's encoder: whole numbers as int, else float.
+    if isinstance(value, Decimal):
+        if value.as_tuple().exponent >= 0:
+            return int(value)
+        return float(value)
+    # asyncpg's UUID subclasses uuid.UUID, which orjson only handles exactly.
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError
+
+
+def rows_response(rows, response: Optional[Response] = None) -> Response:
+    """
+    Writes query rows straight to JSON bytes, skipping jsonable_encoder's
+    per-row copies. Headers set on the injected `response` (e.g. the next
+    page cursor) are carried over.
+    """
+    return Response(
+        orjson.dumps(rows, default=_default),
+        media_type="application/json",
+        headers=dict(response.headers) if response is not None else None,
+    )
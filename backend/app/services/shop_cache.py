@@ -0,0 +1,63 @@
+import os
+
+from cachetools import TTLCache
+
+SHOP_CACHE_TTL = int(os.getenv("SHOP_CACHE_TTL", "60"))
+SHOP_CACHE_SIZE = int(os.getenv("SHOP_CACHE_SIZE", "1024"))
+
+ALL_SHOPS = "__all__"
+
+
+class ShopCache:
+    """
+    Per-shop values: shop rows for the student pages, compiled rate
+    cards. Writes in this process invalidate straight away; other workers
+    catch up within the TTL.
+    """
+
+    def __init__(self, maxsize: int = SHOP_CACHE_SIZE, ttl: int = SHOP_CACHE_TTL):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    async def get(self, key: str, loader):
+        """
+        Cached value for `key`, or `await loader()` on a miss.
+        Misses that load nothing (unknown shop) aren't cached.
+        """
+        key = str(key)
+        try:
+            value = self._cache[key]
+            self.hits += 1
+            return value
+        except KeyError:
+            self.misses += 1
+
+        value = await loader()
+        if value is not None:
+            self._cache[key] = value
+        return value
+
+    def invalidate(self, shop_id=None):
+        self.invalidations += 1
+        self._cache.pop(ALL_SHOPS, None)
+        if shop_id is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(str(shop_id), None)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._cache),
+            "maxsize": self._cache.maxsize,
+            "ttl": self._cache.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "invalidations": self.invalidations
+        }
+
+
+shop_cache = ShopCache()
@@ -0,0 +1,143 @@
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from io import BytesIO
+from typing import BinaryIO, Optional, Union
+
+import anyio
+
+from app.services import supabase_storage
+from app.services.supabase_storage import aiter_chunks
+
+# "supabase" (default) or "local"
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "supabase").lower()
+LOCAL_STORAGE_DIR = os.getenv("LOCAL_STORAGE_DIR", "storage")
+# Where clients reach the API; local file URLs are built from it.
+PUBLIC_BASE_URL = os.getenv("PUBLIC_BASE_URL", "http://127.0.0.1:8000")
+
+
+class StorageBackend(ABC):
+    """
+    Where uploaded files live. `upload` returns the URL stored on the row.
+    """
+
+    name = None
+
+    @abstractmethod
+    async def upload(
+        self,
+        path: str,
+        file: Union[bytes, BinaryIO],
+        content_type: str,
+        size: Optional[int] = None
+    ) -> str:
+        ...
+
+    @abstractmethod
+    def public_url(self, path: str) -> str:
+        ...
+
+    async def close(self):
+        pass
+
+
+class SupabaseStorage(StorageBackend):
+
+    name = "supabase"
+
+    async def upload(self, path, file, content_type, size=None):
+        return await supabase_storage.upload_object(path, file, content_type, size)
+
+    def public_url(self, path):
+        return supabase_storage.get_public_url(path)
+
+    async def close(self):
+        await supabase_storage.close_client()
+
+
+class LocalStorage(StorageBackend):
+    """
+    Files on the API host's disk, served by app/routes/files.py.
+    Meant for shop LAN deployments where the printer PC fetches from here.
+    """
+
+    name = "local"
+
+    def __init__(self, root: str = LOCAL_STORAGE_DIR):
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def resolve(self, path: str) -> str:
+        full = os.path.abspath(os.path.join(self.root, path))
+        if os.path.commonpath([full, self.root]) != self.root:
+            raise ValueError("Path escapes storage root")
+        return full
+
+    @staticmethod
+    def temp_file(target: str) -> str:
+        directory = os.path.dirname(target)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".part")
+        os.close(fd)
+        return temp_path
+
+    async def upload(self, path, file, content_type, size=None):
+        if isinstance(file, bytes):
+            file = BytesIO(file)
+
+        target = self.resolve(path)
+
+        # Write beside the target and rename, so readers never see a
+        # half-written file and every version gets a fresh inode/mtime.
+        # Disk calls run in worker threads to keep the event loop free.
+        temp_path = await anyio.to_thread.run_sync(self.temp_file, target)
+        try:
+            out = await anyio.to_thread.run_sync(open, temp_path, "wb")
+            try:
+                async for chunk in aiter_chunks(file):
+                    await anyio.to_thread.run_sync(out.write, chunk)
+            finally:
+                await anyio.to_thread.run_sync(out.close)
+            await anyio.to_thread.run_sync(os.replace, temp_path, target)
+        except BaseException:
+            await anyio.to_thread.run_sync(os.unlink, temp_path)
+            raise
+
+        return self.public_url(path)
+
+    def public_url(self, path):
+        return f"{PUBLIC_BASE_URL.rstrip('/')}/storage/{path}"
+
+
+_storage = None
+
+
+def get_storage() -> StorageBackend:
+    global _storage
+
+    if _storage is None:
+        if STORAGE_BACKEND == "local":
+            _storage = LocalStorage()
+        elif STORAGE_BACKEND == "supabase":
+            _storage = SupabaseStorage()
+        else:
+            raise RuntimeError(f"Unknown STORAGE_BACKEND: {STORAGE_BACKEND}")
+
+    return _storage
+
+
+async def close_storage():
+    if _storage is not None:
+        await _storage.close()
+
+
+async def upload_file(
+    order_id: str,
+    file: Union[bytes, BinaryIO],
+    filename: str,
+    content_type: str,
+    size: Optional[int] = None
+) -> str:
+    return await get_storage().upload(
+        f"{order_id}/{filename}", file, content_type, size
+    )
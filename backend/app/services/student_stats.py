@@ -0,0 +1,227 @@
+"""
+Per-student order counters for the student dashboard.
+
+Order write paths add deltas through app/services/order_hooks.py. To
+compare the counters against orders (and rebuild any that drifted):
+
+    python -m app.services.student_stats [--fix]
+"""
+
+import argparse
+import asyncio
+
+from app.database import engine
+from app.statements import statement
+
+COUNTERS = (
+    "total",
+    "pending",
+    "in_progress",
+    "completed",
+    "cancelled",
+    "paid",
+    "unpaid",
+)
+
+STATUS_COUNTERS = {
+    "PENDING": "pending",
+    "IN_PROGRESS": "in_progress",
+    "COMPLETED": "completed",
+    "DELIVERED": "completed",
+    "CANCELLED": "cancelled",
+}
+
+PAYMENT_COUNTERS = {
+    "PAID": "paid",
+    "UNPAID": "unpaid",
+}
+
+
+APPLY = statement("student_stats.apply", f"""
+    INSERT INTO student_order_stats (student_id, {", ".join(COUNTERS)})
+    VALUES (:student_id, {", ".join(f":{name}" for name in COUNTERS)})
+    ON CONFLICT (student_id) DO UPDATE SET
+        {", ".join(
+            f"{name} = student_order_stats.{name} + EXCLUDED.{name}"
+            for name in COUNTERS
+        )},
+        updated_at = NOW()
+""")
+
+GET = statement("student_stats.get", f"""
+    SELECT {", ".join(COUNTERS)}
+    FROM student_order_stats
+    WHERE student_id = :student_id
+""")
+
+# Same definitions as the dashboard query this table replaced.
+COUNT_COLUMNS = """
+    COUNT(*) AS total,
+    COUNT(*) FILTER (WHERE status = 'PENDING') AS pending,
+    COUNT(*) FILTER (WHERE status = 'IN_PROGRESS') AS in_progress,
+    COUNT(*) FILTER (WHERE status IN ('COMPLETED', 'DELIVERED')) AS completed,
+    COUNT(*) FILTER (WHERE status = 'CANCELLED') AS cancelled,
+    COUNT(*) FILTER (WHERE payment_status = 'PAID') AS paid,
+    COUNT(*) FILTER (WHERE payment_status = 'UNPAID') AS unpaid
+"""
+
+RECOUNT = f"""
+    SELECT student_id, {COUNT_COLUMNS}
+    FROM orders
+    GROUP BY student_id
+"""
+
+# Deletes a shop's orders and takes them off their students' counters,
+# in one statement so nothing can slip in between.
+DELETE_SHOP_ORDERS = statement("student_stats.delete_shop_orders", f"""
+    WITH removed AS (
+        DELETE FROM orders
+        WHERE shop_id = :shop_id
+        RETURNING student_id, status, payment_status
+    ),
+    counts AS (
+        SELECT student_id, {COUNT_COLUMNS}
+        FROM removed
+        GROUP BY student_id
+    )
+    UPDATE student_order_stats s
+    SET
+        {", ".join(f"{name} = s.{name} - c.{name}" for name in COUNTERS)},
+        updated_at = NOW()
+    FROM counts c
+    WHERE s.student_id = c.student_id
+""")
+
+DRIFTED = statement("student_stats.drifted", f"""
+    SELECT
+        COALESCE(s.student_id, r.student_id) AS student_id
+    FROM student_order_stats s
+    FULL JOIN ({RECOUNT}) r
+        ON r.student_id = s.student_id
+    WHERE {" OR ".join(
+        f"COALESCE(s.{name}, 0) <> COALESCE(r.{name}, 0)" for name in COUNTERS
+    )}
+""")
+
+LOCK_STATS = statement(
+    "student_stats.lock_stats",
+    "LOCK TABLE student_order_stats IN EXCLUSIVE MODE"
+)
+
+REBUILD = statement("student_stats.rebuild", f"""
+    INSERT INTO student_order_stats (student_id, {", ".join(COUNTERS)})
+    SELECT
+        u.id,
+        {", ".join(f"COALESCE(r.{name}, 0)" for name in COUNTERS)}
+    FROM users u
+    LEFT JOIN ({RECOUNT}) r
+        ON r.student_id = u.id
+    WHERE u.id = ANY(:student_ids)
+    ON CONFLICT (student_id) DO UPDATE SET
+        {", ".join(f"{name} = EXCLUDED.{name}" for name in COUNTERS)},
+        updated_at = NOW()
+""")
+
+
+def _move(deltas, counters, old, new):
+    if counters.get(old) == counters.get(new):
+        return
+    if old in counters:
+        deltas[counters[old]] = deltas.get(counters[old], 0) - 1
+    if new in counters:
+        deltas[counters[new]] = deltas.get(counters[new], 0) + 1
+
+
+def counter_deltas(
+    old_status=None,
+    new_status=None,
+    old_payment=None,
+    new_payment=None
+) -> dict:
+    deltas = {}
+    if new_status is not None:
+        _move(deltas, STATUS_COUNTERS, old_status, new_status)
+    if new_payment is not None:
+        _move(deltas, PAYMENT_COUNTERS, old_payment, new_payment)
+    return deltas
+
+
+async def apply(connection, student_id, deltas: dict):
+    if not any(deltas.values()):
+        return
+
+    await connection.execute(
+        APPLY,
+        {
+            "student_id": student_id,
+            **{name: deltas.get(name, 0) for name in COUNTERS}
+        }
+    )
+
+
+async def apply_many(connection, deltas_by_student: dict):
+    params = [
+        {
+            "student_id": student_id,
+            **{name: deltas.get(name, 0) for name in COUNTERS}
+        }
+        for student_id, deltas in deltas_by_student.items()
+        if any(deltas.values())
+    ]
+    if params:
+        await connection.execute(APPLY, params)
+
+
+async def delete_shop_orders(connection, shop_id):
+    """
+    Removes every order of a shop that's about to be deleted, keeping the
+    counters in step. The caller deletes the shop in the same transaction.
+    """
+    await connection.execute(DELETE_SHOP_ORDERS, {"shop_id": shop_id})
+
+
+async def get_counters(connection, student_id) -> dict:
+    row = (await connection.execute(
+        GET, {"student_id": student_id}
+    )).mappings().first()
+
+    if row is None:
+        return {name: 0 for name in COUNTERS}
+    return dict(row)
+
+
+async def check(fix: bool = False) -> list:
+    """
+    Student ids whose counters don't match their orders. With `fix`,
+    those rows are recomputed from orders in the same transaction.
+    """
+    async with engine.connect() as connection:
+        if fix:
+            # Hold off order writes so the recount and rebuild agree.
+            await connection.execute(LOCK_STATS)
+
+        drifted = (await connection.execute(DRIFTED)).scalars().all()
+
+        if fix and drifted:
+            await connection.execute(REBUILD, {"student_ids": list(drifted)})
+            await connection.commit()
+
+    return drifted
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fix", action="store_true")
+    args = parser.parse_args()
+
+    drifted = await check(fix=args.fix)
+    await engine.dispose()
+
+    for student_id in drifted:
+        print(student_id)
+    action = "rebuilt" if args.fix else "out of step"
+    print(f"{len(drifted)} student counter rows {action}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
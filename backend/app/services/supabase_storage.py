@@ -1,39 +1,200 @@
+import inspect
 import os
-from supabase import create_client
+from base64 import b64encode
+from io import BytesIO
+from typing import BinaryIO, Optional, Union
+
+import httpx
+from tenacity import (
+    AsyncRetrying,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_random_exponential,
+)
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 SUPABASE_BUCKET = os.getenv("SUPABASE_BUCKET", "printmate-files")
 
-if not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY:
-    raise RuntimeError("Supabase environment variables not set")
+STORAGE_MAX_CONNECTIONS = int(os.getenv("STORAGE_MAX_CONNECTIONS", "20"))
+STORAGE_RETRIES = int(os.getenv("STORAGE_RETRIES", "4"))
 
-supabase = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+# Read size for streamed (single request) uploads.
+CHUNK_SIZE = 1024 * 1024
 
+# Supabase's resumable (TUS) endpoint requires 6 MB chunks; only the last
+# one may be shorter. Files above the threshold go through it.
+RESUMABLE_CHUNK_SIZE = 6 * 1024 * 1024
+RESUMABLE_THRESHOLD = int(
+    os.getenv("SUPABASE_RESUMABLE_THRESHOLD", str(RESUMABLE_CHUNK_SIZE))
+)
 
-def upload_file(
-    order_id: str,
-    file_bytes: bytes,
-    filename: str,
-    content_type: str
-) -> str:
+_client = None
 
-    path = f"{order_id}/{filename}"
 
-    try:
-        supabase.storage.from_(SUPABASE_BUCKET).upload(
-            path,
-            file_bytes,
-            file_options={
-                "content-type": content_type,
-                "cache-control": "3600",
-                "upsert": "true"   # ✅ MUST BE STRING
+def storage_url() -> str:
+    return f"{SUPABASE_URL.rstrip('/')}/storage/v1"
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    One pooled HTTP/2 client for every upload, created on first use so
+    importing this module doesn't need Supabase credentials.
+    """
+    global _client
+
+    if _client is None:
+        if not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY:
+            raise RuntimeError("Supabase environment variables not set")
+
+        _client = httpx.AsyncClient(
+            http2=True,
+            headers={
+                "authorization": f"Bearer {SUPABASE_SERVICE_ROLE_KEY}",
+                "apikey": SUPABASE_SERVICE_ROLE_KEY,
             },
+            limits=httpx.Limits(
+                max_connections=STORAGE_MAX_CONNECTIONS,
+                max_keepalive_connections=STORAGE_MAX_CONNECTIONS,
+            ),
+            timeout=httpx.Timeout(30, write=120),
         )
 
-        public_url = supabase.storage.from_(SUPABASE_BUCKET).get_public_url(path)
+    return _client
+
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _is_retryable(error: BaseException) -> bool:
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code == 429 or error.response.status_code >= 500
+    return isinstance(error, httpx.TransportError)
+
+
+def _retrying() -> AsyncRetrying:
+    return AsyncRetrying(
+        retry=retry_if_exception(_is_retryable),
+        stop=stop_after_attempt(STORAGE_RETRIES),
+        wait=wait_random_exponential(multiplier=0.2, max=5),
+        reraise=True,
+    )
+
+
+async def maybe_await(value):
+    if inspect.isawaitable(value):
+        return await value
+    return value
+
+
+async def aiter_chunks(file, chunk_size: int = CHUNK_SIZE):
+    """
+    Reads from a plain file object or an UploadFile (async read).
+    """
+    while True:
+        chunk = await maybe_await(file.read(chunk_size))
+        if not chunk:
+            break
+        yield chunk
+
+
+def _tus_metadata(**values) -> str:
+    return ",".join(
+        f"{key} {b64encode(value.encode()).decode()}"
+        for key, value in values.items()
+    )
+
+
+async def _upload_stream(path: str, file, content_type: str):
+    client = get_client()
+    start = await maybe_await(file.tell()) if hasattr(file, "tell") else 0
+
+    async for attempt in _retrying():
+        with attempt:
+            await maybe_await(file.seek(start))
+            response = await client.post(
+                f"{storage_url()}/object/{SUPABASE_BUCKET}/{path}",
+                content=aiter_chunks(file),
+                headers={
+                    "content-type": content_type,
+                    "cache-control": "max-age=3600",
+                    "x-upsert": "true",
+                },
+            )
+            response.raise_for_status()
+
+
+async def _upload_resumable(path: str, file, size: int, content_type: str):
+    client = get_client()
+
+    async for attempt in _retrying():
+        with attempt:
+            created = await client.post(
+                f"{storage_url()}/upload/resumable",
+                headers={
+                    "tus-resumable": "1.0.0",
+                    "upload-length": str(size),
+                    "upload-metadata": _tus_metadata(
+                        bucketName=SUPABASE_BUCKET,
+                        objectName=path,
+                        contentType=content_type,
+                        cacheControl="3600",
+                    ),
+                    "x-upsert": "true",
+                },
+            )
+            created.raise_for_status()
+    location = created.headers["location"]
+
+    # Each chunk is retried on its own; the server keeps what it already has.
+    offset = 0
+    async for chunk in aiter_chunks(file, RESUMABLE_CHUNK_SIZE):
+        async for attempt in _retrying():
+            with attempt:
+                response = await client.patch(
+                    location,
+                    content=chunk,
+                    headers={
+                        "tus-resumable": "1.0.0",
+                        "upload-offset": str(offset),
+                        "content-type": "application/offset+octet-stream",
+                    },
+                )
+                response.raise_for_status()
+        offset = int(response.headers["upload-offset"])
+
+
+def get_public_url(path: str) -> str:
+    return f"{storage_url()}/object/public/{SUPABASE_BUCKET}/{path}"
+
+
+async def upload_object(
+    path: str,
+    file: Union[bytes, BinaryIO],
+    content_type: str,
+    size: Optional[int] = None
+) -> str:
+    """
+    Streams `file` (bytes, a file object or an UploadFile) to the bucket
+    without reading it into memory. Large files use the resumable
+    endpoint so memory stays at one chunk.
+    """
+
+    if isinstance(file, bytes):
+        size = len(file)
+        file = BytesIO(file)
+
+    try:
+        if size is not None and size > RESUMABLE_THRESHOLD:
+            await _upload_resumable(path, file, size, content_type)
+        else:
+            await _upload_stream(path, file, content_type)
 
-        return public_url
+        return get_public_url(path)
 
     except Exception as e:
         raise RuntimeError(f"Supabase upload failed: {str(e)}")
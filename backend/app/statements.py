@@ -0,0 +1,38 @@
+"""
+Registry of every SQL statement the app runs.
+
+Statements are registered once, at import time of the module that uses
+them, so requests never build SQL. Variants of a query (with or without a
+shop filter, say) are registered as separate statements rather than
+spliced together per request. Each registered text is also what the
+asyncpg driver keys its per-connection prepared statement cache on; see
+DB_STATEMENT_CACHE_SIZE in app/database.py.
+"""
+
+import importlib
+
+from sqlalchemy import text
+from sqlalchemy.sql.elements import TextClause
+
+STATEMENTS: dict = {}
+# id(clause) -> name, for telling which statement a cursor is running.
+STATEMENT_NAMES: dict = {}
+
+
+def statement(name: str, sql: str) -> TextClause:
+    if name in STATEMENTS:
+        raise ValueError(f"Statement {name!r} is already registered")
+
+    clause = text(sql)
+    STATEMENTS[name] = clause
+    STATEMENT_NAMES[id(clause)] = name
+    return clause
+
+
+def all_statements() -> dict:
+    """
+    STATEMENTS with every route's statements in it. They register when
+    their module is imported, so this imports the app first.
+    """
+    importlib.import_module("app.main")
+    return STATEMENTS
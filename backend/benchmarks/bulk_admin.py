@@ -0,0 +1,117 @@
+"""
+Opening-time admin work on N orders: finalize-cost, status and pay one
+order at a time vs. a single POST /orders/bulk.
+
+    QUERY_TRACE=true uvicorn app.main:app --port 8000
+    python benchmarks/bulk_admin.py --student-id <uuid> --shop-id <uuid> \
+        --orders 100
+
+Creates 2 x N fresh PENDING orders for the shop (one batch per path).
+Reports HTTP requests and the DB statements the server ran for them,
+from the X-Query-Count header QUERY_TRACE=true turns on.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+
+async def create_orders(client, args, count):
+    ids = []
+    for _ in range(count):
+        response = await client.post(
+            "/orders/",
+            json={
+                "shop_id": args.shop_id,
+                "total_pages": 10,
+                "estimated_cost": 20
+            },
+            headers={"X-STUDENT-ID": args.student_id}
+        )
+        response.raise_for_status()
+        ids.append(response.json()["order_id"])
+    return ids
+
+
+def query_count(response) -> int:
+    count = response.headers.get("x-query-count")
+    if count is None:
+        raise SystemExit("No X-Query-Count header: start the server with QUERY_TRACE=true")
+    return int(count)
+
+
+async def one_by_one(client, headers, ids):
+    requests = 0
+    queries = 0
+    for order_id in ids:
+        for method, path, body in (
+            ("POST", f"/orders/{order_id}/finalize-cost", None),
+            ("PATCH", f"/orders/{order_id}/status", {"status": "IN_PROGRESS"}),
+            ("PATCH", f"/orders/{order_id}/pay", {"payment_mode": "CASH"}),
+        ):
+            response = await client.request(method, path, json=body, headers=headers)
+            response.raise_for_status()
+            requests += 1
+            queries += query_count(response)
+    return requests, queries
+
+
+async def bulk(client, headers, ids):
+    response = await client.post(
+        "/orders/bulk",
+        json={
+            "order_ids": ids,
+            "actions": [
+                {"type": "finalize_cost"},
+                {"type": "status", "status": "IN_PROGRESS"},
+                {"type": "pay"}
+            ]
+        },
+        headers=headers
+    )
+    response.raise_for_status()
+    assert response.json()["failed"] == 0, response.json()
+    return 1, query_count(response)
+
+
+async def timed(fn, *args):
+    started = time.perf_counter()
+    requests, queries = await fn(*args)
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": requests,
+        "db_statements": queries,
+        "elapsed_ms": round(elapsed * 1000, 1)
+    }
+
+
+async def run(args):
+    headers = {"X-ROLE": "ADMIN", "X-SHOP-ID": args.shop_id}
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=120) as client:
+        single_ids = await create_orders(client, args, args.orders)
+        bulk_ids = await create_orders(client, args, args.orders)
+
+        return {
+            "orders": args.orders,
+            "one_by_one": await timed(one_by_one, client, headers, single_ids),
+            "bulk": await timed(bulk, client, headers, bulk_ids)
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--student-id", required=True)
+    parser.add_argument("--shop-id", required=True)
+    parser.add_argument("--orders", type=int, default=100)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Server cost of N open shop dashboards: polling vs. the WebSocket feed.
+
+    uvicorn app.main:app --port 8000
+    python benchmarks/dashboard_push.py --pid <uvicorn pid> --shop-id <uuid> \
+        --mode poll --clients 200 --interval 5
+    python benchmarks/dashboard_push.py --pid <uvicorn pid> --shop-id <uuid> \
+        --mode push --clients 200
+
+Server CPU is read from /proc, so run on the same Linux host. Create or
+update a few orders for the shop during the push run to see diffs flow.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+
+import httpx
+import websockets
+
+
+def cpu_seconds(pid: int) -> float:
+    with open(f"/proc/{pid}/stat") as stat:
+        fields = stat.read().rsplit(")", 1)[1].split()
+    # utime and stime, in clock ticks
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+async def poller(client, args, deadline, stats):
+    while time.perf_counter() < deadline:
+        response = await client.get(f"/shops/{args.shop_id}/queue")
+        stats["messages"] += 1
+        stats["bytes"] += len(response.content)
+        await asyncio.sleep(args.interval)
+
+
+async def subscriber(args, deadline, stats):
+    url = args.url.replace("http", "ws", 1) + f"/shops/{args.shop_id}/ws"
+    async with websockets.connect(url) as socket:
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                message = await asyncio.wait_for(socket.recv(), remaining)
+            except asyncio.TimeoutError:
+                break
+            stats["messages"] += 1
+            stats["bytes"] += len(message)
+
+
+async def run(args):
+    stats = {"messages": 0, "bytes": 0}
+    cpu_before = cpu_seconds(args.pid)
+    deadline = time.perf_counter() + args.duration
+
+    if args.mode == "poll":
+        async with httpx.AsyncClient(base_url=args.url, timeout=30) as client:
+            await asyncio.gather(*[
+                poller(client, args, deadline, stats)
+                for _ in range(args.clients)
+            ])
+    else:
+        await asyncio.gather(*[
+            subscriber(args, deadline, stats)
+            for _ in range(args.clients)
+        ])
+
+    return {
+        "mode": args.mode,
+        "clients": args.clients,
+        "duration_s": args.duration,
+        "messages": stats["messages"],
+        "bytes": stats["bytes"],
+        "server_cpu_s": round(cpu_seconds(args.pid) - cpu_before, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--pid", type=int, required=True)
+    parser.add_argument("--shop-id", required=True)
+    parser.add_argument("--mode", choices=["poll", "push"], required=True)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--interval", type=float, default=5)
+    parser.add_argument("--duration", type=float, default=60)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
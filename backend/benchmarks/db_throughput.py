@@ -0,0 +1,81 @@
+"""
+Requests/sec for read endpoints under many concurrent clients.
+
+Start the API (sync baseline or the async build) and point this at it:
+
+    uvicorn app.main:app --port 8000
+    python benchmarks/db_throughput.py --url http://127.0.0.1:8000 \
+        --student-id <uuid> --clients 500 --duration 30
+
+Run once per build and compare the printed JSON.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+
+async def client_loop(client, paths, headers, deadline, stats):
+    i = 0
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        try:
+            response = await client.get(path, headers=headers)
+            if response.status_code < 500:
+                stats["ok"] += 1
+            else:
+                stats["errors"] += 1
+        except httpx.HTTPError:
+            stats["errors"] += 1
+
+
+async def run(args):
+    paths = ["/shops/", "/student/orders", "/student/dashboard", "/db-test"]
+    headers = {"X-STUDENT-ID": args.student_id} if args.student_id else {}
+    stats = {"ok": 0, "errors": 0}
+
+    limits = httpx.Limits(
+        max_connections=args.clients,
+        max_keepalive_connections=args.clients
+    )
+
+    async with httpx.AsyncClient(
+        base_url=args.url, limits=limits, timeout=60
+    ) as client:
+        started = time.perf_counter()
+        deadline = started + args.duration
+
+        await asyncio.gather(*[
+            client_loop(client, paths, headers, deadline, stats)
+            for _ in range(args.clients)
+        ])
+
+        elapsed = time.perf_counter() - started
+
+    return {
+        "url": args.url,
+        "clients": args.clients,
+        "duration_s": round(elapsed, 2),
+        "requests": stats["ok"],
+        "errors": stats["errors"],
+        "requests_per_sec": round(stats["ok"] / elapsed, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--student-id")
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=30)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+"""
+End-to-end load run against the real app and a local Postgres.
+
+Starts uvicorn on app.main:app with local file storage (no Supabase),
+runs three workloads side by side for --duration seconds and prints
+p50/p95/p99 latency and requests/sec per endpoint as JSON:
+
+  * students   browse /shops/, /student/orders and /student/dashboard
+  * creators   create an order, upload a PDF and set print options
+  * admins     poll /admin/orders and /shops/{id}/queue
+
+    DATABASE_URL=postgresql://localhost/printmate_bench \
+        python benchmarks/load.py --seed --duration 60 --out run.json
+    DATABASE_URL=... python benchmarks/load.py --duration 60 --baseline run.json
+
+--seed runs benchmarks/seed.py (--reset) first; --url skips starting a
+server and targets a running one instead (it must use local storage).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import asyncpg
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.database import engine  # noqa: E402
+from seed import seed  # noqa: E402
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+IDS = """
+    SELECT
+        ARRAY(SELECT id::text FROM shops WHERE shop_name LIKE 'Seed shop %'
+              ORDER BY shop_name) AS shops,
+        ARRAY(SELECT id::text FROM users WHERE username LIKE 'seed-student-%'
+              ORDER BY username LIMIT 2000) AS students
+"""
+
+
+def pdf_bytes(tag: str) -> bytes:
+    # Smallest well-formed one-page PDF; the tag keeps blobs unique.
+    return (
+        b"%PDF-1.4\n% " + tag.encode() + b"\n"
+        b"1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n"
+        b"2 0 obj<</Type/Pages/Kids[3 0 R]/Count 1>>endobj\n"
+        b"3 0 obj<</Type/Page/Parent 2 0 R/MediaBox[0 0 595 842]>>endobj\n"
+        b"trailer<</Root 1 0 R>>\n%%EOF\n"
+    )
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+
+    async def call(self, client, label, method, path, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, path, **kwargs)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            response, ok = None, False
+
+        if ok:
+            self.latencies.setdefault(label, []).append(time.perf_counter() - started)
+        else:
+            self.errors[label] = self.errors.get(label, 0) + 1
+        return response if ok else None
+
+    def report(self, elapsed: float) -> dict:
+        endpoints = {}
+        for label in sorted(set(self.latencies) | set(self.errors)):
+            samples = sorted(self.latencies.get(label, []))
+            endpoints[label] = {
+                "requests": len(samples),
+                "errors": self.errors.get(label, 0),
+                "rps": round(len(samples) / elapsed, 1),
+                **{
+                    f"p{q}_ms": round(percentile(samples, q) * 1000, 2)
+                    if samples else None
+                    for q in (50, 95, 99)
+                }
+            }
+        return endpoints
+
+
+def percentile(samples, q):
+    index = min(len(samples) - 1, max(0, round(q / 100 * len(samples)) - 1))
+    return samples[index]
+
+
+async def student(client, recorder, ids, deadline):
+    student_id = random.choice(ids["students"])
+    headers = {"X-STUDENT-ID": student_id}
+
+    while time.perf_counter() < deadline:
+        await recorder.call(client, "GET /shops/", "GET", "/shops/")
+        await recorder.call(
+            client, "GET /student/orders", "GET", "/student/orders", headers=headers
+        )
+        await recorder.call(
+            client, "GET /student/dashboard", "GET", "/student/dashboard", headers=headers
+        )
+
+
+async def creator(client, recorder, ids, deadline):
+    student_id = random.choice(ids["students"])
+    headers = {"X-STUDENT-ID": student_id}
+
+    while time.perf_counter() < deadline:
+        shop_id = random.choice(ids["shops"])
+        response = await recorder.call(
+            client, "POST /orders/", "POST", "/orders/",
+            json={"shop_id": shop_id, "total_pages": 1, "estimated_cost": 1},
+            headers=headers
+        )
+        if response is None:
+            continue
+        order_id = response.json()["id"]
+
+        await recorder.call(
+            client, "POST /student/orders/{order_id}/upload", "POST",
+            f"/student/orders/{order_id}/upload",
+            files={"file": ("load.pdf", pdf_bytes(order_id), "application/pdf")},
+            headers=headers
+        )
+        await recorder.call(
+            client, "POST /student/orders/{order_id}/print-options", "POST",
+            f"/student/orders/{order_id}/print-options",
+            json={
+                "page_ranges": "all",
+                "color_mode": "BW",
+                "side_mode": "SINGLE",
+                "orientation": "PORTRAIT",
+                "binding": "NONE",
+                "copies": 1
+            },
+            headers=headers
+        )
+
+
+async def admin(client, recorder, ids, deadline, interval):
+    shop_id = random.choice(ids["shops"])
+    headers = {"X-ROLE": "ADMIN", "X-SHOP-ID": shop_id}
+
+    while time.perf_counter() < deadline:
+        await recorder.call(
+            client, "GET /admin/orders", "GET", "/admin/orders", headers=headers
+        )
+        await recorder.call(
+            client, "GET /shops/{shop_id}/queue", "GET", f"/shops/{shop_id}/queue"
+        )
+        await asyncio.sleep(interval)
+
+
+async def wait_until_up(url, timeout=30):
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient(base_url=url) as client:
+        while time.perf_counter() < deadline:
+            try:
+                if (await client.get("/db-test")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.5)
+    raise SystemExit(f"API at {url} did not come up")
+
+
+def start_server(args, storage_dir):
+    url = f"http://127.0.0.1:{args.port}"
+    env = {
+        **os.environ,
+        "STORAGE_BACKEND": "local",
+        "LOCAL_STORAGE_DIR": storage_dir,
+        "PUBLIC_BASE_URL": url,
+    }
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--port", str(args.port),
+            "--workers", str(args.workers),
+            "--log-level", "warning",
+        ],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+    return url, process
+
+
+def compare(current: dict, baseline: dict) -> dict:
+    changes = {}
+    for label, stats in current.items():
+        before = baseline.get(label)
+        if not before:
+            continue
+        changes[label] = {
+            key: round(stats[key] / before[key] - 1, 3)
+            for key in ("rps", "p50_ms", "p95_ms", "p99_ms")
+            if stats.get(key) and before.get(key)
+        }
+    return changes
+
+
+async def run(args):
+    connection = await asyncpg.connect(os.environ["DATABASE_URL"])
+    try:
+        if args.seed:
+            await seed(
+                connection, args.seed_shops, args.seed_students,
+                args.seed_orders, reset=True
+            )
+        ids = dict(await connection.fetchrow(IDS))
+    finally:
+        await connection.close()
+        await engine.dispose()
+
+    if not ids["shops"] or not ids["students"]:
+        raise SystemExit("No seeded shops/students; run with --seed")
+
+    process = None
+    with tempfile.TemporaryDirectory(prefix="printmate-load-") as storage_dir:
+        url = args.url
+        if url is None:
+            url, process = start_server(args, storage_dir)
+
+        try:
+            await wait_until_up(url)
+
+            recorder = Recorder()
+            limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+            async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+                started = time.perf_counter()
+                deadline = started + args.duration
+
+                await asyncio.gather(
+                    *[student(client, recorder, ids, deadline) for _ in range(args.students)],
+                    *[creator(client, recorder, ids, deadline) for _ in range(args.creators)],
+                    *[
+                        admin(client, recorder, ids, deadline, args.admin_interval)
+                        for _ in range(args.admins)
+                    ],
+                )
+                elapsed = time.perf_counter() - started
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+
+    report = {
+        "config": {
+            "duration_s": args.duration,
+            "students": args.students,
+            "creators": args.creators,
+            "admins": args.admins,
+            "admin_interval_s": args.admin_interval,
+            "workers": args.workers,
+        },
+        "elapsed_s": round(elapsed, 2),
+        "endpoints": recorder.report(elapsed),
+    }
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["change_vs_baseline"] = compare(
+                report["endpoints"], json.load(f)["endpoints"]
+            )
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", help="use a running API instead of starting one")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument("--students", type=int, default=50)
+    parser.add_argument("--creators", type=int, default=5)
+    parser.add_argument("--admins", type=int, default=10)
+    parser.add_argument("--admin-interval", type=float, default=2.0)
+    parser.add_argument("--seed", action="store_true")
+    parser.add_argument("--seed-shops", type=int, default=20)
+    parser.add_argument("--seed-students", type=int, default=5000)
+    parser.add_argument("--seed-orders", type=int, default=100000)
+    parser.add_argument("--baseline", help="earlier --out file to compare with")
+    parser.add_argument("--out", help="also write the report here")
+    parser.add_argument("--random-seed", type=int, default=1)
+    args = parser.parse_args()
+
+    random.seed(args.random_seed)
+    report = asyncio.run(run(args))
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output)
+
+
+if __name__ == "__main__":
+    main()
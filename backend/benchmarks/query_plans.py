@@ -0,0 +1,313 @@
+"""
+Query plan regression check. Runs EXPLAIN (ANALYZE, BUFFERS) on every
+registered route statement against a seeded database and fails on
+
+  * a statement binding a name sample_params has no value for,
+  * a sequential scan of a large table, or
+  * a plan whose shape changed, or whose buffer count grew more than
+    --buffer-slack times, compared with the saved baseline.
+
+    DATABASE_URL=postgresql://localhost/printmate_bench \
+        python benchmarks/seed.py --reset
+    DATABASE_URL=... python benchmarks/query_plans.py
+    DATABASE_URL=... python benchmarks/query_plans.py --update-baseline
+
+On a small database, where Postgres rightly prefers seq scans, run with
+--force-index (and no baseline) to check only that an index exists for
+every lookup; tests/test_query_plans.py does this.
+
+Writes run inside a savepoint that is rolled back. Exits 1 on failure.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import asyncpg
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.database import engine  # noqa: E402
+from app.services.rollups import COUNTERS as ROLLUP_COUNTERS  # noqa: E402
+from app.services.student_stats import COUNTERS as STUDENT_COUNTERS  # noqa: E402
+from app.statements import all_statements  # noqa: E402
+from seed import sample_ids  # noqa: E402
+
+STATEMENTS = all_statements()
+
+BASELINE = os.path.join(os.path.dirname(__file__), "query_plans.json")
+
+# Seq scans on anything else (shops, rollups, caches) are fine.
+LARGE_TABLES = {
+    "orders",
+    "order_documents",
+    "print_options",
+    "invoices",
+    "users",
+    "student_order_stats",
+}
+
+# Maintenance statements and reports that read whole tables on purpose.
+SKIP = {
+    "rollups.rebuild_lock",
+    "rollups.rebuild_clear",
+    "rollups.rebuild_insert",
+    "student_stats.lock_stats",
+    "student_stats.drifted",
+    "student_stats.rebuild",
+    "super_admin.dedup_report",
+}
+
+
+def sample_params(ids: dict) -> dict:
+    """
+    One value for every bind name the route statements use. A statement
+    binding a name that isn't here fails the check, so add new binds as
+    statements gain them.
+    """
+    now = datetime.now(timezone.utc)
+    order_id = ids["order_id"]
+    cost = Decimal("10.00")
+
+    return {
+        "id": order_id,
+        "order_id": order_id,
+        "shop_id": ids["shop_id"],
+        "student_id": ids["student_id"],
+        "ids": [order_id],
+        "order_ids": [order_id],
+        "shop_ids": [ids["shop_id"]],
+        "student_ids": [ids["student_id"]],
+        "status": "PENDING",
+        "allowed": ["PENDING"],
+        "limit": 51,
+        "cursor_created_at": now,
+        "cursor_id": order_id,
+        "created_at": now,
+        # orders
+        "total_pages": 10,
+        "estimated_cost": cost,
+        "eta": now,
+        "price": cost,
+        "mode": "CASH",
+        "method": "UPI",
+        "proof": "https://example.com/proof.png",
+        # orders.bulk_update and order_transitions.insert_invoices
+        "statuses": ["PENDING"],
+        "final_costs": [cost],
+        "payment_statuses": ["UNPAID"],
+        "payment_modes": ["CASH"],
+        "totals": [cost],
+        # queue_stats
+        "pages": 10,
+        "orders": 1,
+        "released_pages": 10,
+        "seconds": 60.0,
+        # print options and documents
+        "page_ranges": "1-10",
+        "color_mode": "BW",
+        "side_mode": "SINGLE",
+        "orientation": "PORTRAIT",
+        "binding": "NONE",
+        "copies": 1,
+        "url": "https://example.com/plan.pdf",
+        "name": "plan.pdf",
+        "sha256": "0" * 64,
+        "size": 1024,
+        "content_type": "application/pdf",
+        # rate cards and shops
+        "per_page": cost,
+        "cost": cost,
+        "avg_time": 5,
+        # rollups.record and student_stats.apply deltas
+        **{name: 0 for name in ROLLUP_COUNTERS + STUDENT_COUNTERS},
+    }
+
+
+# Statements that bind a shared name with a different type.
+OVERRIDES = {
+    "orders.bulk_insert": lambda params: {
+        "total_pages": [params["total_pages"]],
+        "estimated_costs": [params["estimated_cost"]],
+        "etas": [params["eta"]],
+    },
+    "orders.bulk_update": lambda params: {"paid": [False]},
+    "super_admin.set_accepting": lambda params: {"status": True},
+}
+
+
+def params_for(name, params) -> dict:
+    override = OVERRIDES.get(name)
+    return {**params, **override(params)} if override else params
+
+
+def to_driver(name, params):
+    compiled = STATEMENTS[name].compile(dialect=engine.dialect)
+    missing = [key for key in compiled.positiontup if key not in params]
+    if missing:
+        return compiled.string, None, missing
+    return compiled.string, [params[key] for key in compiled.positiontup], []
+
+
+def walk(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from walk(child)
+
+
+def summarize(plan: dict) -> dict:
+    root = plan["Plan"]
+    nodes = list(walk(root))
+    return {
+        "shape": [
+            " ".join(filter(None, (
+                node["Node Type"],
+                node.get("Relation Name"),
+                node.get("Index Name")
+            )))
+            for node in nodes
+        ],
+        "seq_scans": sorted({
+            node["Relation Name"] for node in nodes
+            if node["Node Type"] == "Seq Scan"
+            and node.get("Relation Name") in LARGE_TABLES
+        }),
+        "buffers": root.get("Shared Hit Blocks", 0) + root.get("Shared Read Blocks", 0),
+        "planning_ms": plan.get("Planning Time"),
+        "execution_ms": plan.get("Execution Time"),
+    }
+
+
+class Rollback(Exception):
+    def __init__(self, plan):
+        self.plan = plan
+
+
+async def explain(connection, sql, args):
+    async with connection.transaction():
+        plan = await connection.fetchval(
+            f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}", *args
+        )
+        # Undo any write the statement made.
+        raise Rollback(json.loads(plan)[0])
+
+
+def compare(name, current, baseline, slack) -> list:
+    problems = [f"seq scan on {table}" for table in current["seq_scans"]]
+
+    if baseline is None:
+        return problems
+
+    if current["shape"] != baseline["shape"]:
+        problems.append(
+            "plan changed: " + " > ".join(baseline["shape"])
+            + "  =>  " + " > ".join(current["shape"])
+        )
+    if current["buffers"] > max(baseline["buffers"], 1) * slack:
+        problems.append(
+            f"buffers {baseline['buffers']} -> {current['buffers']}"
+        )
+    return problems
+
+
+async def check_plans(
+    connection,
+    params: dict,
+    baseline: dict,
+    buffer_slack: float = 2.0,
+    only: str = None,
+    force_index: bool = False
+) -> tuple:
+    """
+    Explains every registered statement not in SKIP. Returns
+    ({name: summary}, {name: [problem, ...]}).
+
+    With `force_index` the planner avoids sequential scans wherever an
+    index can serve the query, so on a small database a seq scan left in
+    the plan means no usable index exists.
+    """
+    results = {}
+    failures = {}
+
+    if force_index:
+        await connection.execute("SET enable_seqscan = off")
+
+    for name in sorted(STATEMENTS):
+        if name in SKIP or (only and not name.startswith(only)):
+            continue
+
+        sql, values, missing = to_driver(name, params_for(name, params))
+        if missing:
+            failures[name] = [f"no sample for {', '.join(missing)}"]
+            continue
+
+        try:
+            await explain(connection, sql, values)
+        except Rollback as rollback:
+            current = summarize(rollback.plan)
+        except asyncpg.PostgresError as e:
+            failures[name] = [f"error: {e}"]
+            continue
+
+        results[name] = current
+        problems = compare(name, current, baseline.get(name), buffer_slack)
+        if problems:
+            failures[name] = problems
+
+    return results, failures
+
+
+async def run(args):
+    baseline = {}
+    if os.path.exists(BASELINE) and not args.update_baseline:
+        with open(BASELINE) as f:
+            baseline = json.load(f)
+
+    connection = await asyncpg.connect(os.environ["DATABASE_URL"])
+    try:
+        results, failures = await check_plans(
+            connection,
+            sample_params(await sample_ids(connection)),
+            baseline,
+            args.buffer_slack,
+            args.only,
+            args.force_index
+        )
+    finally:
+        await connection.close()
+        await engine.dispose()
+
+    if args.update_baseline:
+        with open(BASELINE, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    return {
+        "checked": len(results),
+        "failures": failures,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--buffer-slack", type=float, default=2.0)
+    parser.add_argument("--only", help="check statements with this name prefix")
+    parser.add_argument(
+        "--force-index", action="store_true",
+        help="turn off seq scans where an index can serve (small databases)"
+    )
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print(json.dumps(report, indent=2))
+
+    if report["failures"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
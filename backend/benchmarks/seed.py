@@ -0,0 +1,215 @@
+"""
+Fills a local Postgres with a realistic amount of PrintMate data for the
+plan and load benchmarks. Seeded rows are recognisable (shop names start
+with "Seed shop", usernames with "seed-") and --reset removes them first.
+
+    DATABASE_URL=postgresql://localhost/printmate_bench \
+        python benchmarks/seed.py --shops 50 --students 20000 --orders 500000
+
+Runs the migrations first and rebuilds the derived tables (queue totals,
+rollups, student counters) at the end. Don't point this at production.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import asyncpg
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.migrate import migrate  # noqa: E402
+
+RESET = [
+    "DELETE FROM shops WHERE shop_name LIKE 'Seed shop %'",
+    "DELETE FROM users WHERE username LIKE 'seed-%'",
+]
+
+SHOPS = """
+    INSERT INTO shops (shop_name, address, phone, accepting_orders, avg_print_time_per_page)
+    SELECT
+        'Seed shop ' || g,
+        'Block ' || g,
+        '90000' || lpad(g::text, 5, '0'),
+        TRUE,
+        3 + g % 5
+    FROM generate_series(1, $1) g
+"""
+
+USERS = """
+    INSERT INTO users (username, full_name, roll_no, role)
+    SELECT
+        'seed-student-' || g,
+        'Seed Student ' || g,
+        'R' || lpad(g::text, 7, '0'),
+        'STUDENT'
+    FROM generate_series(1, $1) g
+    UNION ALL
+    SELECT 'seed-admin-' || g, 'Seed Admin ' || g, NULL, 'ADMIN'
+    FROM generate_series(1, 5) g
+"""
+
+# Newest orders are mostly still open; older ones are mostly delivered.
+ORDERS = """
+    WITH shop_ids AS (
+        SELECT array_agg(id ORDER BY shop_name) AS ids
+        FROM shops WHERE shop_name LIKE 'Seed shop %'
+    ),
+    student_ids AS (
+        SELECT array_agg(id ORDER BY username) AS ids
+        FROM users WHERE username LIKE 'seed-student-%'
+    ),
+    rows AS (
+        SELECT
+            g,
+            s.ids[1 + (g * 7919) % cardinality(s.ids)] AS shop_id,
+            u.ids[1 + (g * 104729) % cardinality(u.ids)] AS student_id,
+            1 + (g * 31) % 120 AS total_pages,
+            NOW() - make_interval(secs => g * 20) AS created_at,
+            CASE
+                WHEN g <= $1 / 100 THEN (ARRAY['PENDING', 'IN_PROGRESS'])[1 + g % 2]
+                WHEN g % 10 = 0 THEN 'CANCELLED'
+                WHEN g % 10 = 1 THEN 'COMPLETED'
+                ELSE 'DELIVERED'
+            END AS status
+        FROM generate_series(1, $1) g, shop_ids s, student_ids u
+    )
+    INSERT INTO orders (
+        student_id, shop_id, total_pages, status, payment_status,
+        payment_mode, estimated_cost, final_cost, estimated_ready_time,
+        paid_at, created_at
+    )
+    SELECT
+        student_id,
+        shop_id,
+        total_pages,
+        status,
+        CASE WHEN status = 'DELIVERED' THEN 'PAID' ELSE 'UNPAID' END,
+        CASE WHEN status = 'DELIVERED' THEN 'CASH' END,
+        total_pages,
+        CASE WHEN status IN ('COMPLETED', 'DELIVERED') THEN total_pages END,
+        created_at + make_interval(secs => total_pages * 5),
+        CASE WHEN status = 'DELIVERED' THEN created_at + INTERVAL '1 hour' END,
+        created_at
+    FROM rows
+"""
+
+PRINT_OPTIONS = """
+    INSERT INTO print_options (order_id, page_ranges, color_mode, side_mode, orientation, binding, copies)
+    SELECT
+        o.id,
+        'all',
+        CASE WHEN o.total_pages % 4 = 0 THEN 'COLOR' ELSE 'BW' END,
+        CASE WHEN o.total_pages % 3 = 0 THEN 'DOUBLE' ELSE 'SINGLE' END,
+        'PORTRAIT',
+        (ARRAY['NONE', 'SOFT', 'SPIRAL'])[1 + o.total_pages % 3],
+        1 + o.total_pages % 2
+    FROM orders o
+    JOIN shops s ON s.id = o.shop_id
+    WHERE s.shop_name LIKE 'Seed shop %'
+"""
+
+DOCUMENTS = """
+    INSERT INTO order_documents (order_id, file_url, original_filename, uploaded_at)
+    SELECT
+        o.id,
+        'http://127.0.0.1:8000/storage/seed/' || o.id || '.pdf',
+        'document.pdf',
+        o.created_at + INTERVAL '1 minute'
+    FROM orders o
+    JOIN shops s ON s.id = o.shop_id
+    WHERE s.shop_name LIKE 'Seed shop %'
+"""
+
+QUEUE_STATS = """
+    INSERT INTO shop_queue_stats (shop_id, queued_pages, queued_orders, tail_ready_at)
+    SELECT shop_id, SUM(total_pages), COUNT(*), MAX(estimated_ready_time)
+    FROM orders
+    WHERE status IN ('PENDING', 'IN_PROGRESS')
+    GROUP BY shop_id
+    ON CONFLICT (shop_id) DO UPDATE SET
+        queued_pages = EXCLUDED.queued_pages,
+        queued_orders = EXCLUDED.queued_orders,
+        tail_ready_at = EXCLUDED.tail_ready_at,
+        updated_at = NOW()
+"""
+
+SAMPLE = """
+    SELECT
+        (SELECT id FROM shops WHERE shop_name = 'Seed shop 1') AS shop_id,
+        (SELECT id FROM users WHERE username = 'seed-student-1') AS student_id,
+        (SELECT o.id FROM orders o JOIN users u ON u.id = o.student_id
+         WHERE u.username = 'seed-student-1'
+         ORDER BY o.created_at DESC LIMIT 1) AS order_id
+"""
+
+
+async def sample_ids(connection) -> dict:
+    """Ids of one seeded shop, student and order, as strings."""
+    row = await connection.fetchrow(SAMPLE)
+    return {key: str(value) for key, value in row.items()}
+
+
+async def seed(connection, shops: int, students: int, orders: int, reset: bool = False):
+    from app.services import rollups, student_stats
+
+    timings = {}
+    await migrate()
+
+    async def step(name, sql, *args):
+        started = time.perf_counter()
+        await connection.execute(sql, *args)
+        timings[name] = round(time.perf_counter() - started, 2)
+
+    if reset:
+        for sql in RESET:
+            await step("reset", sql)
+
+    await step("shops", SHOPS, shops)
+    await step("users", USERS, students)
+    await step("orders", ORDERS, orders)
+    await step("print_options", PRINT_OPTIONS)
+    await step("order_documents", DOCUMENTS)
+    await step("shop_queue_stats", QUEUE_STATS)
+
+    started = time.perf_counter()
+    await rollups.rebuild()
+    await student_stats.check(fix=True)
+    timings["rollups_and_counters"] = round(time.perf_counter() - started, 2)
+
+    await step("analyze", "ANALYZE")
+    return timings
+
+
+async def run(args):
+    connection = await asyncpg.connect(os.environ["DATABASE_URL"])
+    try:
+        timings = await seed(
+            connection, args.shops, args.students, args.orders, args.reset
+        )
+        sample = await sample_ids(connection)
+    finally:
+        await connection.close()
+
+    from app.database import engine
+    await engine.dispose()
+
+    return {"timings_s": timings, "sample": sample}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--shops", type=int, default=50)
+    parser.add_argument("--students", type=int, default=20000)
+    parser.add_argument("--orders", type=int, default=500000)
+    parser.add_argument("--reset", action="store_true")
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
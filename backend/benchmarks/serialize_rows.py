@@ -0,0 +1,94 @@
+"""
+CPU time and peak memory to turn 10k order rows into a JSON response,
+FastAPI's default path vs. rows_response. Rows are read from the database
+through the app's engine, so they carry the driver's own types (asyncpg
+UUIDs, Decimals, aware datetimes) exactly as the listing routes see them.
+
+    DATABASE_URL=postgresql://localhost/printmate_bench \
+        python benchmarks/seed.py --reset
+    DATABASE_URL=... python benchmarks/serialize_rows.py --rows 10000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.database import engine  # noqa: E402
+from app.services.serialization import rows_response  # noqa: E402
+
+# The columns the order listings return.
+ORDER_ROWS = text("""
+    SELECT id, shop_id, status, payment_status, payment_mode, total_pages,
+           estimated_cost, final_cost, estimated_ready_time, paid_at, created_at
+    FROM orders
+    ORDER BY created_at DESC
+    LIMIT :limit
+""")
+
+
+async def fetch_rows(count):
+    try:
+        async with engine.connect() as connection:
+            return (await connection.execute(
+                ORDER_ROWS, {"limit": count}
+            )).mappings().all()
+    finally:
+        await engine.dispose()
+
+
+def default_path(rows):
+    # What a handler returning [dict(row._mapping) ...] goes through.
+    return JSONResponse(jsonable_encoder([dict(row) for row in rows])).body
+
+
+def fast_path(rows):
+    return rows_response(rows).body
+
+
+def measure(fn, rows, repeat):
+    tracemalloc.start()
+    started = time.process_time()
+    for _ in range(repeat):
+        body = fn(rows)
+    elapsed = (time.process_time() - started) / repeat
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "cpu_ms": round(elapsed * 1000, 2),
+        "peak_mb": round(peak / 1024 / 1024, 2),
+        "bytes": len(body)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = asyncio.run(fetch_rows(args.rows))
+    if len(rows) < args.rows:
+        sys.exit(f"Only {len(rows)} orders in the database; seed it first")
+    if json.loads(default_path(rows)) != json.loads(fast_path(rows)):
+        sys.exit("rows_response and jsonable_encoder disagree")
+
+    print(json.dumps({
+        "rows": len(rows),
+        "jsonable_encoder": measure(default_path, rows, args.repeat),
+        "rows_response": measure(fast_path, rows, args.repeat)
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
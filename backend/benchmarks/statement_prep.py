@@ -0,0 +1,130 @@
+"""
+Parse and plan cost of the ten hottest registered statements: each one
+run unprepared (parsed and planned on every call) vs. through a prepared
+statement, plus the planner time Postgres reports for it.
+
+    DATABASE_URL=postgresql://... python benchmarks/statement_prep.py --calls 500
+
+Needs at least one order in the database; ids are taken from the newest.
+Everything runs inside a transaction that is rolled back.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import asyncpg
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.database import engine  # noqa: E402
+from app.statements import all_statements  # noqa: E402
+
+STATEMENTS = all_statements()
+
+SAMPLE = """
+    SELECT id AS order_id, shop_id, student_id
+    FROM orders
+    ORDER BY created_at DESC
+    LIMIT 1
+"""
+
+
+def hot_statements(sample):
+    """(registered name, params) for the statements behind the busiest pages."""
+    order = {"order_id": sample["order_id"]}
+    shop = {"shop_id": sample["shop_id"]}
+    student = {"student_id": sample["student_id"]}
+
+    return [
+        ("shops.list_shops", {}),
+        ("shops.get_shop", shop),
+        ("shops.shop_queue", shop),
+        ("queue_stats.summary", shop),
+        ("pricing.load_rate_card", shop),
+        ("student_stats.get", student),
+        ("student.all_orders.first", {**student, "limit": 51}),
+        ("admin.shop_orders.first", {**shop, "limit": 51}),
+        ("order_detail.by_id", order),
+        ("order_detail.for_student", {**order, **student}),
+    ]
+
+
+def to_driver(name, params):
+    """The $n SQL and positional args asyncpg sees for a statement."""
+    compiled = STATEMENTS[name].compile(dialect=engine.dialect)
+    args = [params[key] for key in compiled.positiontup]
+    return compiled.string, args
+
+
+async def planning_ms(connection, sql, args):
+    plan = await connection.fetchval(
+        f"EXPLAIN (ANALYZE, SUMMARY, FORMAT JSON) {sql}", *args
+    )
+    return json.loads(plan)[0]["Planning Time"]
+
+
+async def per_call_us(fn, calls):
+    started = time.perf_counter()
+    for _ in range(calls):
+        await fn()
+    return round((time.perf_counter() - started) / calls * 1e6, 1)
+
+
+async def run(args):
+    # statement_cache_size=0: asyncpg re-parses and re-plans every call.
+    connection = await asyncpg.connect(
+        os.environ["DATABASE_URL"], statement_cache_size=0
+    )
+    transaction = connection.transaction()
+    await transaction.start()
+
+    try:
+        sample = await connection.fetchrow(SAMPLE)
+        if sample is None:
+            raise SystemExit("No orders to sample ids from")
+
+        results = []
+        for name, params in hot_statements(sample):
+            sql, values = to_driver(name, params)
+            prepared = await connection.prepare(sql)
+
+            unprepared = await per_call_us(
+                lambda: connection.fetch(sql, *values), args.calls
+            )
+            reused = await per_call_us(
+                lambda: prepared.fetch(*values), args.calls
+            )
+
+            results.append({
+                "statement": name,
+                "planning_ms": await planning_ms(connection, sql, values),
+                "unprepared_us": unprepared,
+                "prepared_us": reused,
+                "saved_us": round(unprepared - reused, 1)
+            })
+    finally:
+        await transaction.rollback()
+        await connection.close()
+        await engine.dispose()
+
+    return {
+        "calls": args.calls,
+        "statements": results,
+        "total_saved_us_per_round": round(sum(r["saved_us"] for r in results), 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=500)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
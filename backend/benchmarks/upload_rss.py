@@ -0,0 +1,161 @@
+"""
+Peak server RSS while many large documents upload at once.
+
+Start a storage sink that accepts and discards uploads, then run the API
+against it and fire concurrent uploads at it:
+
+    python benchmarks/upload_rss.py sink --port 9000
+    SUPABASE_URL=http://127.0.0.1:9000 SUPABASE_SERVICE_ROLE_KEY=x \
+        uvicorn app.main:app --port 8000
+    python benchmarks/upload_rss.py run --pid <uvicorn pid> \
+        --order-id <uuid> --student-id <uuid> --uploads 20 --size-mb 200
+
+RSS is sampled from /proc, so `run` needs to be on the same Linux host.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+
+# -------------------------
+# Storage sink
+# -------------------------
+
+class SinkHandler(BaseHTTPRequestHandler):
+
+    def _drain(self):
+        if self.headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                size = int(self.rfile.readline().strip(), 16)
+                self.rfile.read(size + 2)
+                if size == 0:
+                    break
+        else:
+            remaining = int(self.headers.get("content-length", 0))
+            while remaining:
+                remaining -= len(self.rfile.read(min(remaining, 1 << 20)))
+
+    def do_POST(self):
+        self._drain()
+        if self.path.endswith("/upload/resumable"):
+            self.send_response(201)
+            self.send_header("location", f"http://{self.headers['host']}/tus/1")
+        else:
+            self.send_response(200)
+        self.send_header("content-length", "0")
+        self.end_headers()
+
+    def do_PATCH(self):
+        length = int(self.headers.get("content-length", 0))
+        self._drain()
+        offset = int(self.headers.get("upload-offset", 0)) + length
+        self.send_response(204)
+        self.send_header("upload-offset", str(offset))
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def run_sink(args):
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), SinkHandler)
+    print(f"storage sink on http://127.0.0.1:{args.port}")
+    server.serve_forever()
+
+
+# -------------------------
+# Upload load
+# -------------------------
+
+def rss_kb(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def sample_rss(pid, samples, stop):
+    while not stop.is_set():
+        samples.append(rss_kb(pid))
+        time.sleep(0.1)
+
+
+async def run_uploads(args, path):
+    async with httpx.AsyncClient(base_url=args.url, timeout=None) as client:
+
+        async def upload():
+            with open(path, "rb") as f:
+                response = await client.post(
+                    f"/student/orders/{args.order_id}/upload",
+                    headers={"X-STUDENT-ID": args.student_id},
+                    files={"file": ("thesis.pdf", f, "application/pdf")}
+                )
+            return response.status_code
+
+        return await asyncio.gather(*[upload() for _ in range(args.uploads)])
+
+
+def run_load(args):
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as f:
+        block = os.urandom(1 << 20)
+        for _ in range(args.size_mb):
+            f.write(block)
+        f.flush()
+
+        samples = []
+        stop = threading.Event()
+        sampler = threading.Thread(
+            target=sample_rss, args=(args.pid, samples, stop)
+        )
+
+        baseline = rss_kb(args.pid)
+        sampler.start()
+        started = time.perf_counter()
+        statuses = asyncio.run(run_uploads(args, f.name))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        sampler.join()
+
+    print(json.dumps({
+        "uploads": args.uploads,
+        "size_mb": args.size_mb,
+        "statuses": sorted(set(statuses)),
+        "elapsed_s": round(elapsed, 2),
+        "rss_baseline_mb": round(baseline / 1024, 1),
+        "rss_peak_mb": round(max(samples, default=baseline) / 1024, 1)
+    }, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sink = sub.add_parser("sink")
+    sink.add_argument("--port", type=int, default=9000)
+
+    run = sub.add_parser("run")
+    run.add_argument("--url", default="http://127.0.0.1:8000")
+    run.add_argument("--pid", type=int, required=True)
+    run.add_argument("--order-id", required=True)
+    run.add_argument("--student-id", required=True)
+    run.add_argument("--uploads", type=int, default=20)
+    run.add_argument("--size-mb", type=int, default=200)
+
+    args = parser.parse_args()
+    if args.command == "sink":
+        run_sink(args)
+    else:
+        run_load(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+-- Schema the app was built against before migrations existed.
+-- Everything is IF NOT EXISTS so this is a no-op on existing databases.
+
+CREATE TABLE IF NOT EXISTS users (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    username TEXT,
+    full_name TEXT,
+    roll_no TEXT,
+    role TEXT NOT NULL DEFAULT 'STUDENT',
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS shops (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    shop_name TEXT,
+    address TEXT,
+    phone TEXT,
+    accepting_orders BOOLEAN NOT NULL DEFAULT TRUE,
+    avg_print_time_per_page INTEGER NOT NULL DEFAULT 5
+);
+
+CREATE TABLE IF NOT EXISTS orders (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    student_id UUID NOT NULL REFERENCES users(id),
+    shop_id UUID NOT NULL REFERENCES shops(id) ON DELETE CASCADE,
+    total_pages INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'PENDING',
+    payment_status TEXT NOT NULL DEFAULT 'UNPAID',
+    estimated_cost NUMERIC(10, 2),
+    final_cost NUMERIC(10, 2),
+    estimated_ready_time TIMESTAMPTZ,
+    payment_method TEXT,
+    payment_mode TEXT,
+    payment_verification_status TEXT,
+    payment_proof TEXT,
+    payment_screenshot TEXT,
+    paid_at TIMESTAMPTZ,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS print_options (
+    order_id UUID PRIMARY KEY REFERENCES orders(id) ON DELETE CASCADE,
+    page_ranges TEXT,
+    color_mode TEXT NOT NULL,
+    side_mode TEXT NOT NULL,
+    orientation TEXT,
+    binding TEXT NOT NULL DEFAULT 'NONE',
+    copies INTEGER NOT NULL DEFAULT 1,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS order_documents (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    order_id UUID NOT NULL REFERENCES orders(id) ON DELETE CASCADE,
+    file_url TEXT NOT NULL,
+    original_filename TEXT,
+    uploaded_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS invoices (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    order_id UUID NOT NULL UNIQUE REFERENCES orders(id) ON DELETE CASCADE,
+    invoice_number TEXT NOT NULL,
+    subtotal NUMERIC(10, 2) NOT NULL,
+    tax NUMERIC(10, 2) NOT NULL DEFAULT 0,
+    total NUMERIC(10, 2) NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
@@ -0,0 +1,12 @@
+-- Uploaded documents stored once per distinct content.
+
+CREATE TABLE IF NOT EXISTS document_blobs (
+    sha256 TEXT PRIMARY KEY,
+    size_bytes BIGINT NOT NULL,
+    content_type TEXT NOT NULL,
+    file_url TEXT NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+ALTER TABLE order_documents
+    ADD COLUMN IF NOT EXISTS blob_sha256 TEXT REFERENCES document_blobs(sha256);
@@ -0,0 +1,25 @@
+-- Running per-shop totals of the print queue (PENDING + IN_PROGRESS),
+-- kept in step with orders by app/services/queue_stats.py.
+
+CREATE TABLE IF NOT EXISTS shop_queue_stats (
+    shop_id UUID PRIMARY KEY REFERENCES shops(id) ON DELETE CASCADE,
+    queued_pages INTEGER NOT NULL DEFAULT 0,
+    queued_orders INTEGER NOT NULL DEFAULT 0,
+    tail_ready_at TIMESTAMPTZ,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+INSERT INTO shop_queue_stats (shop_id, queued_pages, queued_orders, tail_ready_at)
+SELECT
+    shop_id,
+    SUM(total_pages),
+    COUNT(*),
+    MAX(estimated_ready_time)
+FROM orders
+WHERE status IN ('PENDING', 'IN_PROGRESS')
+GROUP BY shop_id
+ON CONFLICT (shop_id) DO UPDATE SET
+    queued_pages = EXCLUDED.queued_pages,
+    queued_orders = EXCLUDED.queued_orders,
+    tail_ready_at = EXCLUDED.tail_ready_at,
+    updated_at = NOW();
@@ -0,0 +1,34 @@
+-- Per-shop, per-day order counts and revenue for the analytics endpoints,
+-- kept in step with orders by app/services/rollups.py. Days are the
+-- order's created_at date. Rebuild with: python -m app.services.rollups
+
+CREATE TABLE IF NOT EXISTS shop_daily_stats (
+    shop_id UUID NOT NULL REFERENCES shops(id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    total_orders INTEGER NOT NULL DEFAULT 0,
+    -- status = 'COMPLETED' right now
+    completed_orders INTEGER NOT NULL DEFAULT 0,
+    -- status in ('COMPLETED', 'DELIVERED'), with their estimated_cost
+    fulfilled_orders INTEGER NOT NULL DEFAULT 0,
+    fulfilled_revenue NUMERIC(12, 2) NOT NULL DEFAULT 0,
+    cancelled_orders INTEGER NOT NULL DEFAULT 0,
+    paid_orders INTEGER NOT NULL DEFAULT 0,
+    -- SUM(final_cost)
+    final_revenue NUMERIC(12, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (shop_id, day)
+);
+
+INSERT INTO shop_daily_stats
+SELECT
+    shop_id,
+    created_at::date,
+    COUNT(*),
+    COUNT(*) FILTER (WHERE status = 'COMPLETED'),
+    COUNT(*) FILTER (WHERE status IN ('COMPLETED', 'DELIVERED')),
+    COALESCE(SUM(estimated_cost) FILTER (WHERE status IN ('COMPLETED', 'DELIVERED')), 0),
+    COUNT(*) FILTER (WHERE status = 'CANCELLED'),
+    COUNT(*) FILTER (WHERE payment_status = 'PAID'),
+    COALESCE(SUM(final_cost), 0)
+FROM orders
+GROUP BY shop_id, created_at::date
+ON CONFLICT (shop_id, day) DO NOTHING;
@@ -0,0 +1,32 @@
+-- Per-student order counters behind /student/dashboard, kept in step with
+-- orders by app/services/student_stats.py. Check or rebuild with:
+-- python -m app.services.student_stats [--fix]
+
+CREATE TABLE IF NOT EXISTS student_order_stats (
+    student_id UUID PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    total INTEGER NOT NULL DEFAULT 0,
+    pending INTEGER NOT NULL DEFAULT 0,
+    in_progress INTEGER NOT NULL DEFAULT 0,
+    -- status in ('COMPLETED', 'DELIVERED')
+    completed INTEGER NOT NULL DEFAULT 0,
+    cancelled INTEGER NOT NULL DEFAULT 0,
+    paid INTEGER NOT NULL DEFAULT 0,
+    unpaid INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+INSERT INTO student_order_stats (
+    student_id, total, pending, in_progress, completed, cancelled, paid, unpaid
+)
+SELECT
+    student_id,
+    COUNT(*),
+    COUNT(*) FILTER (WHERE status = 'PENDING'),
+    COUNT(*) FILTER (WHERE status = 'IN_PROGRESS'),
+    COUNT(*) FILTER (WHERE status IN ('COMPLETED', 'DELIVERED')),
+    COUNT(*) FILTER (WHERE status = 'CANCELLED'),
+    COUNT(*) FILTER (WHERE payment_status = 'PAID'),
+    COUNT(*) FILTER (WHERE payment_status = 'UNPAID')
+FROM orders
+GROUP BY student_id
+ON CONFLICT (student_id) DO NOTHING;
@@ -0,0 +1,19 @@
+-- Per-shop prices. Any option a shop hasn't set uses the default card in
+-- app/services/pricing.py, so shops with no rows price exactly as before.
+
+CREATE TABLE IF NOT EXISTS shop_page_rates (
+    shop_id UUID NOT NULL REFERENCES shops(id) ON DELETE CASCADE,
+    color_mode TEXT NOT NULL CHECK (color_mode IN ('BW', 'COLOR')),
+    side_mode TEXT NOT NULL CHECK (side_mode IN ('SINGLE', 'DOUBLE')),
+    per_page NUMERIC(8, 2) NOT NULL CHECK (per_page >= 0),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (shop_id, color_mode, side_mode)
+);
+
+CREATE TABLE IF NOT EXISTS shop_binding_rates (
+    shop_id UUID NOT NULL REFERENCES shops(id) ON DELETE CASCADE,
+    binding TEXT NOT NULL CHECK (binding IN ('NONE', 'SOFT', 'SPIRAL')),
+    cost NUMERIC(8, 2) NOT NULL CHECK (cost >= 0),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (shop_id, binding)
+);
@@ -0,0 +1,42 @@
+-- Indexes for the listing, queue and detail queries. Every listing pages
+-- by (created_at, id) (app/services/pagination.py), so each filter gets
+-- a composite index ending in those two columns.
+-- Plain CREATE INDEX (migrations run in a transaction): this blocks
+-- writes to the table while it builds.
+
+-- Admin/shop listings, with and without a status filter
+CREATE INDEX IF NOT EXISTS orders_shop_created_idx
+    ON orders (shop_id, created_at, id);
+CREATE INDEX IF NOT EXISTS orders_shop_status_created_idx
+    ON orders (shop_id, status, created_at, id);
+
+-- Student listings, with and without a status filter
+CREATE INDEX IF NOT EXISTS orders_student_created_idx
+    ON orders (student_id, created_at, id);
+CREATE INDEX IF NOT EXISTS orders_student_status_created_idx
+    ON orders (student_id, status, created_at, id);
+
+-- Super admin listings across all shops
+CREATE INDEX IF NOT EXISTS orders_created_idx
+    ON orders (created_at, id);
+CREATE INDEX IF NOT EXISTS orders_status_created_idx
+    ON orders (status, created_at, id);
+
+-- The live queue only ever reads open orders, a small slice of the table
+CREATE INDEX IF NOT EXISTS orders_shop_queue_idx
+    ON orders (shop_id, created_at)
+    WHERE status IN ('PENDING', 'IN_PROGRESS');
+
+-- Latest document per order (the LATERAL in the admin listings)
+CREATE INDEX IF NOT EXISTS order_documents_order_uploaded_idx
+    ON order_documents (order_id, uploaded_at DESC);
+
+-- Blob dedup report and the blob foreign key
+CREATE INDEX IF NOT EXISTS order_documents_blob_idx
+    ON order_documents (blob_sha256)
+    WHERE blob_sha256 IS NOT NULL;
+
+-- /super-admin/admins
+CREATE INDEX IF NOT EXISTS users_admin_role_idx
+    ON users (role)
+    WHERE role IN ('ADMIN', 'SUPER_ADMIN');
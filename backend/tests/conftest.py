@@ -0,0 +1,94 @@
+"""
+Tests run against a real Postgres, migrated and seeded with a small data
+set by benchmarks/seed.py:
+
+    TEST_DATABASE_URL=postgresql://localhost/printmate_test python -m pytest -q
+
+Tests that need the database are skipped when TEST_DATABASE_URL is not
+set. Don't point it at a database you care about: seeded rows are reset
+on every run and the tests write orders of their own.
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, "benchmarks"))
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+# app.database builds its engine at import time; it only connects on use,
+# so a placeholder is enough for the tests that never touch the database.
+os.environ["DATABASE_URL"] = TEST_DATABASE_URL or "postgresql://localhost/printmate_test"
+# Any route going over its @query_budget fails the test that called it.
+os.environ["QUERY_BUDGET_STRICT"] = "true"
+# Uploads go to a scratch directory, never to Supabase.
+os.environ["STORAGE_BACKEND"] = "local"
+os.environ.setdefault("LOCAL_STORAGE_DIR", tempfile.mkdtemp(prefix="printmate-test-"))
+
+SEED_SHOPS = 3
+SEED_STUDENTS = 20
+SEED_ORDERS = 300
+
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+async def seeded(anyio_backend):
+    """Ids of one seeded shop, student and order, as strings."""
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+
+    import asyncpg
+    from seed import sample_ids, seed
+
+    connection = await asyncpg.connect(TEST_DATABASE_URL)
+    try:
+        await seed(connection, SEED_SHOPS, SEED_STUDENTS, SEED_ORDERS, reset=True)
+        ids = await sample_ids(connection)
+    finally:
+        await connection.close()
+
+    yield ids
+
+    from app.database import engine
+    await engine.dispose()
+
+
+@pytest.fixture(scope="session")
+async def client(seeded):
+    import httpx
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+@pytest.fixture
+def admin_headers(seeded):
+    return {"X-ROLE": "ADMIN", "X-SHOP-ID": seeded["shop_id"]}
+
+
+@pytest.fixture
+def student_headers(seeded):
+    return {"X-STUDENT-ID": seeded["student_id"]}
+
+
+@pytest.fixture
+async def new_order(client, seeded, student_headers):
+    """A fresh PENDING order of the seeded student's at the seeded shop."""
+    res = await client.post("/orders/", headers=student_headers, json={
+        "shop_id": seeded["shop_id"],
+        "total_pages": 4,
+        "estimated_cost": 4
+    })
+    assert res.status_code == 200, res.text
+    return res.json()
@@ -0,0 +1,80 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+def test_app_imports():
+    from app.main import app
+
+    paths = {route.path for route in app.routes}
+    assert "/shops/{shop_id}/rates" in paths
+
+
+async def test_admin_updates_own_shop_rates(client, admin_headers, seeded):
+    shop_id = seeded["shop_id"]
+
+    res = await client.put(
+        f"/shops/{shop_id}/rates",
+        json={"binding_costs": {"SPIRAL": 25}},
+        headers=admin_headers
+    )
+    assert res.status_code == 200
+    assert res.json()["binding_costs"]["SPIRAL"] == 25
+
+    res = await client.get(f"/shops/{shop_id}/rates")
+    assert res.json()["binding_costs"]["SPIRAL"] == 25
+
+    # Put the default back for the pricing tests.
+    await client.put(
+        f"/shops/{shop_id}/rates",
+        json={"binding_costs": {"SPIRAL": 30}},
+        headers=admin_headers
+    )
+
+
+async def test_admin_cannot_update_other_shop_rates(client, admin_headers):
+    res = await client.put(
+        "/shops/00000000-0000-0000-0000-000000000000/rates",
+        json={"binding_costs": {"SPIRAL": 25}},
+        headers=admin_headers
+    )
+    assert res.status_code == 403
+
+
+async def test_admin_needs_shop_header(client, seeded):
+    res = await client.put(
+        f"/shops/{seeded['shop_id']}/rates",
+        json={},
+        headers={"X-ROLE": "ADMIN"}
+    )
+    assert res.status_code == 400
+
+
+async def test_unknown_shop_rates_and_quotes_404(client):
+    for shop_id in ("00000000-0000-0000-0000-000000000000", "not-a-shop"):
+        res = await client.get(f"/shops/{shop_id}/rates")
+        assert res.status_code == 404
+
+        res = await client.post(f"/shops/{shop_id}/quote", json={"total_pages": 1})
+        assert res.status_code == 404
+
+
+async def test_quote_rejects_non_object_matrix(client, seeded):
+    res = await client.post(
+        f"/shops/{seeded['shop_id']}/quote",
+        json={"total_pages": 4, "matrix": ["copies"]}
+    )
+    assert res.status_code == 400
+
+
+@pytest.mark.parametrize("copies", [None, [2], "two"])
+async def test_create_order_rejects_bad_copies(client, seeded, student_headers, copies):
+    res = await client.post("/orders/", headers=student_headers, json={
+        "shop_id": seeded["shop_id"],
+        "total_pages": 4,
+        "color_mode": "BW",
+        "side_mode": "SINGLE",
+        "binding": "NONE",
+        "copies": copies
+    })
+    assert res.status_code == 400
@@ -0,0 +1,78 @@
+import base64
+import json
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from app.services.pagination import (
+    MAX_PAGE_SIZE,
+    NEXT_CURSOR_HEADER,
+    decode_cursor,
+    encode_cursor,
+    page_size,
+)
+
+pytestmark = pytest.mark.anyio
+
+
+def raw_cursor(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip("=")
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+    row_id = uuid.uuid4()
+
+    assert decode_cursor(encode_cursor(created_at, row_id)) == (created_at, str(row_id))
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    raw_cursor(["2026-01-02T03:04:05+00:00"]),
+    raw_cursor(["not a date", str(uuid.uuid4())]),
+    raw_cursor(["2026-01-02T03:04:05+00:00", "not-a-uuid"]),
+    raw_cursor(["2026-01-02T03:04:05+00:00", 42]),
+])
+def test_bad_cursor_is_400(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+    assert error.value.status_code == 400
+
+
+def test_page_size_is_clamped():
+    assert page_size(0) == 1
+    assert page_size(10 ** 6) == MAX_PAGE_SIZE
+
+
+async def test_following_cursors_returns_every_order_once(client, student_headers):
+    everything = (await client.get(
+        "/student/orders", params={"limit": MAX_PAGE_SIZE}, headers=student_headers
+    )).json()
+    assert len(everything) > 3
+
+    seen = []
+    params = {"limit": 3}
+    while True:
+        res = await client.get("/student/orders", params=params, headers=student_headers)
+        assert res.status_code == 200
+        page = res.json()
+        assert len(page) <= 3
+        seen.extend(order["id"] for order in page)
+
+        cursor = res.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            break
+        params = {"limit": 3, "cursor": cursor}
+
+    assert seen == [order["id"] for order in everything]
+
+
+async def test_bad_cursor_on_a_route_is_400(client, student_headers):
+    res = await client.get(
+        "/student/orders",
+        params={"cursor": raw_cursor(["2026-01-02T03:04:05+00:00", "x"])},
+        headers=student_headers
+    )
+    assert res.status_code == 400
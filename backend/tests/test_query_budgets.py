@@ -0,0 +1,127 @@
+"""
+Every @query_budget route, called once under QUERY_BUDGET_STRICT (set in
+conftest.py), where going over the budget fails the request.
+"""
+
+import pytest
+from fastapi import FastAPI
+
+from app.database import PING, engine
+from app.services import query_trace
+from app.services.query_trace import query_budget
+from app.services.request_metrics import RequestMetricsMiddleware
+
+pytestmark = pytest.mark.anyio
+
+BUDGETED = {
+    ("POST", "/orders/"),
+    ("GET", "/orders/detail/{order_id}"),
+    ("PATCH", "/orders/{order_id}/status"),
+    ("POST", "/orders/{order_id}/finalize-cost"),
+    ("PATCH", "/orders/{order_id}/pay"),
+    ("POST", "/orders/bulk"),
+    ("PATCH", "/orders/{order_id}/verify-upi"),
+    ("GET", "/admin/orders/{order_id}"),
+    ("GET", "/student/orders/{order_id}"),
+    ("PATCH", "/student/orders/{order_id}/cancel"),
+}
+
+
+def test_strict_mode_is_on():
+    assert query_trace.QUERY_BUDGET_STRICT
+
+
+def test_every_budgeted_route_is_covered():
+    from app.main import app
+
+    budgeted = {
+        (method, route.path)
+        for route in app.routes
+        if getattr(getattr(route, "endpoint", None), "query_budget", None) is not None
+        for method in route.methods
+    }
+    assert budgeted == BUDGETED
+
+
+async def test_going_over_budget_fails(seeded):
+    import httpx
+
+    app = FastAPI()
+    app.add_middleware(RequestMetricsMiddleware)
+
+    @app.get("/two-queries")
+    @query_budget(1)
+    async def two_queries():
+        async with engine.connect() as connection:
+            await connection.execute(PING)
+            await connection.execute(PING)
+        return {}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        with pytest.raises(AssertionError, match="at most 1 queries"):
+            await client.get("/two-queries")
+
+
+async def test_reads(client, new_order, admin_headers, student_headers):
+    order_id = new_order["order_id"]
+
+    assert (await client.get(f"/orders/detail/{order_id}")).status_code == 200
+    assert (await client.get(f"/admin/orders/{order_id}", headers=admin_headers)).status_code == 200
+    assert (await client.get(f"/student/orders/{order_id}", headers=student_headers)).status_code == 200
+
+
+async def test_cash_flow(client, new_order, admin_headers):
+    order_id = new_order["order_id"]
+
+    res = await client.post(f"/orders/{order_id}/finalize-cost", headers=admin_headers)
+    assert res.status_code == 200
+    res = await client.patch(
+        f"/orders/{order_id}/status", json={"status": "IN_PROGRESS"}, headers=admin_headers
+    )
+    assert res.status_code == 200
+    res = await client.patch(
+        f"/orders/{order_id}/pay", json={"payment_mode": "CASH"}, headers=admin_headers
+    )
+    assert res.status_code == 200
+
+
+async def test_upi_flow(client, new_order, admin_headers):
+    order_id = new_order["order_id"]
+
+    await client.post(f"/orders/{order_id}/finalize-cost", headers=admin_headers)
+    res = await client.patch(
+        f"/orders/{order_id}/pay", json={"payment_mode": "UPI"}, headers=admin_headers
+    )
+    assert res.status_code == 200
+    res = await client.patch(
+        f"/orders/{order_id}/verify-upi", json={"decision": "APPROVE"}, headers=admin_headers
+    )
+    assert res.status_code == 200
+
+
+async def test_bulk(client, seeded, student_headers, admin_headers):
+    order_ids = []
+    for _ in range(3):
+        res = await client.post("/orders/", headers=student_headers, json={
+            "shop_id": seeded["shop_id"], "total_pages": 2, "estimated_cost": 2
+        })
+        order_ids.append(res.json()["order_id"])
+
+    res = await client.post("/orders/bulk", headers=admin_headers, json={
+        "order_ids": order_ids,
+        "actions": [
+            {"type": "finalize_cost"},
+            {"type": "status", "status": "IN_PROGRESS"},
+            {"type": "pay"}
+        ]
+    })
+    assert res.status_code == 200, res.text
+    assert res.json()["updated"] == 3
+
+
+async def test_cancel(client, new_order, student_headers):
+    res = await client.patch(
+        f"/student/orders/{new_order['order_id']}/cancel", headers=student_headers
+    )
+    assert res.status_code == 200
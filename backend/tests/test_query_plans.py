@@ -0,0 +1,48 @@
+import os
+
+import asyncpg
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_every_statement_has_an_index_and_samples(seeded):
+    from query_plans import check_plans, sample_params
+
+    connection = await asyncpg.connect(os.environ["TEST_DATABASE_URL"])
+    try:
+        results, failures = await check_plans(
+            connection, sample_params(seeded), baseline={}, force_index=True
+        )
+    finally:
+        await connection.close()
+
+    assert failures == {}
+    assert results
+
+
+async def test_seq_scans_are_reported(seeded):
+    from query_plans import check_plans, sample_params
+
+    connection = await asyncpg.connect(os.environ["TEST_DATABASE_URL"])
+    try:
+        # Without force_index the planner scans the small seeded tables.
+        _, failures = await check_plans(
+            connection, sample_params(seeded), baseline={}, only="student.all_orders"
+        )
+    finally:
+        await connection.close()
+
+    assert any("seq scan on orders" in problem for problem in failures["student.all_orders.first"])
+
+
+def test_plan_changes_are_reported():
+    from query_plans import compare
+
+    current = {"shape": ["Index Scan orders idx_orders_student"], "seq_scans": [], "buffers": 30}
+    baseline = {"shape": ["Index Scan orders idx_orders_shop"], "seq_scans": [], "buffers": 10}
+
+    problems = compare("x", current, baseline, slack=2.0)
+
+    assert any(problem.startswith("plan changed") for problem in problems)
+    assert "buffers 10 -> 30" in problems
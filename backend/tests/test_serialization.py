@@ -0,0 +1,69 @@
+import uuid
+from decimal import Decimal
+
+import orjson
+import pytest
+from sqlalchemy import text
+
+from app.services.serialization import rows_response
+
+pytestmark = pytest.mark.anyio
+
+
+def test_plain_values():
+    order_id = uuid.uuid4()
+    body = rows_response([{
+        "id": order_id,
+        "estimated_cost": Decimal("31.50"),
+        "total_pages": Decimal("12")
+    }]).body
+
+    assert orjson.loads(body) == [{
+        "id": str(order_id),
+        "estimated_cost": 31.5,
+        "total_pages": 12
+    }]
+
+
+async def test_driver_rows(seeded):
+    from app.database import engine
+
+    async with engine.connect() as connection:
+        rows = (await connection.execute(text(
+            "SELECT id, shop_id, estimated_cost, created_at FROM orders LIMIT 5"
+        ))).mappings().all()
+
+    # asyncpg's own UUID type, not uuid.UUID itself.
+    assert type(rows[0]["id"]) is not uuid.UUID
+
+    body = orjson.loads(rows_response(rows).body)
+    assert [row["id"] for row in body] == [str(row["id"]) for row in rows]
+
+
+LISTINGS = [
+    ("/shops/", None),
+    ("/shops/{shop_id}/orders", None),
+    ("/admin/orders", "admin"),
+    ("/admin/orders/status/PENDING", "admin"),
+    ("/student/orders", "student"),
+    ("/student/orders/pending", "student"),
+    ("/student/orders/in-progress", "student"),
+    ("/student/orders/completed", "student"),
+    ("/student/orders/cancelled", "student"),
+    ("/super-admin/orders", "super_admin"),
+]
+
+
+@pytest.mark.parametrize("path, headers", LISTINGS)
+async def test_listings_serialize(client, seeded, admin_headers, student_headers, path, headers):
+    headers = {
+        None: {},
+        "admin": admin_headers,
+        "student": student_headers,
+        "super_admin": {"X-ROLE": "SUPER_ADMIN"},
+    }[headers]
+
+    res = await client.get(path.format(**seeded), headers=headers)
+
+    assert res.status_code == 200
+    assert isinstance(res.json(), list)
@@ -0,0 +1,75 @@
+import uuid
+
+import pytest
+
+from app.services.order_transitions import allowed_from
+
+pytestmark = pytest.mark.anyio
+
+
+def test_allowed_from():
+    assert allowed_from("IN_PROGRESS") == ["PENDING"]
+    assert allowed_from("CANCELLED") == ["PENDING"]
+    assert allowed_from("DELIVERED") == ["COMPLETED"]
+    assert allowed_from("PENDING") == []
+
+
+async def test_order_lifecycle(client, admin_headers, new_order):
+    order_id = new_order["order_id"]
+
+    async def patch(path, json=None):
+        return await client.patch(f"/orders/{order_id}/{path}", json=json, headers=admin_headers)
+
+    res = await client.post(f"/orders/{order_id}/finalize-cost", headers=admin_headers)
+    assert res.status_code == 200
+    assert res.json()["final_cost"] is not None
+
+    res = await client.post(f"/orders/{order_id}/finalize-cost", headers=admin_headers)
+    assert res.status_code == 400
+
+    assert (await patch("status", {"status": "COMPLETED"})).status_code == 400
+    assert (await patch("status", {"status": "IN_PROGRESS"})).json()["status"] == "IN_PROGRESS"
+    assert (await patch("status", {"status": "COMPLETED"})).json()["status"] == "COMPLETED"
+
+    res = await patch("status", {"status": "DELIVERED"})
+    assert res.status_code == 400
+    assert res.json()["detail"] == "Must be PAID before delivery"
+
+    res = await patch("pay", {"payment_mode": "CASH"})
+    assert res.status_code == 200
+    assert res.json()["payment_status"] == "PAID"
+    assert (await patch("pay", {"payment_mode": "CASH"})).status_code == 400
+
+    assert (await patch("status", {"status": "DELIVERED"})).json()["status"] == "DELIVERED"
+
+
+async def test_other_shop_and_unknown_orders(client, new_order):
+    other_admin = {"X-ROLE": "ADMIN", "X-SHOP-ID": str(uuid.uuid4())}
+
+    res = await client.patch(
+        f"/orders/{new_order['order_id']}/status",
+        json={"status": "IN_PROGRESS"},
+        headers=other_admin
+    )
+    assert res.status_code == 403
+
+    res = await client.patch(
+        f"/orders/{uuid.uuid4()}/status",
+        json={"status": "IN_PROGRESS"},
+        headers={"X-ROLE": "SUPER_ADMIN"}
+    )
+    assert res.status_code == 404
+
+
+async def test_student_cancel(client, student_headers, new_order):
+    path = f"/student/orders/{new_order['order_id']}/cancel"
+
+    res = await client.patch(path, headers={"X-STUDENT-ID": str(uuid.uuid4())})
+    assert res.status_code == 404
+
+    res = await client.patch(path, headers=student_headers)
+    assert res.status_code == 200
+    assert res.json()["status"] == "CANCELLED"
+
+    res = await client.patch(path, headers=student_headers)
+    assert res.status_code == 400
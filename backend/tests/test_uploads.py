@@ -0,0 +1,44 @@
+import os
+
+import pytest
+
+from app.routes import student
+
+pytestmark = pytest.mark.anyio
+
+PDF = b"%PDF-1.4\n" + os.urandom(64) + b"\n%%EOF\n"
+
+
+def pdf_upload(content=PDF):
+    return {"file": ("notes.pdf", content, "application/pdf")}
+
+
+async def test_upload_then_deduplicate(client, student_headers, new_order, seeded):
+    order_id = new_order["order_id"]
+
+    first = await client.post(
+        f"/student/orders/{order_id}/upload", files=pdf_upload(), headers=student_headers
+    )
+    assert first.status_code == 200, first.text
+    assert first.json()["deduplicated"] is False
+
+    second = await client.post(
+        f"/student/orders/{order_id}/upload", files=pdf_upload(), headers=student_headers
+    )
+    assert second.status_code == 200
+    assert second.json()["deduplicated"] is True
+    assert second.json()["file_url"] == first.json()["file_url"]
+
+
+async def test_rejected_uploads_are_not_hashed(client, new_order, monkeypatch):
+    async def hash_document(source):
+        raise AssertionError("hashed an upload that should have been rejected")
+
+    monkeypatch.setattr(student, "hash_document", hash_document)
+
+    res = await client.post(
+        f"/student/orders/{new_order['order_id']}/upload",
+        files=pdf_upload(),
+        headers={"X-STUDENT-ID": "00000000-0000-0000-0000-000000000000"}
+    )
+    assert res.status_code == 403
@@ -63,3 +63,31 @@ api.interceptors.request.use(config => {
   }
   return config;
 });
+
+// -----------------------------
+// Paged listings
+// -----------------------------
+// Order listings return one page at a time and put the next page's cursor
+// in the X-Next-Cursor header (absent on the last page). The pages here
+// filter and count client-side, so they follow it to the end.
+const LIST_PAGE_SIZE = 200; // the API's largest page
+
+async function getAllPages(url) {
+  const rows = [];
+  let cursor = null;
+
+  do {
+    const params = { limit: LIST_PAGE_SIZE };
+    if (cursor) params.cursor = cursor;
+
+    const res = await api.get(url, { params });
+    rows.push(...(Array.isArray(res.data) ? res.data : []));
+    cursor = res.headers["x-next-cursor"];
+  } while (cursor);
+
+  return rows;
+}
+
+if (typeof window !== "undefined") {
+  window.getAllPages = window.getAllPages || getAllPages;
+}
@@ -56,6 +56,9 @@ let previewModalJob = 0;
 let detectedPages = 0;
 let shopId = null;
 let shopOpen = false;
+let priceGrid = null;
+let priceGridRequest = null;
+let rateCard = null;
 
 if (window.pdfjsLib && window.pdfjsLib.GlobalWorkerOptions) {
   window.pdfjsLib.GlobalWorkerOptions.workerSrc =
@@ -90,22 +93,65 @@ function formatCurrency(value) {
   }
 }
 
+function priceKey(color, side, bindingValue, copiesValue) {
+  return `${color}|${side}|${bindingValue}|${copiesValue}`;
+}
+
+// Fetches every option combination's price for this page count from the
+// shop's rate card in one request; option changes then reprice locally.
+function loadPriceGrid(pages) {
+  if (!shopId || !pages) return;
+  if (priceGrid?.pages === pages || priceGridRequest === pages) return;
+
+  const maxCopies = Number(copies?.max) || 10;
+  priceGridRequest = pages;
+
+  api.post(`/shops/${shopId}/quote`, {
+    total_pages: pages,
+    matrix: { copies: Array.from({ length: maxCopies }, (_, i) => i + 1) }
+  })
+    .then(res => {
+      if (priceGridRequest !== pages) return;
+      const prices = new Map();
+      res.data.quotes.forEach(q => {
+        prices.set(priceKey(q.color_mode, q.side_mode, q.binding, q.copies), q.price);
+      });
+      priceGrid = { pages, prices };
+      calculateEstimate();
+    })
+    .catch(() => {})
+    .finally(() => {
+      if (priceGridRequest === pages) priceGridRequest = null;
+    });
+}
+
 function calculateEstimate() {
   if (!detectedPages) {
     pricePreview.textContent = "INR 0";
     return 0;
   }
 
-  const isColor = colorMode.value === "COLOR";
-  const isDouble = sideMode.value === "DOUBLE";
-  const isSpiral = binding.value === "SPIRAL";
   const copiesValue = Number(copies.value) || 1;
 
-  const pageCost = isColor ? 5 : 1;
-  const bindingCost = isSpiral ? 20 : 0;
-  const effectivePages = isDouble ? Math.ceil(detectedPages / 2) : detectedPages;
+  loadPriceGrid(detectedPages);
+  const quoted = priceGrid?.pages === detectedPages
+    ? priceGrid.prices.get(priceKey(colorMode.value, sideMode.value, binding.value, copiesValue))
+    : undefined;
+  if (quoted !== undefined) {
+    pricePreview.textContent = formatCurrency(quoted);
+    return quoted;
+  }
 
-  const total = (effectivePages * pageCost * copiesValue) + bindingCost;
+  // Until the grid arrives (or if the quote call fails), price from the
+  // shop's rate card the same way the server does.
+  const perPage = rateCard?.page_rates?.[colorMode.value]?.[sideMode.value];
+  if (perPage === undefined) {
+    pricePreview.textContent = "Calculating…";
+    return null;
+  }
+
+  const bindingCost = rateCard.binding_costs?.[binding.value] || 0;
+  const total = Math.trunc(detectedPages * perPage * copiesValue + bindingCost);
   pricePreview.textContent = formatCurrency(total);
   return total;
 }
@@ -854,6 +900,13 @@ function loadShop() {
       console.error("Shop load error:", err);
       setNote(createState, "Failed to load shop details.", "error");
     });
+
+  api.get(`/shops/${shopId}/rates`)
+    .then(res => {
+      rateCard = res.data;
+      calculateEstimate();
+    })
+    .catch(err => console.error("Rate card load error:", err));
 }
 
 
@@ -967,6 +1020,10 @@ safeAddListener(createBtn, "click", async () => {
   }
 
   const estimatedCost = calculateEstimate();
+  if (estimatedCost === null) {
+    setNote(createState, "Price is still loading, try again in a moment.", "error");
+    return;
+  }
   setNote(createState, "Preparing document…", "loading");
 
   try {